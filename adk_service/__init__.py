@@ -0,0 +1,24 @@
+"""
+ADK Service Utilities
+
+Shared by api-server and mcp-server: the ADK API client (session pool,
+``/run`` and routing over several ADK backends), per-agent bulkheads,
+request deadlines and cancellation, priority classes, idempotent results,
+per-request usage accounting, response projection, distributed tracing
+setup, and a launcher for the ADK API server with trace propagation, run
+cancellation, priority scheduling and a bounded session store.
+Agent code lives in team/ and does not import this package.
+"""
+
+from .backends import Backend, Backends, backends
+from .bulkheads import Bulkhead, BulkheadFull, Bulkheads, bulkheads
+from .client import (
+    AgentRun, cancel_run, list_apps, list_sessions, run_agent, run_agent_async, run_agent_with_usage, session_pool,
+)
+from .deadlines import DEADLINE_HEADER, Deadline, DeadlineExceeded, RunCancelled
+from .idempotency import IdempotencyConflict, IdempotencyStore, idempotency
+from .projection import VIEWS, View, project, project_usage
+from .scheduler import PRIORITY_HEADER, UnknownPriority
+from .sessions import SessionPool
+from .tracing import TraceContextMiddleware, configure_tracing, inject_headers, span, traced
+from .usage import UsageLedger, ledger, summarize_events
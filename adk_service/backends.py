@@ -0,0 +1,224 @@
+"""
+ADK Backends
+
+The ADK API servers the client spreads runs over. With several URLs in
+ADK_API_URLS, agent execution scales horizontally behind api-server and
+mcp-server:
+
+- least outstanding requests: a new session goes to the backend with the
+  fewest requests in flight from this process (ties broken at random), and
+  the session pool lends the idle session whose backend is least busy;
+- session affinity: the session's create, run, get and delete go to the
+  backend that created it (ADK keeps sessions in the server's memory), so
+  the client remembers each session's backend until it is deleted;
+- ejection: ADK_EJECT_AFTER consecutive failures (connection errors, 5xx)
+  or a failed health check (``GET /list-apps`` every ADK_HEALTH_INTERVAL_S)
+  take a backend out of rotation. A passing health check brings it back;
+  without health checks it is tried again after ADK_EJECT_S. Pooled
+  sessions on an ejected backend are dropped. If every backend is ejected,
+  all are used rather than none.
+
+Runs are cancelled on every backend (``POST /runs/{id}/cancel`` answers 404
+where the run is not in progress), ``list_sessions`` merges all of them,
+and a session whose backend is not known (e.g. an orphan found by the
+session reaper) is deleted on all of them. ``backends.report()`` (api-server ``GET /health``) gives each
+backend's state and counters.
+
+Configuration (environment variables):
+    ADK_API_URLS: comma-separated ADK API server URLs (default: ADK_API_URL).
+    ADK_API_URL: the single ADK API server otherwise (default:
+        http://localhost:8000).
+    ADK_HEALTH_INTERVAL_S: period of the health checks with more than one
+        backend; 0 disables them (default: 5).
+    ADK_EJECT_AFTER: consecutive failed requests that eject a backend
+        (default: 3).
+    ADK_EJECT_S: time an ejected backend stays out without health checks
+        (default: 30).
+"""
+
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+ADK_API_URLS = [url.strip().rstrip("/") for url in
+                os.getenv("ADK_API_URLS", os.getenv("ADK_API_URL", "http://localhost:8000")).split(",") if url.strip()]
+ADK_HEALTH_INTERVAL_S = float(os.getenv("ADK_HEALTH_INTERVAL_S", "5"))
+ADK_EJECT_AFTER = int(os.getenv("ADK_EJECT_AFTER", "3"))
+ADK_EJECT_S = float(os.getenv("ADK_EJECT_S", "30"))
+HEALTH_TIMEOUT_S = 2.0
+# Sessions whose backend is remembered; the oldest are forgotten beyond this.
+AFFINITY_CAPACITY = 100_000
+
+
+class Backend:
+    """One ADK API server and its in-flight requests and failure counters."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.stats = {"requests": 0, "failed": 0, "ejections": 0}
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+
+class Backends:
+    """Least-outstanding-requests routing with session affinity and ejection over ADK API servers."""
+
+    def __init__(self, urls: List[str] = ADK_API_URLS, health_interval_s: float = ADK_HEALTH_INTERVAL_S,
+                 eject_after: int = ADK_EJECT_AFTER, eject_s: float = ADK_EJECT_S):
+        self.health_interval_s = health_interval_s
+        self.eject_after = eject_after
+        self.eject_s = eject_s
+        self._lock = threading.Lock()
+        self._affinity: "OrderedDict[str, Backend]" = OrderedDict()
+        self._checker: Optional[threading.Thread] = None
+        self.set_urls(urls)
+
+    def set_urls(self, urls: List[str]) -> None:
+        """Replaces the backends (and forgets every session's backend)."""
+        with self._lock:
+            self.backends = [Backend(url.rstrip("/")) for url in urls]
+            self._affinity.clear()
+
+    # --- Routing ---
+    def _candidates(self) -> List[Backend]:
+        now = time.monotonic()
+        return [b for b in self.backends if b.available(now)] or self.backends
+
+    def pick(self) -> Backend:
+        """The available backend with the fewest requests in flight."""
+        self._start_checker()
+        with self._lock:
+            return min(self._candidates(), key=lambda b: (b.outstanding, random.random()))
+
+    def all(self) -> List[Backend]:
+        """Every available backend (every backend if none is)."""
+        with self._lock:
+            return self._candidates()
+
+    def pin(self, session_id: str, backend: Backend) -> None:
+        with self._lock:
+            self._affinity[session_id] = backend
+            self._affinity.move_to_end(session_id)
+            if len(self._affinity) > AFFINITY_CAPACITY:
+                self._affinity.popitem(last=False)
+
+    def unpin(self, session_id: str) -> None:
+        with self._lock:
+            self._affinity.pop(session_id, None)
+
+    def pinned(self, session_id: str) -> Optional[Backend]:
+        """The backend remembered for ``session_id``, if any."""
+        with self._lock:
+            return self._affinity.get(session_id)
+
+    def for_session(self, session_id: str) -> Backend:
+        """The backend holding ``session_id`` (a newly picked one if it is unknown)."""
+        with self._lock:
+            backend = self._affinity.get(session_id)
+        return backend if backend is not None else self.pick()
+
+    def rank(self, session_id: str) -> float:
+        """Session pool preference: requests in flight on the session's backend; inf once it is ejected."""
+        with self._lock:
+            backend = self._affinity.get(session_id)
+            if backend is None:
+                return 0.0
+            return backend.outstanding if backend.available(time.monotonic()) else math.inf
+
+    # --- Outcomes ---
+    @contextmanager
+    def track(self, backend: Backend) -> Iterator[None]:
+        """Counts a request in flight on ``backend``."""
+        with self._lock:
+            backend.outstanding += 1
+            backend.stats["requests"] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                backend.outstanding -= 1
+
+    def record(self, backend: Backend, ok: bool) -> None:
+        with self._lock:
+            if ok:
+                backend.failures = 0
+                return
+            backend.failures += 1
+            backend.stats["failed"] += 1
+            if backend.failures >= self.eject_after and backend.available(time.monotonic()):
+                self._eject(backend, f"{backend.failures} consecutive failures")
+
+    def _eject(self, backend: Backend, reason: str) -> None:
+        if len(self.backends) < 2:
+            return
+        backend.ejected_until = time.monotonic() + self.eject_s
+        backend.stats["ejections"] += 1
+        logger.warning("Ejected ADK backend %s: %s", backend.url, reason)
+
+    # --- Health checks ---
+    def check(self) -> None:
+        """One round of health checks: ejects failing backends and brings passing ones back."""
+        for backend in list(self.backends):
+            try:
+                healthy = requests.get(f"{backend.url}/list-apps", timeout=HEALTH_TIMEOUT_S).ok
+            except requests.RequestException:
+                healthy = False
+            with self._lock:
+                ejected = not backend.available(time.monotonic())
+                if healthy and ejected:
+                    backend.ejected_until = 0.0
+                    backend.failures = 0
+                    logger.info("ADK backend %s is back", backend.url)
+                elif not healthy:
+                    if ejected:
+                        backend.ejected_until = time.monotonic() + self.eject_s
+                    else:
+                        self._eject(backend, "health check failed")
+
+    def _start_checker(self) -> None:
+        if self._checker is not None or self.health_interval_s <= 0 or len(self.backends) < 2:
+            return
+        with self._lock:
+            if self._checker is not None:
+                return
+            self._checker = threading.Thread(target=self._check_loop, name="adk-health", daemon=True)
+        self._checker.start()
+
+    def _check_loop(self) -> None:
+        while True:
+            time.sleep(self.health_interval_s)
+            try:
+                self.check()
+            except Exception:
+                logger.exception("ADK health check failed")
+
+    def report(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                backend.url: {
+                    "available": backend.available(now),
+                    "outstanding": backend.outstanding,
+                    "consecutive_failures": backend.failures,
+                    **backend.stats,
+                }
+                for backend in self.backends
+            }
+
+
+backends = Backends()
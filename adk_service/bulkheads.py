@@ -0,0 +1,227 @@
+"""
+Bulkheads per Agent Pipeline
+
+A ``sequential_analyzer_agent`` run takes several times as long as a
+``simple_prescription_agent`` run, and both used to share the client's
+worker threads and keep-alive connections: a burst of sequential runs held
+every thread and the simple checks queued behind them. Each agent now has
+its own bulkhead in ``run_agent_async`` (api-server, mcp-server):
+
+- its own worker threads and keep-alive connections to the ADK server
+  (``max_concurrent`` of each), so one pipeline cannot take another's;
+- a bounded queue: with every slot in use, up to ``max_queue`` runs wait,
+  in arrival order, at most ``max_wait_s`` (or the run's deadline if
+  sooner);
+- fast rejection: a run that finds the queue full, or waits longer than
+  ``max_wait_s``, raises BulkheadFull (api-server: 503 with Retry-After)
+  instead of adding to the backlog.
+
+``bulkheads.report()`` (api-server ``GET /bulkheads``, MCP
+``get_bulkhead_report``) gives utilization, queue length, rejections and
+waiting time per bulkhead; the OpenTelemetry metrics are
+``bulkhead.inflight``, ``bulkhead.queued`` and ``bulkhead.rejected``.
+
+Configuration (environment variables):
+    BULKHEADS: "agent=max_concurrent:max_queue:max_wait_s" per agent
+        (default: "simple_prescription_agent=16:64:5,
+        parallel_analyzer_agent=8:32:15,sequential_analyzer_agent=4:16:30").
+    BULKHEAD_DEFAULT: the same for other agents (default: "8:32:10").
+    BULKHEADS_ENABLED: 0 runs every agent on the shared pool
+        (ADK_HTTP_POOL_SIZE) as before (default: 1).
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, Optional, Tuple
+
+import requests
+from opentelemetry import metrics
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+DEFAULT_BULKHEADS = "simple_prescription_agent=16:64:5,parallel_analyzer_agent=8:32:15,sequential_analyzer_agent=4:16:30"
+BULKHEADS_ENABLED = os.getenv("BULKHEADS_ENABLED", "1") != "0"
+# Smoothing of the run time that Retry-After is estimated from.
+RUN_TIME_ALPHA = 0.2
+
+Limits = Tuple[int, int, float]
+
+
+def parse_limits(spec: str) -> Limits:
+    """"8:32:10" -> (8, 32, 10.0)."""
+    max_concurrent, max_queue, max_wait_s = spec.split(":")
+    return int(max_concurrent), int(max_queue), float(max_wait_s)
+
+
+def parse_bulkheads(spec: str) -> Dict[str, Limits]:
+    bulkheads = {}
+    for item in spec.split(","):
+        name, _, limits = item.partition("=")
+        if limits:
+            bulkheads[name.strip()] = parse_limits(limits)
+    return bulkheads
+
+
+BULKHEADS = parse_bulkheads(os.getenv("BULKHEADS", DEFAULT_BULKHEADS))
+BULKHEAD_DEFAULT = parse_limits(os.getenv("BULKHEAD_DEFAULT", "8:32:10"))
+
+
+class BulkheadFull(RuntimeError):
+    """Raised when an agent's bulkhead is saturated; retry after ``retry_after_s``."""
+
+    def __init__(self, message: str, retry_after_s: float):
+        super().__init__(message)
+        self.retry_after_s = retry_after_s
+
+
+class _Waiter:
+    __slots__ = ("future", "granted")
+
+    def __init__(self):
+        self.future = asyncio.get_running_loop().create_future()
+        self.granted = False
+
+
+class Bulkhead:
+    """Slots, queue, worker threads and HTTP connections of one agent (slots on one event loop)."""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait_s: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait_s = max_wait_s
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix=f"bulkhead-{name}")
+        self.http = requests.Session()
+        self.http.mount("http://", HTTPAdapter(pool_maxsize=max_concurrent))
+        self.http.mount("https://", HTTPAdapter(pool_maxsize=max_concurrent))
+        self.inflight = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._run_s = 0.0
+        self.stats = {"accepted": 0, "rejected_full": 0, "rejected_wait": 0, "peak_inflight": 0,
+                      "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+
+    def retry_after_s(self) -> float:
+        """About when a slot frees: the typical run time, at least a second."""
+        return max(1.0, math.ceil(self._run_s))
+
+    def _accept(self, waited_ms: float) -> None:
+        self.stats["accepted"] += 1
+        self.stats["peak_inflight"] = max(self.stats["peak_inflight"], self.inflight)
+        self.stats["wait_ms_total"] += waited_ms
+        self.stats["wait_ms_max"] = max(self.stats["wait_ms_max"], waited_ms)
+
+    def _reject(self, reason: str, message: str) -> BulkheadFull:
+        self.stats[f"rejected_{reason}"] += 1
+        _rejected.add(1, {"bulkhead": self.name, "reason": reason})
+        return BulkheadFull(f"{self.name}: {message}", self.retry_after_s())
+
+    async def acquire(self, timeout_s: Optional[float] = None) -> None:
+        """Takes a slot, waiting at most ``max_wait_s`` (or ``timeout_s`` if sooner)."""
+        if self.inflight < self.max_concurrent and not self._waiters:
+            self.inflight += 1
+            self._accept(0.0)
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("full", f"{self.inflight} runs in progress and {len(self._waiters)} queued")
+        waiter = _Waiter()
+        self._waiters.append(waiter)
+        queued_at = time.monotonic()
+        wait_s = self.max_wait_s if timeout_s is None else min(self.max_wait_s, timeout_s)
+        try:
+            await asyncio.wait_for(waiter.future, wait_s)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.granted:
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._reject("wait", f"no slot within {wait_s:g}s") from None
+        self._accept((time.monotonic() - queued_at) * 1000)
+
+    def release(self, run_s: Optional[float] = None) -> None:
+        if run_s is not None:
+            self._run_s += RUN_TIME_ALPHA * (run_s - self._run_s) if self._run_s else run_s
+        # The slot passes straight to the next run in the queue (skipping runs cancelled meanwhile).
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.future.done():
+                waiter.granted = True
+                waiter.future.set_result(None)
+                return
+        self.inflight -= 1
+
+    @asynccontextmanager
+    async def slot(self, timeout_s: Optional[float] = None) -> AsyncIterator[None]:
+        await self.acquire(timeout_s)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def report(self) -> Dict[str, Any]:
+        accepted = self.stats["accepted"]
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "max_wait_s": self.max_wait_s,
+            "inflight": self.inflight,
+            "queued": len(self._waiters),
+            "utilization": round(self.inflight / self.max_concurrent, 2),
+            "peak_inflight": self.stats["peak_inflight"],
+            "accepted": accepted,
+            "rejected_full": self.stats["rejected_full"],
+            "rejected_wait": self.stats["rejected_wait"],
+            "wait_ms_mean": round(self.stats["wait_ms_total"] / accepted, 1) if accepted else 0.0,
+            "run_s_recent": round(self._run_s, 2),
+        }
+
+
+class Bulkheads:
+    """One Bulkhead per agent, created on first use from ``limits`` (or ``default``)."""
+
+    def __init__(self, limits: Dict[str, Limits] = BULKHEADS, default: Limits = BULKHEAD_DEFAULT,
+                 enabled: bool = BULKHEADS_ENABLED):
+        self.limits = limits
+        self.default = default
+        self.enabled = enabled
+        self._bulkheads: Dict[str, Bulkhead] = {}
+
+    def register(self, agent_names: Iterable[str]) -> None:
+        """Creates the bulkheads of a front end's agents up front, so they are reported before any run."""
+        for name in agent_names:
+            self.get(name)
+
+    def get(self, agent_name: str) -> Bulkhead:
+        bulkhead = self._bulkheads.get(agent_name)
+        if bulkhead is None:
+            limits = self.limits.get(agent_name, self.default)
+            bulkhead = self._bulkheads[agent_name] = Bulkhead(agent_name, *limits)
+            logger.info("Bulkhead %s: %d concurrent, %d queued, %gs wait", agent_name, *limits)
+        return bulkhead
+
+    def report(self) -> Dict[str, Any]:
+        return {name: bulkhead.report() for name, bulkhead in self._bulkheads.items()}
+
+
+bulkheads = Bulkheads()
+
+_meter = metrics.get_meter("adk_service.bulkheads")
+_rejected = _meter.create_counter("bulkhead.rejected", unit="{run}", description="Runs rejected by a bulkhead")
+for _name, _field, _description in (("bulkhead.inflight", "inflight", "Runs in progress per bulkhead"),
+                                    ("bulkhead.queued", "queued", "Runs waiting for a slot per bulkhead")):
+    _meter.create_observable_gauge(
+        _name, unit="{run}", description=_description,
+        callbacks=[lambda options, field=_field: [
+            metrics.Observation(values[field], {"bulkhead": name}) for name, values in bulkheads.report().items()
+        ]],
+    )
@@ -0,0 +1,351 @@
+"""
+ADK API Client
+
+The session lifecycle used by api-server and mcp-server to run an agent on
+the ADK API servers (one or several, see backends.py). With the session pool (sessions.py, the default) a
+request borrows a pre-created empty session and only POSTs /run: the final
+state is rebuilt from the state deltas of the returned events, and the
+session is recycled in the background. With SESSION_POOL_SIZE=0 every
+request creates a session, runs, reads the session back and deletes it.
+Calls share a keep-alive connection pool. Each step is a span and every
+request carries the trace context, so the ADK server's agent spans join the
+caller's trace.
+``run_agent_with_usage`` also returns the request's usage block (tokens per
+sub-agent, LLM/tool/RENAME calls, wall time per stage; see usage.py) and
+records it in the per-agent/per-caller ledger. An idempotency key makes
+retries return the first run's result (idempotency.py).
+Every run has a deadline (deadlines.py): each ADK call carries the remaining
+budget and the run id, and ``run_agent_async`` cancels the run on the ADK
+server when the deadline passes or the caller disconnects. Runs also carry
+their priority class (interactive, batch, background; scheduler.py), by
+which the ADK server admits them. ``run_agent_async`` runs each agent in its
+own bulkhead (bulkheads.py): worker threads, connections and a bounded
+queue per agent, so a burst of one pipeline cannot stall the others.
+
+Configuration (environment variables):
+    ADK_API_URLS / ADK_API_URL: ADK API server URLs (see backends.py;
+        default: http://localhost:8000).
+    ADK_HTTP_POOL_SIZE: keep-alive connections kept to the ADK server
+        (default: 32).
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import deadlines, scheduler
+from .backends import Backend, backends
+from .bulkheads import BulkheadFull, bulkheads
+from .deadlines import (
+    DISCONNECT_POLL_S, STATUS_CANCELLED, STATUS_DEADLINE, Deadline, DeadlineExceeded, RunCancelled,
+)
+from .idempotency import fingerprint, idempotency
+from .sessions import SessionPool, new_session_id
+from .tracing import inject_headers, span
+from .usage import DEFAULT_CALLER, ledger, summarize_events
+
+# --- Constants ---
+HTTP_POOL_SIZE = int(os.getenv("ADK_HTTP_POOL_SIZE", "32"))
+# State keys ADK drops instead of persisting in the session.
+TEMP_STATE_PREFIX = "temp:"
+
+_http = requests.Session()
+_http.mount("http://", HTTPAdapter(pool_maxsize=HTTP_POOL_SIZE))
+_http.mount("https://", HTTPAdapter(pool_maxsize=HTTP_POOL_SIZE))
+# Threads of run_agent_async without bulkheads: at most one run per keep-alive connection.
+_executor = ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE, thread_name_prefix="adk-run")
+# Connections of the bulkhead the current run is in (bulkheads.py); _http otherwise.
+_bound_http: contextvars.ContextVar[Optional[requests.Session]] = contextvars.ContextVar("adk_http", default=None)
+
+
+class AgentRun(NamedTuple):
+    state: Dict[str, Any]
+    usage: Dict[str, Any]
+
+
+def _session_path(agent_name: str, user_id: str, session_id: str) -> str:
+    return f"/apps/{agent_name}/users/{user_id}/sessions/{session_id}"
+
+
+def _request(method: str, step: str, backend: Backend, path: str, **kwargs) -> requests.Response:
+    url = f"{backend.url}{path}"
+    with span(step, **{"http.request.method": method, "url.full": url}) as current, backends.track(backend):
+        headers = {**inject_headers(), **deadlines.outgoing_headers(), **scheduler.outgoing_headers()}
+        kwargs.setdefault("timeout", deadlines.request_timeout())
+        try:
+            response = (_bound_http.get() or _http).request(method, url, headers=headers, **kwargs)
+        except requests.ConnectionError:
+            backends.record(backend, ok=False)
+            raise
+        # A 504 is the run's deadline passing, not a failing backend.
+        backends.record(backend, ok=response.status_code < 500 or response.status_code == STATUS_DEADLINE)
+        current.set_attribute("http.response.status_code", response.status_code)
+        return response
+
+
+def _timed(stages: Dict[str, float], stage: str, method: str, backend: Backend, path: str,
+           **kwargs) -> requests.Response:
+    started = time.perf_counter()
+    try:
+        return _request(method, f"adk.{stage}", backend, path, **kwargs)
+    finally:
+        stages[stage] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def create_session(agent_name: str, user_id: str, session_id: str) -> None:
+    """Creates the session on the least busy backend; its later calls follow it there."""
+    backend = backends.pick()
+    # The request body is the initial session state.
+    _request("POST", "adk.create_session", backend, _session_path(agent_name, user_id, session_id),
+             json={}).raise_for_status()
+    backends.pin(session_id, backend)
+
+
+def delete_session(agent_name: str, user_id: str, session_id: str) -> None:
+    """Deletes the session on its backend, or on every backend when its backend is not known."""
+    backend = backends.pinned(session_id)
+    try:
+        # Backends without the session answer 404.
+        for target in [backend] if backend is not None else backends.all():
+            response = _request("DELETE", "adk.delete_session", target, _session_path(agent_name, user_id, session_id))
+            if response.status_code != 404:
+                response.raise_for_status()
+    finally:
+        backends.unpin(session_id)
+
+
+def state_from_events(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Final state of a session that started empty: its events' state deltas, applied in order."""
+    state: Dict[str, Any] = {}
+    for event in events:
+        actions = event.get("actions") or {}
+        delta = actions.get("stateDelta") or actions.get("state_delta") or {}
+        state.update((k, v) for k, v in delta.items() if not k.startswith(TEMP_STATE_PREFIX))
+    return state
+
+
+def _run(stages: Dict[str, float], agent_name: str, user_id: str, session_id: str, input_data: str) -> list:
+    deadlines.check()
+    try:
+        response = _timed(stages, "run", "POST", backends.for_session(session_id), "/run", json={
+            "appName": agent_name,
+            "userId": user_id,
+            "sessionId": session_id,
+            "newMessage": {"parts": [{"text": input_data}], "role": "user"},
+        })
+    except requests.Timeout as e:
+        raise DeadlineExceeded(f"{agent_name} did not answer before the deadline") from e
+    if response.status_code == STATUS_DEADLINE:
+        raise DeadlineExceeded(f"{agent_name} was cancelled at the deadline")
+    if response.status_code == STATUS_CANCELLED:
+        raise RunCancelled(f"{agent_name} was cancelled")
+    response.raise_for_status()
+    return response.json()
+
+
+def _run_pooled(stages: Dict[str, float], agent_name: str, user_id: str, input_data: str):
+    started = time.perf_counter()
+    session_id = session_pool.acquire(agent_name, user_id)
+    stages["acquire_session"] = round((time.perf_counter() - started) * 1000, 1)
+    try:
+        try:
+            events = _run(stages, agent_name, user_id, session_id, input_data)
+        except requests.HTTPError as e:
+            # Evicted by the server's session store (TTL or capacity) while idle in the pool.
+            if e.response is None or e.response.status_code != 404:
+                raise
+            create_session(agent_name, user_id, session_id)
+            events = _run(stages, agent_name, user_id, session_id, input_data)
+    finally:
+        session_pool.release(agent_name, user_id, session_id)
+    return session_id, state_from_events(events), events
+
+
+def _run_unpooled(stages: Dict[str, float], agent_name: str, user_id: str, input_data: str):
+    session_id = new_session_id("s_")
+    path = _session_path(agent_name, user_id, session_id)
+    backend = backends.pick()
+    backends.pin(session_id, backend)
+    try:
+        _timed(stages, "create_session", "POST", backend, path, json={}).raise_for_status()
+        _run(stages, agent_name, user_id, session_id, input_data)
+        session = _timed(stages, "get_session", "GET", backend, path).json()
+        _timed(stages, "delete_session", "DELETE", backend, path)
+    except Exception:
+        # Try to delete session in case of error
+        try:
+            delete_session(agent_name, user_id, session_id)
+        except Exception:
+            pass
+        raise
+    finally:
+        backends.unpin(session_id)
+    return session_id, session.get("state", {}), session.get("events", [])
+
+
+def run_agent_with_usage(
+    agent_name: str, input_data: str, user_id: str = "api_user", caller: str = DEFAULT_CALLER,
+    idempotency_key: Optional[str] = None, deadline: Optional[Deadline] = None, run_id: Optional[str] = None,
+    priority: Optional[str] = None,
+) -> AgentRun:
+    """
+    Executes an agent and returns its final state and usage block.
+    Sessions are borrowed from the pool (or created and deleted) automatically.
+    With an ``idempotency_key`` the agent runs at most once per key (see
+    idempotency.py); a stored or shared result has ``usage["replayed"]`` set.
+    Raises DeadlineExceeded once ``deadline`` (default: the agent's, see
+    deadlines.py) passes; the ADK server then cancels the run.
+    ``priority`` is the run's class (default: DEFAULT_PRIORITY, see
+    scheduler.py); an unknown class raises UnknownPriority.
+    """
+    deadline = deadline or Deadline.for_agents([agent_name])
+    run_id = run_id or new_session_id("r_")
+    priority = scheduler.validate(priority)
+    if idempotency_key:
+        key = f"{caller}/{agent_name}/{idempotency_key}"
+        with deadlines.bind(deadline, run_id):
+            run, replayed = idempotency.run(
+                key, fingerprint(agent_name, user_id, input_data),
+                lambda: _run_agent_with_usage(agent_name, input_data, user_id, caller, deadline, run_id,
+                                              priority)._asdict(),
+            )
+        return AgentRun(run["state"], {**run["usage"], "replayed": True} if replayed else run["usage"])
+    return _run_agent_with_usage(agent_name, input_data, user_id, caller, deadline, run_id, priority)
+
+
+def _run_agent_with_usage(agent_name: str, input_data: str, user_id: str, caller: str,
+                          deadline: Deadline, run_id: str, priority: str) -> AgentRun:
+    stages: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    with span(f"run_agent {agent_name}", **{"gen_ai.agent.name": agent_name, "enduser.id": user_id}) as current, \
+            deadlines.bind(deadline, run_id), scheduler.bind(priority):
+        run = _run_pooled if session_pool.size > 0 else _run_unpooled
+        session_id, state, events = run(stages, agent_name, user_id, input_data)
+
+        stages["total"] = round((time.perf_counter() - started) * 1000, 1)
+        usage = {"agent": agent_name, **summarize_events(events, stages["run"]), "stages_ms": stages}
+        ledger.record(caller, usage)
+        current.set_attributes({
+            "session.id": session_id,
+            "adk.events": len(events),
+            "adk.llm_calls": usage["llm_calls"],
+            "adk.tool_calls": usage["tool_calls"],
+            "gen_ai.usage.input_tokens": usage["input_tokens"],
+            "gen_ai.usage.output_tokens": usage["output_tokens"],
+            "usage.cost_usd": usage["cost_usd"],
+            "usage.caller": caller,
+            "adk.priority": priority,
+        })
+        return AgentRun(state, usage)
+
+
+def run_agent(agent_name: str, input_data: str, user_id: str = "api_user", caller: str = DEFAULT_CALLER,
+              idempotency_key: Optional[str] = None, deadline: Optional[Deadline] = None) -> dict:
+    """
+    Executes an agent and returns the complete state.
+    Sessions are borrowed from the pool (or created and deleted) automatically.
+    """
+    return run_agent_with_usage(agent_name, input_data, user_id, caller, idempotency_key, deadline).state
+
+
+def cancel_run(run_id: str) -> bool:
+    """Asks the ADK servers to cancel a run; False if it already ended (or no server is reachable)."""
+    cancelled = False
+    # Only the backend running it answers 200; the others answer 404.
+    for backend in backends.all():
+        try:
+            cancelled |= _request("POST", "adk.cancel_run", backend, f"/runs/{run_id}/cancel", timeout=5).ok
+        except requests.RequestException:
+            pass
+    return cancelled
+
+
+async def run_agent_async(
+    agent_name: str, input_data: str, user_id: str = "api_user", caller: str = DEFAULT_CALLER,
+    idempotency_key: Optional[str] = None, deadline: Optional[Deadline] = None,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None, priority: Optional[str] = None,
+) -> AgentRun:
+    """
+    ``run_agent_with_usage`` off the event loop. The run is cancelled on the
+    ADK server when ``deadline`` passes (DeadlineExceeded), when
+    ``is_disconnected()`` turns true (e.g. Starlette's
+    ``Request.is_disconnected``) or when the awaiting task is cancelled
+    (both RunCancelled).
+    The run first takes a slot in the agent's bulkhead and raises
+    BulkheadFull when the bulkhead is saturated (bulkheads.py).
+    """
+    deadline = deadline or Deadline.for_agents([agent_name])
+    priority = scheduler.validate(priority)
+    run_id = new_session_id("r_")
+    call = functools.partial(run_agent_with_usage, agent_name, input_data, user_id, caller, idempotency_key,
+                             deadline, run_id, priority)
+    if not bulkheads.enabled:
+        return await _supervise(call, agent_name, run_id, deadline, is_disconnected, _executor)
+    bulkhead = bulkheads.get(agent_name)
+    try:
+        async with bulkhead.slot(deadline.remaining()):
+            return await _supervise(call, agent_name, run_id, deadline, is_disconnected, bulkhead.executor,
+                                    bulkhead.http)
+    except BulkheadFull as e:
+        if deadline.expired():
+            raise DeadlineExceeded(f"Deadline of {deadline.timeout_s:g}s exceeded waiting for a slot") from e
+        raise
+
+
+async def _supervise(call: Callable[[], AgentRun], agent_name: str, run_id: str, deadline: Deadline,
+                     is_disconnected: Optional[Callable[[], Awaitable[bool]]], executor: ThreadPoolExecutor,
+                     http: Optional[requests.Session] = None) -> AgentRun:
+    """Runs ``call`` in ``executor`` (over ``http``) and cancels it on the deadline, disconnect or cancellation."""
+    context = contextvars.copy_context()
+    if http is not None:
+        context.run(_bound_http.set, http)
+    future = asyncio.get_running_loop().run_in_executor(executor, context.run, call)
+    error: Exception
+    try:
+        while True:
+            done, _ = await asyncio.wait({future}, timeout=min(DISCONNECT_POLL_S, deadline.remaining()))
+            if done:
+                return future.result()
+            if deadline.expired():
+                error = DeadlineExceeded(f"Deadline of {deadline.timeout_s:g}s exceeded")
+                break
+            if is_disconnected is not None and await is_disconnected():
+                error = RunCancelled(f"{agent_name}: the client disconnected")
+                break
+    except asyncio.CancelledError:
+        _abandon(future)
+        await asyncio.to_thread(cancel_run, run_id)
+        raise
+    # The executor thread returns once the ADK server answers the cancelled run.
+    _abandon(future)
+    await asyncio.to_thread(cancel_run, run_id)
+    raise error
+
+
+def _abandon(future: asyncio.Future) -> None:
+    """Nobody awaits ``future`` any more: retrieve its outcome so asyncio does not log it."""
+    future.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+
+def list_apps(timeout: Optional[float] = None) -> List[str]:
+    return _request("GET", "adk.list_apps", backends.pick(), "/list-apps", timeout=timeout).json()
+
+
+def list_sessions(agent_name: str, user_id: str) -> list:
+    """Sessions of (agent, user) on every backend."""
+    sessions = []
+    for backend in backends.all():
+        sessions.extend(_request("GET", "adk.list_sessions", backend,
+                                 f"/apps/{agent_name}/users/{user_id}/sessions").json())
+    return sessions
+
+
+session_pool = SessionPool(create_session, delete_session, list_sessions, rank=backends.rank, unpin=backends.unpin)
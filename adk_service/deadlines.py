@@ -0,0 +1,266 @@
+"""
+Request Deadlines and Cancellation
+
+Every agent run now has a deadline: the caller's ``X-Request-Timeout-Ms``
+(REST header, or ``timeout_s`` on the MCP tools) or the agent's default from
+REQUEST_DEADLINES_S. The client sends the remaining budget and a run id with
+each ADK call, and stops waiting when the budget is spent.
+
+On the ADK server (adk_service.server), DeadlineMiddleware runs ``/run`` as a
+task and cancels it when the deadline passes, when the caller disconnects, or
+when the caller asks for it (``POST /runs/{run_id}/cancel``, sent by
+api-server and mcp-server when their own client disconnects or cancels the
+MCP call). Cancelling the task cancels the ParallelAgent branches, the
+pending model calls and the RENAME queries of the run, so no Gemini quota is
+spent on answers nobody will read. A cancelled run answers 504 (deadline) or
+499 (disconnected or cancelled) if it had not started its response.
+
+Configuration (environment variables):
+    REQUEST_DEADLINE_S: default deadline of agents not listed below
+        (default: 120).
+    REQUEST_DEADLINES_S: per-agent defaults, e.g.
+        "simple_prescription_agent=60,sequential_analyzer_agent=180".
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+RUN_ID_HEADER = "X-Run-Id"
+REQUEST_DEADLINE_S = float(os.getenv("REQUEST_DEADLINE_S", "120"))
+DEFAULT_DEADLINES_S = "simple_prescription_agent=60,parallel_analyzer_agent=90,sequential_analyzer_agent=180"
+# Extra wait for the server's 504 once the deadline passed, before the client drops the connection.
+CANCEL_GRACE_S = 2.0
+# How often a waiting front end checks for its client's disconnect.
+DISCONNECT_POLL_S = 0.25
+RUN_PATHS = ("/run", "/run_sse")
+STATUS_DEADLINE = 504
+STATUS_CANCELLED = 499
+
+
+class DeadlineExceeded(TimeoutError):
+    """The run's deadline passed before it finished."""
+
+
+class RunCancelled(RuntimeError):
+    """The run was cancelled because its caller went away."""
+
+
+def parse_deadlines(spec: str) -> Dict[str, float]:
+    """"agent=60,other=90" -> {"agent": 60.0, "other": 90.0}."""
+    deadlines = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            deadlines[name.strip()] = float(value)
+    return deadlines
+
+
+REQUEST_DEADLINES_S = parse_deadlines(os.getenv("REQUEST_DEADLINES_S", DEFAULT_DEADLINES_S))
+
+
+class Deadline:
+    """A point in time (monotonic clock) by which a request must finish."""
+
+    def __init__(self, timeout_s: float):
+        self.timeout_s = timeout_s
+        self.expires_at = time.monotonic() + timeout_s
+
+    @classmethod
+    def for_agents(cls, agent_names: Iterable[str], timeout_ms: Optional[float] = None) -> "Deadline":
+        """The caller's timeout, else the sum of the agents' defaults (they run one after the other)."""
+        if timeout_ms is not None:
+            return cls(timeout_ms / 1000)
+        return cls(sum(REQUEST_DEADLINES_S.get(name, REQUEST_DEADLINE_S) for name in agent_names))
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+# --- Client side: the deadline and run id of the run in progress ---
+_current: ContextVar[Optional[Tuple[Deadline, str]]] = ContextVar("adk_run_deadline", default=None)
+
+
+@contextmanager
+def bind(deadline: Deadline, run_id: str) -> Iterator[None]:
+    token = _current.set((deadline, run_id))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def check() -> None:
+    """Raises DeadlineExceeded if the bound deadline already passed."""
+    bound = _current.get()
+    if bound is not None and bound[0].expired():
+        raise DeadlineExceeded(f"Deadline of {bound[0].timeout_s:g}s exceeded")
+
+
+def remaining() -> Optional[float]:
+    """Seconds left on the bound deadline (None without one)."""
+    bound = _current.get()
+    return None if bound is None else bound[0].remaining()
+
+
+def outgoing_headers() -> Dict[str, str]:
+    """Headers carrying the remaining budget and the run id of the bound run."""
+    bound = _current.get()
+    if bound is None:
+        return {}
+    deadline, run_id = bound
+    return {DEADLINE_HEADER: str(int(deadline.remaining() * 1000)), RUN_ID_HEADER: run_id}
+
+
+def request_timeout() -> Optional[float]:
+    """``requests`` timeout for the next ADK call (None without a deadline)."""
+    bound = _current.get()
+    return None if bound is None else bound[0].remaining() + CANCEL_GRACE_S
+
+
+# --- Server side ---
+class RunRegistry:
+    """Runs in progress on the ADK server, by run id, and why runs ended."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, Tuple[asyncio.Task, Dict[str, Any]]] = {}
+        self.stats = {"completed": 0, "deadline": 0, "disconnected": 0, "cancelled": 0}
+
+    def register(self, run_id: str, task: asyncio.Task, state: Dict[str, Any]) -> None:
+        with self._lock:
+            self._tasks[run_id] = (task, state)
+
+    def finish(self, run_id: str, outcome: str) -> None:
+        with self._lock:
+            self._tasks.pop(run_id, None)
+            self.stats[outcome] += 1
+
+    def cancel(self, run_id: str) -> bool:
+        """Cancel a run on behalf of its caller; False if it is not running here."""
+        with self._lock:
+            entry = self._tasks.get(run_id)
+        if entry is None:
+            return False
+        task, state = entry
+        state["reason"] = "cancelled"
+        task.get_loop().call_soon_threadsafe(task.cancel)
+        return True
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "running": len(self._tasks)}
+
+
+runs = RunRegistry()
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware for the ADK server: runs ``/run`` (and ``/run_sse``) as a
+    task cancelled on deadline (DEADLINE_HEADER), caller disconnect, or
+    RunRegistry.cancel (RUN_ID_HEADER). Without a deadline header only
+    disconnects and explicit cancels apply.
+    """
+
+    def __init__(self, app, registry: RunRegistry = runs, paths: Tuple[str, ...] = RUN_PATHS):
+        self.app = app
+        self.registry = registry
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        timeout_ms = headers.get(DEADLINE_HEADER.lower())
+        run_id = headers.get(RUN_ID_HEADER.lower()) or f"anon-{id(scope)}"
+        timeout_s = float(timeout_ms) / 1000 if timeout_ms else None
+
+        # Read the body up front, so that waiting for a disconnect never consumes it.
+        body = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body.append(message)
+            if not message.get("more_body"):
+                break
+        disconnected = asyncio.Event()
+
+        async def replay():
+            if body:
+                return body.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        state = {"reason": None, "started": False}
+
+        async def tracked_send(message):
+            if message["type"] == "http.response.start":
+                state["started"] = True
+            await send(message)
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        task = asyncio.ensure_future(self.app(scope, replay, tracked_send))
+        watcher = asyncio.ensure_future(watch_disconnect())
+        self.registry.register(run_id, task, state)
+        try:
+            done, _ = await asyncio.wait({task, watcher}, timeout=timeout_s, return_when=asyncio.FIRST_COMPLETED)
+            if task not in done:
+                state["reason"] = state["reason"] or ("disconnected" if watcher in done else "deadline")
+                task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                if state["reason"] is None:
+                    raise
+        finally:
+            watcher.cancel()
+            self.registry.finish(run_id, state["reason"] or "completed")
+
+        if state["reason"] is not None:
+            logger.info("Run %s cancelled (%s)", run_id, state["reason"])
+            if not state["started"] and state["reason"] != "disconnected":
+                status = STATUS_DEADLINE if state["reason"] == "deadline" else STATUS_CANCELLED
+                await send({"type": "http.response.start", "status": status,
+                            "headers": [(b"content-type", b"application/json")]})
+                await send({"type": "http.response.body",
+                            "body": f'{{"detail": "Run {state["reason"]}"}}'.encode()})
+
+
+def install(app, registry: RunRegistry = runs) -> None:
+    """Adds DeadlineMiddleware and the cancel/report routes to an ADK FastAPI app."""
+
+    @app.post("/runs/{run_id}/cancel")
+    async def cancel_run(run_id: str):
+        """Cancels a run started with this X-Run-Id; 404 if it is not running."""
+        if not registry.cancel(run_id):
+            raise HTTPException(status_code=404, detail=f"Run '{run_id}' is not running")
+        return {"run_id": run_id, "cancelled": True}
+
+    @app.get("/runs")
+    async def runs_report():
+        """Runs in progress and how finished runs ended (completed, deadline, disconnected, cancelled)."""
+        return registry.report()
+
+    app.add_middleware(DeadlineMiddleware, registry=registry)
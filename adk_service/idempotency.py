@@ -0,0 +1,167 @@
+"""
+Idempotent Results
+
+Clients retry ``/analyze/*`` calls (and MCP tool calls) after network blips,
+and every retry used to re-run the whole agent pipeline. A request that
+carries an idempotency key (``Idempotency-Key`` header, ``idempotency_key``
+tool argument) now runs at most once per key:
+
+- the first request claims the key in a SQLite table and runs the agent;
+  its final state and usage block are stored under the key;
+- a retry while the run is in progress attaches to it (waits for the same
+  result) instead of starting a second run; in another process, by polling
+  the table;
+- a retry after the run returns the stored result, marked ``replayed``,
+  until IDEMPOTENCY_TTL_S after completion; expired results are evicted.
+
+Keys are scoped by caller and agent, so ``/analyze/all`` can reuse one key
+for its three runs. Reusing a key with a different input raises
+IdempotencyConflict. Failed runs are not stored: waiters get the error, and
+the next retry runs again. A claim whose process died is taken over after
+IDEMPOTENCY_LEASE_S. A retry waits for the first run at most until its own
+deadline (deadlines.py), then raises DeadlineExceeded.
+
+Configuration (environment variables):
+    IDEMPOTENCY_DB: SQLite file of the store (default: idempotency.db).
+    IDEMPOTENCY_TTL_S: retention of completed results (default: 86400).
+    IDEMPOTENCY_LEASE_S: time after which an unfinished claim is taken over;
+        must exceed the longest run (default: 600).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import deadlines
+from .deadlines import DeadlineExceeded
+
+# --- Constants ---
+IDEMPOTENCY_DB = os.getenv("IDEMPOTENCY_DB", "idempotency.db")
+IDEMPOTENCY_TTL_S = float(os.getenv("IDEMPOTENCY_TTL_S", "86400"))
+IDEMPOTENCY_LEASE_S = float(os.getenv("IDEMPOTENCY_LEASE_S", "600"))
+POLL_INTERVAL_S = 0.25
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY, fingerprint TEXT, status TEXT, result TEXT, created_at REAL, expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS results_by_expiry ON results (expires_at);
+"""
+
+
+class IdempotencyConflict(ValueError):
+    """Raised when an idempotency key is reused for a different request."""
+
+
+def fingerprint(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Results by idempotency key in a SQLite file, with in-process attachment
+    to running computations. The file is opened on first use.
+    """
+
+    def __init__(self, path: str = IDEMPOTENCY_DB, ttl_s: float = IDEMPOTENCY_TTL_S,
+                 lease_s: float = IDEMPOTENCY_LEASE_S):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.lease_s = lease_s
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._running: Dict[str, Tuple[str, Future]] = {}
+        self.stats = {"computed": 0, "replayed": 0, "attached": 0, "conflicts": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5.0)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def _claim(self, key: str, request_fingerprint: str) -> Optional[Tuple[str, str, Optional[str]]]:
+        """None when this call claimed ``key``, else the existing (fingerprint, status, result)."""
+        db = self._connect()
+        now = time.time()
+        # Evicts expired results and claims whose process died.
+        db.execute("DELETE FROM results WHERE expires_at < ?", (now,))
+        inserted = db.execute(
+            "INSERT OR IGNORE INTO results VALUES (?, ?, 'running', NULL, ?, ?)",
+            (key, request_fingerprint, now, now + self.lease_s),
+        ).rowcount
+        if inserted:
+            return None
+        return db.execute("SELECT fingerprint, status, result FROM results WHERE key = ?", (key,)).fetchone()
+
+    def run(self, key: str, request_fingerprint: str, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        ``compute()`` once per key; returns (result, replayed). ``compute``
+        must return a JSON-serializable value.
+        """
+        while True:
+            with self._lock:
+                running = self._running.get(key)
+                row = None
+                if running is None:
+                    row = self._claim(key, request_fingerprint)
+                    if row is None:
+                        future: Future = Future()
+                        self._running[key] = (request_fingerprint, future)
+                        break
+            if running is not None:
+                running_fingerprint, future = running
+                self._check(key, running_fingerprint, request_fingerprint)
+                with self._lock:
+                    self.stats["attached"] += 1
+                # Bounded by the retry's own deadline, so its worker thread is not held past it.
+                timeout_s = deadlines.remaining()
+                try:
+                    return future.result(timeout=timeout_s), True
+                except FutureTimeoutError:
+                    raise DeadlineExceeded(f"Deadline exceeded waiting for the run of {key}") from None
+            stored_fingerprint, status, result = row
+            self._check(key, stored_fingerprint, request_fingerprint)
+            if status == "done":
+                with self._lock:
+                    self.stats["replayed"] += 1
+                return json.loads(result), True
+            # Running in another process: wait for its result (or for its lease to expire).
+            deadlines.check()
+            time.sleep(POLL_INTERVAL_S)
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._connect().execute("DELETE FROM results WHERE key = ? AND status = 'running'", (key,))
+                del self._running[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            now = time.time()
+            self._connect().execute(
+                "UPDATE results SET status = 'done', result = ?, expires_at = ? WHERE key = ?",
+                (json.dumps(value, default=str), now + self.ttl_s, key),
+            )
+            del self._running[key]
+            self.stats["computed"] += 1
+        future.set_result(value)
+        return value, False
+
+    def _check(self, key: str, stored: str, requested: str) -> None:
+        if stored != requested:
+            with self._lock:
+                self.stats["conflicts"] += 1
+            raise IdempotencyConflict(f"Idempotency key '{key}' was already used for a different request")
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "running": len(self._running), "ttl_s": self.ttl_s}
+
+
+idempotency = IdempotencyStore()
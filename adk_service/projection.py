@@ -0,0 +1,96 @@
+"""
+Response Projection
+
+Shapes the session state returned by run_agent before it is serialized:
+
+- ``full``: the whole state, including the intermediate free-text analyses
+  (drug/dose/route analyses, general_health_report,
+  treatment_impact_assessment) the pipeline's synthesizer consumed;
+- ``final``: only the agent's final output (FINAL_OUTPUT_KEYS), i.e. the
+  structured result the MCP tool docstrings describe;
+- ``verdict``: only the criticality levels of the final output, for
+  dashboards and MCP clients that branch on the level alone.
+
+``fields`` selects dotted paths from the state instead (e.g.
+``synthesized_results_criticality.level_drug``); missing paths are skipped.
+"""
+
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple, Union, get_args
+
+# --- Constants ---
+View = Literal["full", "final", "verdict"]
+VIEWS = get_args(View)
+FINAL_OUTPUT_KEYS = {
+    "simple_prescription_agent": "results_criticality",
+    "parallel_analyzer_agent": "synthesized_results_criticality",
+    "sequential_analyzer_agent": "synthesized_health_report",
+    "search_agent": "results_search",
+    "compliance_agent": "compliance_report",
+}
+# Fields of a final output kept in the verdict view.
+VERDICT_FIELDS = ("level", "severity", "overall_compliance")
+VERDICT_PREFIXES = ("level_",)
+VERDICT_SUFFIXES = ("_criticality",)
+# Usage keys kept in the verdict view (per sub-agent breakdown dropped).
+USAGE_SUMMARY_KEYS = ("agent", "llm_calls", "input_tokens", "output_tokens", "tool_calls", "rename_queries",
+                      "cost_usd", "replayed")
+
+
+def is_verdict_field(name: str) -> bool:
+    return name in VERDICT_FIELDS or name.startswith(VERDICT_PREFIXES) or name.endswith(VERDICT_SUFFIXES)
+
+
+def parse_fields(fields: Union[str, Sequence[str], None]) -> List[Tuple[str, ...]]:
+    """"a.b,c" (or ["a.b", "c"]) -> [("a", "b"), ("c",)]."""
+    if not fields:
+        return []
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    return [tuple(field.strip().split(".")) for field in fields if field.strip()]
+
+
+def select(state: Dict[str, Any], paths: List[Tuple[str, ...]]) -> Dict[str, Any]:
+    """Nested subset of ``state`` containing the given paths."""
+    result: Dict[str, Any] = {}
+    for path in paths:
+        value: Any = state
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = result
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = value
+    return result
+
+
+def project(
+    state: Dict[str, Any], agent_name: str, view: str = "full", fields: Union[str, Sequence[str], None] = None
+) -> Dict[str, Any]:
+    """State shaped for the response (see module docstring)."""
+    if view not in VIEWS:
+        raise ValueError(f"Invalid view '{view}', expected one of {VIEWS}")
+    paths = parse_fields(fields)
+    if paths:
+        return select(state, paths)
+
+    key = FINAL_OUTPUT_KEYS.get(agent_name)
+    if view == "full" or key not in state:
+        return state
+    final = state[key]
+    if view == "final":
+        return {key: final}
+    if isinstance(final, dict):
+        return {key: {k: v for k, v in final.items() if is_verdict_field(k)}}
+    return {key: final}
+
+
+def project_usage(usage: Optional[Dict[str, Any]], view: str = "full") -> Optional[Dict[str, Any]]:
+    """Usage block for the view: totals only in the verdict view."""
+    if usage is None or view != "verdict":
+        return usage
+    summary = {k: usage[k] for k in USAGE_SUMMARY_KEYS if k in usage}
+    summary["wall_ms"] = usage.get("stages_ms", {}).get("total")
+    return summary
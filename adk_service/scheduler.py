@@ -0,0 +1,254 @@
+"""
+Priority Scheduling of Agent Runs
+
+Cohort screening through the same deployment as the clinicians' requests
+used to starve them: a batch of a thousand admissions filled the ADK server
+and the model quota, and a single ``/analyze/simple`` waited behind it.
+Every run now carries a priority class (``X-Priority``; the ``priority``
+argument of the MCP tools), and with SCHEDULER_SLOTS set the ADK launcher
+(adk_service.server) runs at most that many ``/run`` calls at once:
+
+- each class has a reservation, slots only it may use (so interactive
+  requests always find a free slot when their reservation is not in use),
+  and a weight;
+- the other slots are shared: when one frees, the waiting classes are
+  served in proportion to their weights (stride scheduling: the class that
+  started the fewest runs per unit of weight goes next), so batch runs use
+  the spare capacity without holding it against interactive requests;
+- within a class runs start in arrival order.
+
+Queued runs keep their deadline (deadlines.py): a run cancelled or past its
+deadline while queued leaves the queue. ``GET /scheduler`` reports running
+and queued runs and the queueing delay per class; the same values are the
+OpenTelemetry metrics ``adk.scheduler.running``, ``adk.scheduler.queued``
+and ``adk.scheduler.wait``.
+
+Configuration (environment variables):
+    SCHEDULER_SLOTS: concurrent runs on the ADK server; 0 disables the
+        scheduler (default: 0). Size it so that the runs' model calls fit
+        the model quota.
+    SCHEDULER_CLASSES: "class=weight:reservation" per class (default:
+        "interactive=8:2,batch=3:0,background=1:0").
+    DEFAULT_PRIORITY: class of runs without a priority (default: interactive).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional, Tuple
+
+from opentelemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+PRIORITY_HEADER = "X-Priority"
+SCHEDULER_SLOTS = int(os.getenv("SCHEDULER_SLOTS", "0"))
+DEFAULT_CLASSES = "interactive=8:2,batch=3:0,background=1:0"
+DEFAULT_PRIORITY = os.getenv("DEFAULT_PRIORITY", "interactive")
+RUN_PATHS = ("/run", "/run_sse")
+
+
+class UnknownPriority(ValueError):
+    """Raised for a priority class the scheduler does not define."""
+
+
+def parse_classes(spec: str) -> Dict[str, Tuple[float, int]]:
+    """"interactive=8:2,batch=3" -> {"interactive": (8.0, 2), "batch": (3.0, 0)}."""
+    classes = {}
+    for item in spec.split(","):
+        name, _, values = item.partition("=")
+        if values:
+            weight, _, reserved = values.partition(":")
+            classes[name.strip()] = (float(weight), int(reserved or 0))
+    return classes
+
+
+PRIORITY_CLASSES = parse_classes(os.getenv("SCHEDULER_CLASSES", DEFAULT_CLASSES))
+
+
+def validate(priority: Optional[str]) -> str:
+    """The priority class to send (DEFAULT_PRIORITY for None); raises UnknownPriority."""
+    priority = priority or DEFAULT_PRIORITY
+    if priority not in PRIORITY_CLASSES:
+        raise UnknownPriority(f"Unknown priority '{priority}', expected one of {sorted(PRIORITY_CLASSES)}")
+    return priority
+
+
+# --- Client side: the priority of the run in progress ---
+_current: ContextVar[Optional[str]] = ContextVar("adk_run_priority", default=None)
+
+
+@contextmanager
+def bind(priority: Optional[str]) -> Iterator[None]:
+    token = _current.set(priority)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def outgoing_headers() -> Dict[str, str]:
+    priority = _current.get()
+    return {PRIORITY_HEADER: priority} if priority else {}
+
+
+# --- Server side ---
+class _Waiter:
+    __slots__ = ("future", "queued_at", "granted")
+
+    def __init__(self):
+        self.future = asyncio.get_running_loop().create_future()
+        self.queued_at = time.monotonic()
+        self.granted = False
+
+
+class PriorityScheduler:
+    """Weighted, reservation-aware admission of runs to ``slots`` concurrent slots (one event loop)."""
+
+    def __init__(self, slots: int, classes: Dict[str, Tuple[float, int]] = PRIORITY_CLASSES):
+        if sum(reserved for _, reserved in classes.values()) > slots:
+            raise ValueError(f"Reservations of {classes} exceed {slots} slots")
+        self.slots = slots
+        self.weights = {name: weight for name, (weight, _) in classes.items()}
+        self.reserved = {name: reserved for name, (_, reserved) in classes.items()}
+        self.running = {name: 0 for name in classes}
+        self.queues: Dict[str, Deque[_Waiter]] = {name: deque() for name in classes}
+        # Stride scheduling: runs started per unit of weight.
+        self._pass = {name: 0.0 for name in classes}
+        self._vtime = 0.0
+        self.stats = {name: {"started": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0} for name in classes}
+
+    def _used(self) -> int:
+        """Slots in use, counting every unused reservation as used."""
+        return sum(max(self.running[name], self.reserved[name]) for name in self.running)
+
+    def _can_start(self, name: str) -> bool:
+        return self.running[name] < self.reserved[name] or self._used() < self.slots
+
+    def _start(self, name: str, waited_ms: float) -> None:
+        self.running[name] += 1
+        self._vtime = self._pass[name]
+        self._pass[name] += 1 / self.weights[name]
+        stats = self.stats[name]
+        stats["started"] += 1
+        stats["wait_ms_total"] += waited_ms
+        stats["wait_ms_max"] = max(stats["wait_ms_max"], waited_ms)
+        _wait.record(waited_ms, {"priority": name})
+
+    def _dispatch(self) -> None:
+        while True:
+            ready = [name for name, queue in self.queues.items() if queue and self._can_start(name)]
+            if not ready:
+                return
+            name = min(ready, key=lambda n: (self._pass[n], -self.weights[n]))
+            waiter = self.queues[name].popleft()
+            if waiter.future.done():  # cancelled, its task not resumed yet
+                continue
+            waiter.granted = True
+            self._start(name, (time.monotonic() - waiter.queued_at) * 1000)
+            waiter.future.set_result(None)
+
+    async def acquire(self, name: str) -> None:
+        if not self.running[name] and not self.queues[name]:
+            # A class coming back from idle does not get credit for the time it was idle.
+            self._pass[name] = max(self._pass[name], self._vtime)
+        if not self.queues[name] and self._can_start(name):
+            self._start(name, 0.0)
+            return
+        waiter = _Waiter()
+        self.queues[name].append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.granted:
+                self.release(name)
+            elif waiter in self.queues[name]:
+                self.queues[name].remove(waiter)
+            raise
+
+    def release(self, name: str) -> None:
+        self.running[name] -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, name: str) -> AsyncIterator[None]:
+        await self.acquire(name)
+        try:
+            yield
+        finally:
+            self.release(name)
+
+    def report(self) -> Dict[str, Any]:
+        classes = {}
+        for name, stats in self.stats.items():
+            started = stats["started"]
+            classes[name] = {
+                "weight": self.weights[name],
+                "reserved": self.reserved[name],
+                "running": self.running[name],
+                "queued": len(self.queues[name]),
+                "started": started,
+                "wait_ms_mean": round(stats["wait_ms_total"] / started, 1) if started else 0.0,
+                "wait_ms_max": round(stats["wait_ms_max"], 1),
+            }
+        return {"slots": self.slots, "classes": classes}
+
+
+class SchedulerMiddleware:
+    """ASGI middleware for the ADK server: admits ``/run`` (and ``/run_sse``) through the scheduler."""
+
+    def __init__(self, app, scheduler: PriorityScheduler, paths: Tuple[str, ...] = RUN_PATHS):
+        self.app = app
+        self.scheduler = scheduler
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        header = PRIORITY_HEADER.lower().encode("latin-1")
+        priority = next((v.decode("latin-1") for k, v in scope.get("headers", []) if k.lower() == header), None)
+        try:
+            priority = validate(priority)
+        except UnknownPriority as e:
+            await send({"type": "http.response.start", "status": 422,
+                        "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": json.dumps({"detail": str(e)}).encode()})
+            return
+        async with self.scheduler.slot(priority):
+            await self.app(scope, receive, send)
+
+
+def install(app, slots: int = SCHEDULER_SLOTS, classes: Dict[str, Tuple[float, int]] = PRIORITY_CLASSES):
+    """Adds the scheduler (when ``slots`` > 0) and ``GET /scheduler`` to an ADK FastAPI app."""
+    if slots <= 0:
+        return None
+    scheduler = PriorityScheduler(slots, classes)
+
+    @app.get("/scheduler")
+    async def scheduler_report():
+        """Running and queued runs and queueing delay per priority class."""
+        return scheduler.report()
+
+    for name, field, description in (("adk.scheduler.running", "running", "Runs in progress per priority class"),
+                                     ("adk.scheduler.queued", "queued", "Runs waiting for a slot per priority class")):
+        _meter.create_observable_gauge(
+            name, unit="{run}", description=description,
+            callbacks=[lambda options, field=field: [
+                metrics.Observation(values[field], {"priority": priority})
+                for priority, values in scheduler.report()["classes"].items()
+            ]],
+        )
+    app.add_middleware(SchedulerMiddleware, scheduler=scheduler)
+    logger.info("Scheduling runs on %d slots: %s", slots, classes)
+    return scheduler
+
+
+_meter = metrics.get_meter("adk_service.scheduler")
+_wait = _meter.create_histogram("adk.scheduler.wait", unit="ms", description="Time runs waited for a slot")
@@ -0,0 +1,116 @@
+"""
+ADK API Server Launcher
+
+Runs the same FastAPI app as ``adk api_server <agents_dir>`` with the
+tracing exporters from TRACE_EXPORTER and TraceContextMiddleware, so
+``/run`` continues the trace started by api-server or mcp-server instead of
+starting a new one, and with deadlines.DeadlineMiddleware, so a run is
+cancelled when its deadline passes, its caller disconnects, or its caller
+asks for it (``POST /runs/{run_id}/cancel``; ``GET /runs`` counts outcomes).
+With SCHEDULER_SLOTS set, runs are admitted by priority class
+(scheduler.py; ``GET /scheduler``); time spent queued counts against the
+run's deadline.
+
+``--session-store bounded`` (or SESSION_STORE=bounded) replaces ADK's
+unbounded in-memory sessions with session_store.BoundedSessionService and
+serves its gauges at ``GET /session-store``. ``get_fast_api_app`` has no
+parameter for a session service object, so the app is then assembled from
+AdkWebServer with the same in-memory artifact, memory and credential
+services and local eval managers as ``adk api_server``.
+
+Usage:
+    python -m adk_service.server team --host 0.0.0.0 --port 8000
+    python -m adk_service.server team --session-store bounded
+"""
+
+import argparse
+import os
+
+import uvicorn
+from google.adk.cli.fast_api import get_fast_api_app
+
+from . import deadlines, scheduler
+from .session_store import SESSION_STORE, BoundedSessionService
+from .tracing import TraceContextMiddleware, configure_tracing
+
+# --- Constants ---
+SESSION_STORES = ("memory", "bounded")
+
+
+def _bounded_app(agents_dir: str, session_service: BoundedSessionService, **kwargs):
+    from google.adk.artifacts.in_memory_artifact_service import InMemoryArtifactService
+    from google.adk.auth.credential_service.in_memory_credential_service import InMemoryCredentialService
+    from google.adk.cli.adk_web_server import AdkWebServer
+    from google.adk.cli.utils.agent_loader import AgentLoader
+    from google.adk.evaluation.local_eval_set_results_manager import LocalEvalSetResultsManager
+    from google.adk.evaluation.local_eval_sets_manager import LocalEvalSetsManager
+    from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
+    from opentelemetry import metrics
+
+    if kwargs.get("a2a") or kwargs.get("session_service_uri"):
+        raise ValueError("--session-store bounded cannot be combined with --a2a or --session-service-uri")
+    web_server = AdkWebServer(
+        agent_loader=AgentLoader(agents_dir),
+        session_service=session_service,
+        artifact_service=InMemoryArtifactService(),
+        memory_service=InMemoryMemoryService(),
+        credential_service=InMemoryCredentialService(),
+        eval_sets_manager=LocalEvalSetsManager(agents_dir=agents_dir),
+        eval_set_results_manager=LocalEvalSetResultsManager(agents_dir=agents_dir),
+        agents_dir=agents_dir,
+    )
+    app = web_server.get_fast_api_app(allow_origins=kwargs.get("allow_origins"))
+
+    @app.get("/session-store")
+    async def session_store_report():
+        """Live sessions, state bytes and eviction counters of the bounded store."""
+        return session_service.report()
+
+    meter = metrics.get_meter("adk_service.session_store")
+    for name, gauge, unit in (("adk.sessions.live", "live_sessions", "{session}"),
+                              ("adk.sessions.state_bytes", "state_bytes", "By")):
+        meter.create_observable_gauge(
+            name, unit=unit,
+            callbacks=[lambda options, gauge=gauge: [metrics.Observation(session_service.report()[gauge])]],
+        )
+    return app
+
+
+def create_app(agents_dir: str, host: str = "127.0.0.1", port: int = 8000, session_store: str = SESSION_STORE,
+               **kwargs):
+    # Read by the TracerProvider that get_fast_api_app creates.
+    os.environ.setdefault("OTEL_SERVICE_NAME", "adk-api-server")
+    agents_dir = os.path.abspath(agents_dir)
+    if session_store == "bounded":
+        app = _bounded_app(agents_dir, BoundedSessionService(), **kwargs)
+    elif session_store == "memory":
+        app = get_fast_api_app(agents_dir=agents_dir, web=False, host=host, port=port, **kwargs)
+    else:
+        raise ValueError(f"Invalid session store '{session_store}', expected one of {SESSION_STORES}")
+    # get_fast_api_app installs ADK's TracerProvider; the exporters are added to it.
+    configure_tracing("adk-api-server")
+    # Added first so that DeadlineMiddleware wraps it: a queued run can expire or be cancelled.
+    scheduler.install(app)
+    deadlines.install(app)
+    app.add_middleware(TraceContextMiddleware)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ADK API server with distributed tracing.")
+    parser.add_argument("agents_dir", nargs="?", default=".")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--session-service-uri", default=None)
+    parser.add_argument("--session-store", choices=SESSION_STORES, default=SESSION_STORE,
+                        help="Session service when no URI is given (default: SESSION_STORE or memory).")
+    parser.add_argument("--a2a", action="store_true")
+    args = parser.parse_args()
+
+    app = create_app(args.agents_dir, args.host, args.port, session_store=args.session_store,
+                     session_service_uri=args.session_service_uri, a2a=args.a2a)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
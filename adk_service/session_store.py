@@ -0,0 +1,269 @@
+"""
+Bounded Session Store
+
+Session service for the ADK API server (``--session-store bounded``). ADK's
+default in-memory service keeps every session until the process restarts,
+so sessions leaked by failed ``run_agent`` calls, or left by a client that
+crashed before deleting them, grow the server without limit. This store
+keeps the in-memory behaviour and bounds it:
+
+- sessions idle for longer than SESSION_STORE_TTL_S are dropped (checked on
+  every access of the store, oldest first);
+- past SESSION_STORE_MAX_SESSIONS sessions or SESSION_STORE_MAX_BYTES of
+  state, the least recently used sessions are evicted.
+
+The size of a session is its serialized state plus its serialized events
+(the state counted as the JSON of its initial value and of every delta), which
+is what grows with every run. Activity (create, read, append) moves a
+session to the back of the LRU order, so a session whose agent is running is
+never the first candidate.
+
+With SESSION_STORE_SQLITE set, every session and event is also written to
+that SQLite file and reloaded at startup (expired sessions excluded), so
+sessions survive a restart of the container. Evicted and deleted sessions
+are removed from the file as well.
+
+``report()`` returns the gauges (live sessions, state bytes, evictions); the
+launcher serves them at ``GET /session-store`` and registers them as
+OpenTelemetry observable gauges.
+
+Configuration (environment variables):
+    SESSION_STORE: ``bounded`` selects this store in adk_service.server
+        (default: ``memory``, ADK's unbounded in-memory service).
+    SESSION_STORE_MAX_SESSIONS: live sessions kept (default: 10000).
+    SESSION_STORE_MAX_BYTES: total serialized size of the live sessions
+        (default: 268435456, 256 MiB).
+    SESSION_STORE_TTL_S: idle time after which a session is dropped; must
+        exceed half of the clients' SESSION_TTL_S, the age at which the
+        session pool refreshes its idle sessions (default: 3600).
+    SESSION_STORE_SQLITE: SQLite file backing the store (default: none,
+        memory only).
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from google.adk.events.event import Event
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+from google.adk.sessions.session import Session
+from google.adk.sessions.state import State
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+SESSION_STORE_MAX_SESSIONS = int(os.getenv("SESSION_STORE_MAX_SESSIONS", "10000"))
+SESSION_STORE_MAX_BYTES = int(os.getenv("SESSION_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+SESSION_STORE_TTL_S = float(os.getenv("SESSION_STORE_TTL_S", "3600"))
+SESSION_STORE_SQLITE = os.getenv("SESSION_STORE_SQLITE") or None
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT, user_id TEXT, id TEXT, state TEXT, last_update_time REAL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT, app_name TEXT, user_id TEXT, session_id TEXT, event TEXT
+);
+CREATE INDEX IF NOT EXISTS events_by_session ON events (app_name, user_id, session_id, seq);
+"""
+
+Key = Tuple[str, str, str]
+
+
+def _json_size(value: Any) -> int:
+    return len(json.dumps(value, default=str))
+
+
+class BoundedSessionService(InMemorySessionService):
+    """
+    ADK's InMemorySessionService with a session cap, a size cap and TTL
+    eviction, optionally written through to SQLite.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = SESSION_STORE_MAX_SESSIONS,
+        max_bytes: int = SESSION_STORE_MAX_BYTES,
+        ttl_s: float = SESSION_STORE_TTL_S,
+        sqlite_path: Optional[str] = SESSION_STORE_SQLITE,
+    ):
+        super().__init__()
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.sqlite_path = sqlite_path
+        self._lock = threading.RLock()
+        # Last activity per session, least recently used first.
+        self._activity: "OrderedDict[Key, float]" = OrderedDict()
+        self._sizes: Dict[Key, int] = {}
+        self.state_bytes = 0
+        self.stats = {"evicted_ttl": 0, "evicted_sessions": 0, "evicted_bytes": 0}
+        self._db = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+            self._load()
+
+    # --- InMemorySessionService hooks ---
+    def _create_session_impl(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session = super()._create_session_impl(app_name=app_name, user_id=user_id, state=state,
+                                               session_id=session_id)
+        key = (app_name, user_id, session.id)
+        with self._lock:
+            self._untrack(key)
+            self._track(key, _json_size(state or {}))
+            self._persist_session(key, state or {}, session.last_update_time)
+            self._enforce(keep=key)
+        return session
+
+    def _get_session_impl(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        key = (app_name, user_id, session_id)
+        with self._lock:
+            self._expire()
+            if key in self._activity:
+                self._activity[key] = time.time()
+                self._activity.move_to_end(key)
+        return super()._get_session_impl(app_name=app_name, user_id=user_id, session_id=session_id, config=config)
+
+    def _delete_session_impl(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        super()._delete_session_impl(app_name=app_name, user_id=user_id, session_id=session_id)
+        with self._lock:
+            self._untrack((app_name, user_id, session_id))
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        key = (session.app_name, session.user_id, session.id)
+        if event.partial:
+            return event
+        with self._lock:
+            if key not in self._activity:
+                # Evicted (or deleted) while its agent was running; super() logged it.
+                return event
+            payload = event.model_dump_json(exclude_none=True, by_alias=True)
+            # The event, plus its state delta as applied to the session's state.
+            size = len(payload) + (_json_size(event.actions.state_delta) if event.actions.state_delta else 0)
+            self._sizes[key] += size
+            self.state_bytes += size
+            self._activity[key] = time.time()
+            self._activity.move_to_end(key)
+            if self._db is not None:
+                self._db.execute("INSERT INTO events (app_name, user_id, session_id, event) VALUES (?, ?, ?, ?)",
+                                 (*key, payload))
+                stored = self.sessions[key[0]][key[1]][key[2]]
+                self._persist_session(key, stored.state, stored.last_update_time)
+            self._enforce(keep=key)
+        return event
+
+    # --- Bookkeeping ---
+    def _track(self, key: Key, size: int, last_activity: Optional[float] = None) -> None:
+        self._activity[key] = last_activity or time.time()
+        self._activity.move_to_end(key)
+        self._sizes[key] = size
+        self.state_bytes += size
+
+    def _untrack(self, key: Key) -> None:
+        if self._activity.pop(key, None) is not None:
+            self.state_bytes -= self._sizes.pop(key)
+        if self._db is not None:
+            self._db.execute("DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key)
+            self._db.execute("DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ?", key)
+
+    def _evict(self, key: Key, reason: str) -> None:
+        app_name, user_id, session_id = key
+        self.sessions.get(app_name, {}).get(user_id, {}).pop(session_id, None)
+        self._untrack(key)
+        self.stats[reason] += 1
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl_s
+        while self._activity:
+            key, last_activity = next(iter(self._activity.items()))
+            if last_activity >= cutoff:
+                break
+            self._evict(key, "evicted_ttl")
+
+    def _enforce(self, keep: Optional[Key] = None) -> None:
+        """Drop expired sessions, then least recently used ones until under both caps."""
+        self._expire()
+        while len(self._activity) > 1 and (
+            len(self._activity) > self.max_sessions or self.state_bytes > self.max_bytes
+        ):
+            key = next(iter(self._activity))
+            if key == keep:
+                self._activity.move_to_end(key)
+                continue
+            reason = "evicted_sessions" if len(self._activity) > self.max_sessions else "evicted_bytes"
+            logger.info("Evicting session %s of %s/%s (%s)", key[2], key[0], key[1], reason)
+            self._evict(key, reason)
+
+    # --- SQLite ---
+    def _persist_session(self, key: Key, state: Dict[str, Any], last_update_time: float) -> None:
+        if self._db is None:
+            return
+        self._db.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)",
+                         (*key, json.dumps(state, default=str), last_update_time))
+
+    def _load(self) -> None:
+        """Rebuild the live sessions from the SQLite file, dropping expired ones."""
+        cutoff = time.time() - self.ttl_s
+        self._db.execute("DELETE FROM events WHERE (app_name, user_id, session_id) IN "
+                         "(SELECT app_name, user_id, id FROM sessions WHERE last_update_time < ?)", (cutoff,))
+        self._db.execute("DELETE FROM sessions WHERE last_update_time < ?", (cutoff,))
+        rows = self._db.execute("SELECT app_name, user_id, id, state, last_update_time FROM sessions "
+                                "ORDER BY last_update_time").fetchall()
+        for app_name, user_id, session_id, state_json, last_update_time in rows:
+            key = (app_name, user_id, session_id)
+            payloads = [row[0] for row in self._db.execute(
+                "SELECT event FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? ORDER BY seq", key)]
+            state = json.loads(state_json)
+            session = Session(app_name=app_name, user_id=user_id, id=session_id, state=state,
+                              events=[Event.model_validate_json(payload) for payload in payloads],
+                              last_update_time=last_update_time)
+            self.sessions.setdefault(app_name, {}).setdefault(user_id, {})[session_id] = session
+            for name, value in state.items():
+                if name.startswith(State.APP_PREFIX):
+                    self.app_state.setdefault(app_name, {})[name.removeprefix(State.APP_PREFIX)] = value
+                elif name.startswith(State.USER_PREFIX):
+                    self.user_state.setdefault(app_name, {}).setdefault(user_id, {})[
+                        name.removeprefix(State.USER_PREFIX)] = value
+            self._track(key, len(state_json) + sum(len(p) for p in payloads), last_update_time)
+        if rows:
+            logger.info("Loaded %d sessions from %s", len(rows), self.sqlite_path)
+        self._enforce()
+
+    # --- Gauges ---
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire()
+            return {
+                "live_sessions": len(self._activity),
+                "state_bytes": self.state_bytes,
+                **self.stats,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+                "ttl_s": self.ttl_s,
+                "sqlite": self.sqlite_path,
+            }
@@ -0,0 +1,284 @@
+"""
+Session Pool
+
+Takes ADK session setup and teardown off the request path. ``run_agent``
+used to create a session, run, read it back and delete it on every call;
+with the pool it borrows a pre-created empty session, runs, and hands the
+session back. The session is then recycled in the background: deleted and
+re-created under the same id, so the next request starts with empty state
+and no event history (ADK has no endpoint that clears events, and a reused
+session would feed the previous patient's conversation to the model).
+
+A reaper deletes orphaned sessions of the pool's (agent, user) pairs, i.e.
+pooled sessions this process does not own whose last update is older than
+SESSION_TTL_S, such as sessions left by a crashed or previous process. Idle
+pooled sessions are recycled before they reach half the TTL, so another
+replica's reaper never mistakes them for orphans. Per-request "s_" sessions
+(SESSION_POOL_SIZE=0) are never reaped: one may belong to another replica's
+run in progress; the ADK server's session store (SESSION_STORE) bounds
+those that leak.
+
+With several ADK backends (backends.py) the pool lends the idle session
+whose backend is least busy (``rank``) and drops sessions whose backend
+was ejected, forgetting their backend (``unpin``).
+
+Configuration (environment variables):
+    SESSION_POOL_SIZE: idle sessions kept per (agent, user); 0 disables the
+        pool (create/delete per request) (default: 4).
+    SESSION_TTL_S: age after which a session that is not owned is an orphan
+        (default: 900).
+    SESSION_REAP_INTERVAL_S: reaper period; 0 disables it (default: 60).
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+SESSION_POOL_SIZE = int(os.getenv("SESSION_POOL_SIZE", "4"))
+SESSION_TTL_S = float(os.getenv("SESSION_TTL_S", "900"))
+SESSION_REAP_INTERVAL_S = float(os.getenv("SESSION_REAP_INTERVAL_S", "60"))
+POOL_PREFIX = "p_"
+BACKGROUND_WORKERS = 2
+
+Key = Tuple[str, str]
+
+
+def new_session_id(prefix: str = POOL_PREFIX) -> str:
+    return f"{prefix}{uuid.uuid4().hex[:8]}"
+
+
+class SessionPool:
+    """
+    Pre-created, single-use sessions per (agent, user), refilled and recycled
+    by background workers. ``create``, ``delete`` and ``list_sessions`` are the
+    ADK client calls ``(agent, user[, session_id])``; ``rank(session_id)``,
+    if given, orders idle sessions (lowest lent first, inf dropped), and
+    ``unpin(session_id)`` is called for the sessions dropped that way.
+    """
+
+    def __init__(
+        self,
+        create: Callable[[str, str, str], Any],
+        delete: Callable[[str, str, str], Any],
+        list_sessions: Callable[[str, str], List[Dict[str, Any]]],
+        size: int = SESSION_POOL_SIZE,
+        ttl_s: float = SESSION_TTL_S,
+        reap_interval_s: float = SESSION_REAP_INTERVAL_S,
+        rank: Optional[Callable[[str], float]] = None,
+        unpin: Optional[Callable[[str], Any]] = None,
+    ):
+        self._create = create
+        self._delete = delete
+        self._list_sessions = list_sessions
+        self._rank = rank
+        self._unpin = unpin
+        self.size = size
+        self.ttl_s = ttl_s
+        self.reap_interval_s = reap_interval_s
+        self._lock = threading.Lock()
+        self._idle: Dict[Key, Deque[Tuple[str, float]]] = {}
+        self._pending: Dict[Key, int] = {}
+        self._owned: Set[str] = set()
+        self._executor = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="session-pool")
+        self._reaper = None
+        self._stop = threading.Event()
+        self.stats = {"hits": 0, "misses": 0, "created": 0, "recycled": 0, "discarded": 0, "reaped": 0, "errors": 0}
+
+    # --- Borrowing ---
+    def acquire(self, agent_name: str, user_id: str) -> str:
+        """An empty session id; created on the spot when the pool is empty."""
+        key = (agent_name, user_id)
+        self._start_reaper()
+        with self._lock:
+            session_id = self._take(self._idle.setdefault(key, deque()))
+            self.stats["hits" if session_id else "misses"] += 1
+        self._refill(key)
+        if session_id is None:
+            session_id = new_session_id()
+            with self._lock:
+                self._owned.add(session_id)
+            try:
+                self._create(agent_name, user_id, session_id)
+            except Exception:
+                with self._lock:
+                    self._owned.discard(session_id)
+                raise
+            with self._lock:
+                self.stats["created"] += 1
+        return session_id
+
+    def _take(self, idle: Deque[Tuple[str, float]]) -> Optional[str]:
+        """Removes and returns the idle session to lend, if any (called with the lock held)."""
+        if self._rank is None or not idle:
+            return idle.popleft()[0] if idle else None
+        best, best_rank = None, math.inf
+        for entry in list(idle):
+            rank = self._rank(entry[0])
+            if rank == math.inf:
+                # On an ejected backend: forgotten, the refill replaces it.
+                idle.remove(entry)
+                self._owned.discard(entry[0])
+                self._forget(entry[0])
+                self.stats["discarded"] += 1
+            elif rank < best_rank:
+                best, best_rank = entry, rank
+        if best is None:
+            return None
+        idle.remove(best)
+        return best[0]
+
+    def _forget(self, session_id: str) -> None:
+        if self._unpin is not None:
+            self._unpin(session_id)
+
+    def release(self, agent_name: str, user_id: str, session_id: str) -> None:
+        """Hand a used session back; it is recycled in the background."""
+        with self._lock:
+            self._pending[(agent_name, user_id)] = self._pending.get((agent_name, user_id), 0) + 1
+        self._executor.submit(self._recycle, (agent_name, user_id), session_id, True)
+
+    @contextmanager
+    def session(self, agent_name: str, user_id: str) -> Iterator[str]:
+        session_id = self.acquire(agent_name, user_id)
+        try:
+            yield session_id
+        finally:
+            self.release(agent_name, user_id, session_id)
+
+    def warm(self, agent_names: Iterable[str], user_id: str) -> None:
+        """Fill the pools of these agents in the background (e.g. at startup)."""
+        if self.size <= 0:
+            return
+        self._start_reaper()
+        for agent_name in agent_names:
+            self._refill((agent_name, user_id))
+
+    # --- Background work ---
+    def _refill(self, key: Key) -> None:
+        with self._lock:
+            missing = self.size - len(self._idle.setdefault(key, deque())) - self._pending.get(key, 0)
+            if missing <= 0:
+                return
+            self._pending[key] = self._pending.get(key, 0) + missing
+        for _ in range(missing):
+            self._executor.submit(self._recycle, key, new_session_id(), False)
+
+    def _recycle(self, key: Key, session_id: str, used: bool) -> None:
+        """(Re-)create ``session_id`` empty and put it in the idle pool."""
+        agent_name, user_id = key
+        with self._lock:
+            self._owned.add(session_id)
+        try:
+            # A session on an ejected backend is gone with it: nothing to delete.
+            if used and self._rank is not None and self._rank(session_id) == math.inf:
+                self._forget(session_id)
+            elif used:
+                self._delete(agent_name, user_id, session_id)
+            with self._lock:
+                keep = len(self._idle.setdefault(key, deque())) < self.size
+            if keep:
+                self._create(agent_name, user_id, session_id)
+        except Exception as e:
+            keep = False
+            with self._lock:
+                self.stats["errors"] += 1
+            logger.warning("Could not recycle session %s of %s: %s", session_id, agent_name, e)
+        with self._lock:
+            self._pending[key] -= 1
+            if keep:
+                self._idle[key].append((session_id, time.time()))
+                self.stats["recycled" if used else "created"] += 1
+            else:
+                self._owned.discard(session_id)
+                self.stats["discarded"] += 1
+
+    def _refresh_stale(self) -> None:
+        """Recycle idle sessions older than half the TTL."""
+        cutoff = time.time() - self.ttl_s / 2
+        stale = []
+        with self._lock:
+            for key, idle in self._idle.items():
+                while idle and idle[0][1] < cutoff:
+                    stale.append((key, idle.popleft()[0]))
+                    self._pending[key] = self._pending.get(key, 0) + 1
+        for key, session_id in stale:
+            self._executor.submit(self._recycle, key, session_id, True)
+
+    def reap(self) -> int:
+        """Delete orphaned sessions of the pool's (agent, user) pairs; returns how many."""
+        cutoff = time.time() - self.ttl_s
+        with self._lock:
+            keys = list(self._idle)
+        reaped = 0
+        for agent_name, user_id in keys:
+            try:
+                sessions = self._list_sessions(agent_name, user_id)
+            except Exception as e:
+                logger.warning("Could not list sessions of %s: %s", agent_name, e)
+                continue
+            for session in sessions:
+                session_id = session.get("id", "")
+                updated = session.get("lastUpdateTime") or session.get("last_update_time") or 0
+                with self._lock:
+                    owned = session_id in self._owned
+                if owned or not session_id.startswith(POOL_PREFIX) or updated > cutoff:
+                    continue
+                try:
+                    self._delete(agent_name, user_id, session_id)
+                    reaped += 1
+                except Exception as e:
+                    logger.warning("Could not reap session %s of %s: %s", session_id, agent_name, e)
+        with self._lock:
+            self.stats["reaped"] += reaped
+        if reaped:
+            logger.info("Reaped %d orphaned sessions", reaped)
+        return reaped
+
+    def _start_reaper(self) -> None:
+        if self._reaper is not None or self.reap_interval_s <= 0:
+            return
+        with self._lock:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(target=self._reap_loop, name="session-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        while not self._stop.wait(self.reap_interval_s):
+            try:
+                self._refresh_stale()
+                self.reap()
+            except Exception:
+                logger.exception("Session reaper failed")
+
+    def close(self) -> None:
+        """Stop the reaper and delete the idle sessions."""
+        self._stop.set()
+        with self._lock:
+            idle = [(key, session_id) for key, sessions in self._idle.items() for session_id, _ in sessions]
+            self._idle.clear()
+        for (agent_name, user_id), session_id in idle:
+            try:
+                self._delete(agent_name, user_id, session_id)
+            except Exception:
+                pass
+        self._executor.shutdown(wait=False)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "size": self.size,
+                "idle": {f"{agent}/{user}": len(idle) for (agent, user), idle in self._idle.items()},
+                "owned": len(self._owned),
+            }
@@ -0,0 +1,235 @@
+"""
+Distributed Tracing
+
+OpenTelemetry setup shared by api-server, mcp-server and the ADK API server
+launcher (adk_service.server). A request is one trace:
+
+    POST /analyze/parallel                 (api-server, TraceContextMiddleware)
+      run_agent parallel_analyzer_agent    (adk_service.client)
+        adk.create_session / adk.run / adk.get_session / adk.delete_session
+          POST /run                        (ADK server, TraceContextMiddleware)
+            invocation > invoke_agent <agent> > call_llm / execute_tool <tool>
+              rename.embed_query / pinecone.query   (team/common/tracing.py)
+
+The W3C ``traceparent`` header carries the context between processes; ADK
+creates the agent, model and tool spans itself once a TracerProvider exists.
+
+Configuration (environment variables):
+    TRACE_EXPORTER: comma-separated exporters: none (default), console, file,
+        otlp (OTEL_EXPORTER_OTLP_* settings) or cloud (Cloud Trace).
+    TRACE_FILE: JSONL file for the file exporter (default: traces.jsonl).
+    TRACE_SAMPLE_RATIO: fraction of new traces recorded (default: 1.0);
+        traces started upstream keep the caller's decision.
+    TRACE_MAX_ATTRIBUTE_CHARS: longer string attributes are truncated in the
+        file (ADK puts whole LLM requests in attributes; default: 2000).
+    OTEL_SERVICE_NAME: overrides the service name passed to configure_tracing.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+
+from opentelemetry import context, propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+EXPORTERS = ("none", "console", "file", "otlp", "cloud")
+DEFAULT_TRACE_FILE = "traces.jsonl"
+DEFAULT_MAX_ATTRIBUTE_CHARS = 2000
+
+tracer = trace.get_tracer("adk_service")
+_configured = False
+_lock = threading.Lock()
+
+
+class JsonlFileSpanExporter(SpanExporter):
+    """Appends finished spans to a JSONL file, one span per line."""
+
+    def __init__(self, path: str, max_attribute_chars: int = DEFAULT_MAX_ATTRIBUTE_CHARS):
+        self.path = path
+        self.max_attribute_chars = max_attribute_chars
+        self._lock = threading.Lock()
+
+    def _attribute(self, value: Any) -> Any:
+        if isinstance(value, str) and len(value) > self.max_attribute_chars:
+            return value[: self.max_attribute_chars] + "...[truncated]"
+        return list(value) if isinstance(value, tuple) else value
+
+    def to_dict(self, span: ReadableSpan) -> Dict[str, Any]:
+        ctx = span.get_span_context()
+        return {
+            "trace_id": format(ctx.trace_id, "032x"),
+            "span_id": format(ctx.span_id, "016x"),
+            "parent_id": format(span.parent.span_id, "016x") if span.parent else None,
+            "name": span.name,
+            "kind": span.kind.name,
+            "service": span.resource.attributes.get("service.name"),
+            "start_ns": span.start_time,
+            "end_ns": span.end_time,
+            "duration_ms": round((span.end_time - span.start_time) / 1e6, 3),
+            "status": span.status.status_code.name,
+            "attributes": {k: self._attribute(v) for k, v in (span.attributes or {}).items()},
+            "events": [{"name": e.name, "attributes": dict(e.attributes or {})} for e in span.events],
+        }
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(json.dumps(self.to_dict(s), default=str) + "\n" for s in spans)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+def _exporter(name: str) -> Optional[SpanExporter]:
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "file":
+        return JsonlFileSpanExporter(
+            os.getenv("TRACE_FILE", DEFAULT_TRACE_FILE),
+            int(os.getenv("TRACE_MAX_ATTRIBUTE_CHARS", str(DEFAULT_MAX_ATTRIBUTE_CHARS))),
+        )
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    if name == "cloud":
+        from opentelemetry.exporter.cloud_trace import CloudTraceSpanExporter
+        return CloudTraceSpanExporter()
+    return None
+
+
+def exporter_names() -> list:
+    names = [n.strip().lower() for n in os.getenv("TRACE_EXPORTER", "none").split(",") if n.strip()]
+    invalid = [n for n in names if n not in EXPORTERS]
+    if invalid:
+        raise ValueError(f"Invalid TRACE_EXPORTER {invalid}, expected any of {EXPORTERS}")
+    return [n for n in names if n != "none"]
+
+
+def configure_tracing(service_name: str) -> Optional[TracerProvider]:
+    """
+    Install the exporters from TRACE_EXPORTER (once per process).
+
+    If a TracerProvider is already installed (the ADK server installs its own
+    for /debug/trace), the exporters are added to it; otherwise a provider is
+    created for ``service_name``. Returns None when tracing is disabled.
+    """
+    global _configured
+    with _lock:
+        if _configured:
+            provider = trace.get_tracer_provider()
+            return provider if isinstance(provider, TracerProvider) else None
+        _configured = True
+        names = exporter_names()
+        if not names:
+            return None
+
+        provider = trace.get_tracer_provider()
+        if not isinstance(provider, TracerProvider):
+            ratio = float(os.getenv("TRACE_SAMPLE_RATIO", "1.0"))
+            provider = TracerProvider(
+                resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", service_name)}),
+                sampler=ParentBased(TraceIdRatioBased(ratio)),
+            )
+            trace.set_tracer_provider(provider)
+        for name in names:
+            provider.add_span_processor(BatchSpanProcessor(_exporter(name)))
+        logger.info("Tracing %s with exporters %s", service_name, names)
+        return provider
+
+
+def _clean(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in attributes.items() if v is not None}
+
+
+@contextmanager
+def span(name: str, kind: SpanKind = SpanKind.INTERNAL, **attributes: Any) -> Iterator[trace.Span]:
+    """Child span of the current context; exceptions are recorded and re-raised."""
+    with tracer.start_as_current_span(name, kind=kind, attributes=_clean(attributes)) as current:
+        yield current
+
+
+def traced(name: Optional[str] = None, **attributes: Any) -> Callable:
+    """Decorator form of ``span`` for sync and async functions."""
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, **attributes):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def inject_headers(headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Outgoing HTTP headers carrying the current trace context (``traceparent``)."""
+    headers = dict(headers or {})
+    propagate.inject(headers)
+    return headers
+
+
+class TraceContextMiddleware:
+    """
+    ASGI middleware: continues the caller's trace (``traceparent``) and wraps
+    every HTTP request in a SERVER span. A pure ASGI middleware (not
+    BaseHTTPMiddleware) so the endpoint runs in the same context and the spans
+    it creates, including ADK's, become children of the request span.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        token = context.attach(propagate.extract(carrier))
+        status = {"code": None}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            with tracer.start_as_current_span(
+                f"{scope['method']} {scope['path']}",
+                kind=SpanKind.SERVER,
+                attributes={"http.request.method": scope["method"], "url.path": scope["path"]},
+            ) as current:
+                await self.app(scope, receive, send_with_status)
+                if status["code"] is not None:
+                    current.set_attribute("http.response.status_code", status["code"])
+                    if status["code"] >= 500:
+                        current.set_status(Status(StatusCode.ERROR))
+        finally:
+            context.detach(token)
@@ -0,0 +1,229 @@
+"""
+Usage Accounting
+
+Per-request usage of an agent run, built from the events of the ADK session,
+and its aggregation per agent, sub-agent and caller.
+
+For every sub-agent (event author): LLM calls, prompt/completion tokens, tool
+calls, RENAME queries (calls to a tool in RENAME_TOOLS), start offset and wall
+time. ADK stamps a model event when the LLM call starts, so a stage runs
+until the next event outside its parallel group (or the end of /run);
+parallel specialists therefore report the wall time of their group. The
+client adds the time of each session lifecycle step.
+
+Cost is estimated from the event's ``modelVersion`` (a cascade's
+``cascade_model``, USAGE_DEFAULT_MODEL when neither is reported) and
+MODEL_PRICES. An escalated cascade call
+(team/common/models.py) counts as two LLM calls: the strong model's event
+usage plus the fast model's, carried in ``cascade_fast_usage``.
+
+Configuration (environment variables):
+    USAGE_DEFAULT_MODEL: model priced when an event has no modelVersion
+        (default: gemini-2.0-flash, the agents' DEFAULT_MODEL).
+    USAGE_PRICES_FILE: JSON file {model: {"input_usd": .., "output_usd": ..}}
+        (USD per 1M tokens) merged over MODEL_PRICES.
+    USAGE_LOG_FILE: if set, every request's usage is appended to this JSONL
+        file (caller, agent, timestamp) for offline budget analysis.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+# Public list prices, USD per 1M tokens (same as benchmarks/model_tiering.py).
+MODEL_PRICES = {
+    "gemini-2.0-flash-lite": {"input_usd": 0.075, "output_usd": 0.30},
+    "gemini-2.0-flash": {"input_usd": 0.10, "output_usd": 0.40},
+    "gemini-2.5-flash-lite": {"input_usd": 0.10, "output_usd": 0.40},
+    "gemini-2.5-flash": {"input_usd": 0.30, "output_usd": 2.50},
+    "gemini-2.5-pro": {"input_usd": 1.25, "output_usd": 10.00},
+}
+RENAME_TOOLS = ("query_medical_knowledge",)
+COUNTERS = ("llm_calls", "input_tokens", "output_tokens", "tool_calls", "rename_queries")
+DEFAULT_CALLER = "anonymous"
+
+USAGE_DEFAULT_MODEL = os.getenv("USAGE_DEFAULT_MODEL", "gemini-2.0-flash")
+USAGE_LOG_FILE = os.getenv("USAGE_LOG_FILE")
+
+
+@lru_cache(maxsize=1)
+def model_prices() -> Dict[str, Dict[str, float]]:
+    prices = dict(MODEL_PRICES)
+    path = os.getenv("USAGE_PRICES_FILE")
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            prices.update(json.load(f))
+    return prices
+
+
+def _price(model: str) -> Optional[Dict[str, float]]:
+    prices = model_prices()
+    # Versioned names ("gemini-2.0-flash-001") use the base model's price.
+    for name in sorted(prices, key=len, reverse=True):
+        if model.startswith(name):
+            return prices[name]
+    return None
+
+
+def cost_usd(model: str, input_tokens: int, output_tokens: int) -> float:
+    price = _price(model)
+    if price is None:
+        return 0.0
+    return input_tokens / 1e6 * price["input_usd"] + output_tokens / 1e6 * price["output_usd"]
+
+
+def _get(event: Dict[str, Any], camel: str, snake: str) -> Any:
+    value = event.get(camel)
+    return event.get(snake) if value is None else value
+
+
+def _group(branch: Optional[str]) -> Optional[str]:
+    """Parallel group of an event: its branch minus the last component."""
+    return branch.rpartition(".")[0] if branch and "." in branch else None
+
+
+def _new_counters() -> Dict[str, Any]:
+    return {**dict.fromkeys(COUNTERS, 0), "cost_usd": 0.0}
+
+
+def _add_call(stats: Dict[str, Any], metadata: Dict[str, Any], model: Optional[str]) -> None:
+    """Counts one LLM call with its usage metadata (camelCase or snake_case)."""
+    input_tokens = _get(metadata, "promptTokenCount", "prompt_token_count") or 0
+    output_tokens = _get(metadata, "candidatesTokenCount", "candidates_token_count") or 0
+    stats["llm_calls"] += 1
+    stats["input_tokens"] += input_tokens
+    stats["output_tokens"] += output_tokens
+    stats["cost_usd"] += cost_usd(model or USAGE_DEFAULT_MODEL, input_tokens, output_tokens)
+
+
+def summarize_events(events: List[Dict[str, Any]], run_ms: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Usage of one invocation from its session events (camelCase, as served by
+    the ADK API server, or snake_case). ``run_ms`` is the duration of /run and
+    closes the last stage.
+    """
+    sub_agents: Dict[str, Dict[str, Any]] = {}
+    order: List[tuple] = []  # (author, group, timestamp) of each agent's first event
+    start = None
+
+    for event in events:
+        author = event.get("author")
+        timestamp = event.get("timestamp")
+        if author == "user":
+            start = timestamp if start is None else start
+            continue
+        if start is None:
+            start = timestamp
+        stats = sub_agents.get(author)
+        if stats is None:
+            stats = sub_agents[author] = _new_counters()
+            order.append((author, _group(event.get("branch")), timestamp))
+
+        custom = _get(event, "customMetadata", "custom_metadata") or {}
+        metadata = _get(event, "usageMetadata", "usage_metadata")
+        if metadata:
+            _add_call(stats, metadata, _get(event, "modelVersion", "model_version") or custom.get("cascade_model"))
+        # An escalated cascade call also ran the fast model, whose answer was discarded.
+        if custom.get("cascade_fast_usage"):
+            _add_call(stats, custom["cascade_fast_usage"], custom.get("cascade_fast_model"))
+
+        for part in (event.get("content") or {}).get("parts") or []:
+            call = _get(part, "functionCall", "function_call")
+            if call:
+                stats["tool_calls"] += 1
+                if call.get("name") in RENAME_TOOLS:
+                    stats["rename_queries"] += 1
+
+    # A stage ends where the next stage outside its parallel group starts.
+    end = start + run_ms / 1000 if start is not None and run_ms is not None else None
+    for i, (author, group, first) in enumerate(order):
+        stage_end = next(
+            (ts for _, g, ts in order[i + 1:] if group is None or g != group), end
+        )
+        stats = sub_agents[author]
+        stats["start_ms"] = round((first - start) * 1000, 1) if first is not None else None
+        stats["wall_ms"] = (
+            round(max(stage_end - first, 0) * 1000, 1) if stage_end is not None and first is not None else None
+        )
+
+    totals = _new_counters()
+    for stats in sub_agents.values():
+        for key in (*COUNTERS, "cost_usd"):
+            totals[key] += stats[key]
+        stats["cost_usd"] = round(stats["cost_usd"], 6)
+    totals["cost_usd"] = round(totals["cost_usd"], 6)
+    return {**totals, "sub_agents": sub_agents}
+
+
+class UsageLedger:
+    """Running usage totals per agent, sub-agent and caller (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._agents: Dict[str, Dict[str, Any]] = {}
+            self._sub_agents: Dict[str, Dict[str, Any]] = {}
+            self._callers: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _add(table: Dict[str, Dict[str, Any]], key: str, usage: Dict[str, Any], wall_ms: Optional[float]) -> None:
+        entry = table.get(key)
+        if entry is None:
+            entry = table[key] = {"requests": 0, **_new_counters(), "wall_ms": 0.0}
+        entry["requests"] += 1
+        for counter in (*COUNTERS, "cost_usd"):
+            entry[counter] += usage.get(counter) or 0
+        entry["wall_ms"] += wall_ms or 0.0
+
+    def record(self, caller: str, usage: Dict[str, Any]) -> None:
+        agent = usage["agent"]
+        wall_ms = usage.get("stages_ms", {}).get("total")
+        with self._lock:
+            self._add(self._agents, agent, usage, wall_ms)
+            self._add(self._callers, caller, usage, wall_ms)
+            for name, stats in usage.get("sub_agents", {}).items():
+                self._add(self._sub_agents, name, stats, stats.get("wall_ms"))
+
+        if USAGE_LOG_FILE:
+            line = json.dumps({"ts": time.time(), "caller": caller, **usage})
+            try:
+                with self._lock, open(USAGE_LOG_FILE, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                logger.warning("Could not write usage log %s: %s", USAGE_LOG_FILE, e)
+
+    @staticmethod
+    def _summary(table: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        summary = {}
+        for key, entry in sorted(table.items(), key=lambda item: -item[1]["cost_usd"]):
+            requests = entry["requests"]
+            summary[key] = {
+                **entry,
+                "cost_usd": round(entry["cost_usd"], 6),
+                "wall_ms": round(entry["wall_ms"], 1),
+                "mean_tokens": round((entry["input_tokens"] + entry["output_tokens"]) / requests, 1),
+                "mean_wall_ms": round(entry["wall_ms"] / requests, 1),
+            }
+        return summary
+
+    def report(self) -> Dict[str, Any]:
+        """Totals per agent, sub-agent and caller, most expensive first."""
+        with self._lock:
+            return {
+                "agents": self._summary(self._agents),
+                "sub_agents": self._summary(self._sub_agents),
+                "callers": self._summary(self._callers),
+            }
+
+
+ledger = UsageLedger()
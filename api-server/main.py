@@ -1,19 +1,39 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-import requests
-import json
-import uuid
 import os
-from typing import Dict, Any
+import sys
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
 
-# Configuration
-BASE_URL = os.getenv("ADK_API_URL", "http://localhost:8000")
+# adk_service lives at the repository root (copied next to main.py in Docker)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from adk_service import (
+    BulkheadFull, Deadline, DeadlineExceeded, IdempotencyConflict, RunCancelled, TraceContextMiddleware,
+    UnknownPriority, View, backends, bulkheads, configure_tracing, idempotency, ledger, list_apps, project,
+    project_usage, run_agent_async, session_pool,
+)
+from adk_service.deadlines import STATUS_CANCELLED
+from adk_service.scheduler import validate as validate_priority
+from adk_service.usage import DEFAULT_CALLER
+
+# Set on responses served from a previous run with the same Idempotency-Key
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# Responses of at least this many bytes are gzip-compressed for clients that accept it
+GZIP_MIN_SIZE = int(os.getenv("API_GZIP_MIN_SIZE", "1000"))
+GZIP_LEVEL = 6
+
+configure_tracing("health-analysis-api")
 
 app = FastAPI(
     title="Health Analysis API",
     description="API for health prescription analysis using ADK agents",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
@@ -25,6 +45,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Continue the caller's trace and wrap every request in a span (TRACE_EXPORTER)
+app.add_middleware(TraceContextMiddleware)
+
+# Compress large responses (full view of the sequential pipeline)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=GZIP_LEVEL)
+
 # Available agent names
 AGENTS = {
     "parallel": "parallel_analyzer_agent",
@@ -32,6 +58,12 @@ AGENTS = {
     "prescription": "simple_prescription_agent"
 }
 
+# Pre-create sessions so the first requests skip session setup (SESSION_POOL_SIZE)
+session_pool.warm(AGENTS.values(), "api_user")
+
+# Separate threads, connections and queue per agent (BULKHEADS)
+bulkheads.register(AGENTS.values())
+
 class HealthDataRequest(BaseModel):
     health_data: str
 
@@ -39,53 +71,30 @@ class AnalysisResponse(BaseModel):
     status: str
     data: Dict[Any, Any]
     message: str = ""
+    usage: Optional[Dict[str, Any]] = None
 
-def run_agent(agent_name: str, input_data: str, user_id: str = "api_user") -> dict:
+async def run_and_project(agent_name: str, health_data: str, caller: str, view: View, fields: Optional[str],
+                          idempotency_key: Optional[str] = None, response: Optional[Response] = None,
+                          http_request: Optional[Request] = None, timeout_ms: Optional[float] = None,
+                          deadline: Optional[Deadline] = None,
+                          priority: Optional[str] = None) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
     """
-    Executes an agent and returns the complete state.
-    Creates and deletes the session automatically.
+    Runs the agent and shapes its state and usage for the response:
+    view=full (whole state), final (final output only) or verdict (levels only);
+    fields selects comma-separated dotted paths instead.
+    With an Idempotency-Key, retries get the first run's result (Idempotent-Replayed: true).
+    The run is cancelled when the X-Request-Timeout-Ms deadline (default: the
+    agent's, REQUEST_DEADLINES_S) passes or the client disconnects.
+    X-Priority (interactive, batch or background; default: DEFAULT_PRIORITY)
+    is the class by which the ADK server schedules the run.
     """
-    session_id = f"s_{uuid.uuid4().hex[:8]}"
-    
-    try:
-        # 1. Create session
-        requests.post(
-            f"{BASE_URL}/apps/{agent_name}/users/{user_id}/sessions/{session_id}",
-            json={"state": {}, "user_id": user_id, "session_id": session_id}
-        )
-        
-        # 2. Execute agent
-        requests.post(
-            f"{BASE_URL}/run",
-            json={
-                "appName": agent_name,
-                "userId": user_id,
-                "sessionId": session_id,
-                "newMessage": {"parts": [{"text": input_data}], "role": "user"}
-            }
-        )
-        
-        # 3. Get result
-        response = requests.get(
-            f"{BASE_URL}/apps/{agent_name}/users/{user_id}/sessions/{session_id}"
-        )
-        
-        # 4. Delete session
-        requests.delete(
-            f"{BASE_URL}/apps/{agent_name}/users/{user_id}/sessions/{session_id}"
-        )
-        
-        return response.json().get("state", {})
-    
-    except Exception as e:
-        # Try to delete session in case of error
-        try:
-            requests.delete(
-                f"{BASE_URL}/apps/{agent_name}/users/{user_id}/sessions/{session_id}"
-            )
-        except:
-            pass
-        raise e
+    deadline = deadline or Deadline.for_agents([agent_name], timeout_ms)
+    is_disconnected = http_request.is_disconnected if http_request is not None else None
+    result, usage = await run_agent_async(agent_name, health_data, caller=caller, idempotency_key=idempotency_key,
+                                          deadline=deadline, is_disconnected=is_disconnected, priority=priority)
+    if usage.get("replayed") and response is not None:
+        response.headers[REPLAYED_HEADER] = "true"
+    return project(result, agent_name, view, fields), project_usage(usage, view)
 
 @app.get("/")
 async def root():
@@ -97,12 +106,14 @@ async def health_check():
     """Detailed health check"""
     try:
         # Test connection with ADK API
-        response = requests.get(f"{BASE_URL}/list-apps", timeout=5)
-        apps = response.json()
+        apps = list_apps(timeout=5)
         return {
             "status": "healthy",
             "adk_api_status": "connected",
-            "available_agents": apps
+            "available_agents": apps,
+            "session_pool": session_pool.report(),
+            "idempotency": idempotency.report(),
+            "backends": backends.report()
         }
     except Exception as e:
         return {
@@ -115,8 +126,7 @@ async def health_check():
 async def get_available_agents():
     """List all available agents"""
     try:
-        response = requests.get(f"{BASE_URL}/list-apps")
-        apps = response.json()
+        apps = list_apps()
         return {
             "status": "success",
             "agents": apps,
@@ -125,70 +135,150 @@ async def get_available_agents():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching agents: {str(e)}")
 
+@app.get("/usage")
+async def get_usage():
+    """
+    Token, call and cost totals since startup per agent, sub-agent and caller
+    (X-Caller-ID header), most expensive first.
+    """
+    return ledger.report()
+
+@app.get("/bulkheads")
+async def get_bulkheads():
+    """
+    Utilization, queue length, rejections and waiting time of each agent's
+    bulkhead (BULKHEADS).
+    """
+    return bulkheads.report()
+
 @app.post("/analyze/simple", response_model=AnalysisResponse)
-async def simple_prescription_analysis(request: HealthDataRequest):
+async def simple_prescription_analysis(request: HealthDataRequest, http_request: Request, response: Response,
+                                       view: View = "full", fields: Optional[str] = None,
+                                       x_caller_id: str = Header(DEFAULT_CALLER),
+                                       idempotency_key: Optional[str] = Header(None),
+                                       x_request_timeout_ms: Optional[float] = Header(None),
+                                       x_priority: Optional[str] = Header(None)):
     """
     Performs routine safety checks on patient prescriptions using a simple agent.
     This agent provides overall prescription safety assessment with permissive evaluation criteria.
     """
     try:
-        result = run_agent("simple_prescription_agent", request.health_data)
+        result, usage = await run_and_project("simple_prescription_agent", request.health_data, x_caller_id, view,
+                                               fields, idempotency_key, response, http_request, x_request_timeout_ms,
+                                               priority=x_priority)
         return AnalysisResponse(
             status="success",
             data=result,
+            usage=usage,
             message="Simple prescription analysis completed successfully"
         )
+    except (IdempotencyConflict, UnknownPriority) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except BulkheadFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": f"{e.retry_after_s:.0f}"})
+    except RunCancelled as e:
+        raise HTTPException(status_code=STATUS_CANCELLED, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 @app.post("/analyze/parallel", response_model=AnalysisResponse)
-async def parallel_prescription_analysis(request: HealthDataRequest):
+async def parallel_prescription_analysis(request: HealthDataRequest, http_request: Request, response: Response,
+                                         view: View = "full", fields: Optional[str] = None,
+                                         x_caller_id: str = Header(DEFAULT_CALLER),
+                                         idempotency_key: Optional[str] = Header(None),
+                                         x_request_timeout_ms: Optional[float] = Header(None),
+                                         x_priority: Optional[str] = Header(None)):
     """
     Analyzes prescription safety using parallel agents for drug, dose, and route analysis.
     Three specialist agents work concurrently to evaluate different aspects, then synthesize results.
     """
     try:
-        result = run_agent("parallel_analyzer_agent", request.health_data)
+        result, usage = await run_and_project("parallel_analyzer_agent", request.health_data, x_caller_id, view,
+                                               fields, idempotency_key, response, http_request, x_request_timeout_ms,
+                                               priority=x_priority)
         return AnalysisResponse(
             status="success",
             data=result,
+            usage=usage,
             message="Parallel prescription analysis completed successfully"
         )
+    except (IdempotencyConflict, UnknownPriority) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except BulkheadFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": f"{e.retry_after_s:.0f}"})
+    except RunCancelled as e:
+        raise HTTPException(status_code=STATUS_CANCELLED, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 @app.post("/analyze/sequential", response_model=AnalysisResponse)
-async def sequential_health_analysis(request: HealthDataRequest):
+async def sequential_health_analysis(request: HealthDataRequest, http_request: Request, response: Response,
+                                     view: View = "full", fields: Optional[str] = None,
+                                     x_caller_id: str = Header(DEFAULT_CALLER),
+                                     idempotency_key: Optional[str] = Header(None),
+                                     x_request_timeout_ms: Optional[float] = Header(None),
+                                     x_priority: Optional[str] = Header(None)):
     """
     Performs comprehensive health analysis using sequential agents for general health, 
     treatment impact assessment, and synthesis. Pipeline analyzes patient profile, 
     evaluates treatment duration and impacts, then consolidates into actionable health report.
     """
     try:
-        result = run_agent("sequential_analyzer_agent", request.health_data)
+        result, usage = await run_and_project("sequential_analyzer_agent", request.health_data, x_caller_id, view,
+                                               fields, idempotency_key, response, http_request, x_request_timeout_ms,
+                                               priority=x_priority)
         return AnalysisResponse(
             status="success",
             data=result,
+            usage=usage,
             message="Sequential health analysis completed successfully"
         )
+    except (IdempotencyConflict, UnknownPriority) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except BulkheadFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": f"{e.retry_after_s:.0f}"})
+    except RunCancelled as e:
+        raise HTTPException(status_code=STATUS_CANCELLED, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 @app.post("/analyze/all", response_model=Dict[str, AnalysisResponse])
-async def comprehensive_analysis(request: HealthDataRequest):
+async def comprehensive_analysis(request: HealthDataRequest, http_request: Request, response: Response,
+                                 view: View = "full", fields: Optional[str] = None,
+                                 x_caller_id: str = Header(DEFAULT_CALLER),
+                                 idempotency_key: Optional[str] = Header(None),
+                                 x_request_timeout_ms: Optional[float] = Header(None),
+                                 x_priority: Optional[str] = Header(None)):
     """
     Executes all three analyses (simple, parallel, and sequential) and returns consolidated results.
+    The three runs share one deadline (X-Request-Timeout-Ms, default: the sum of the agents' defaults).
     """
     results = {}
+    deadline = Deadline.for_agents(AGENTS.values(), x_request_timeout_ms)
+    try:
+        x_priority = validate_priority(x_priority)
+    except UnknownPriority as e:
+        raise HTTPException(status_code=422, detail=str(e))
     
     # Simple analysis
     try:
-        simple_result = run_agent("simple_prescription_agent", request.health_data)
+        simple_result, usage = await run_and_project("simple_prescription_agent", request.health_data, x_caller_id, view,
+                                                      fields, idempotency_key, response, http_request, deadline=deadline,
+                                                      priority=x_priority)
         results["simple"] = AnalysisResponse(
             status="success",
             data=simple_result,
+            usage=usage,
             message="Simple analysis completed"
         )
+    except RunCancelled as e:
+        raise HTTPException(status_code=STATUS_CANCELLED, detail=str(e))
     except Exception as e:
         results["simple"] = AnalysisResponse(
             status="error",
@@ -198,12 +288,17 @@ async def comprehensive_analysis(request: HealthDataRequest):
     
     # Parallel analysis
     try:
-        parallel_result = run_agent("parallel_analyzer_agent", request.health_data)
+        parallel_result, usage = await run_and_project("parallel_analyzer_agent", request.health_data, x_caller_id, view,
+                                                        fields, idempotency_key, response, http_request, deadline=deadline,
+                                                        priority=x_priority)
         results["parallel"] = AnalysisResponse(
             status="success",
             data=parallel_result,
+            usage=usage,
             message="Parallel analysis completed"
         )
+    except RunCancelled as e:
+        raise HTTPException(status_code=STATUS_CANCELLED, detail=str(e))
     except Exception as e:
         results["parallel"] = AnalysisResponse(
             status="error",
@@ -213,12 +308,17 @@ async def comprehensive_analysis(request: HealthDataRequest):
     
     # Sequential analysis
     try:
-        sequential_result = run_agent("sequential_analyzer_agent", request.health_data)
+        sequential_result, usage = await run_and_project("sequential_analyzer_agent", request.health_data, x_caller_id, view,
+                                                          fields, idempotency_key, response, http_request, deadline=deadline,
+                                                          priority=x_priority)
         results["sequential"] = AnalysisResponse(
             status="success",
             data=sequential_result,
+            usage=usage,
             message="Sequential analysis completed"
         )
+    except RunCancelled as e:
+        raise HTTPException(status_code=STATUS_CANCELLED, detail=str(e))
     except Exception as e:
         results["sequential"] = AnalysisResponse(
             status="error",
@@ -0,0 +1,166 @@
+"""
+A2A Client Benchmark
+
+Latency of compliance_agent (SUS, NHS and SUS+NHS fan-out requests, routed
+by the deterministic pre-router) against a local stand-in A2A server: the
+compliance_agents SUS/NHS agents on the mock LLM, served with ADK's to_a2a on
+localhost. A small ASGI wrapper adds a fixed delay to every new TCP
+connection (standing in for the TLS handshake to Cloud Run) and to every
+agent-card request, and counts both.
+
+Scenarios:
+    cold:     new RemoteA2aAgent instances for every request (fresh process /
+              scale-from-zero: card fetch + new connections each time).
+    warm:     plain RemoteA2aAgent instances reused across requests (one
+              client and card per agent instance).
+    pooled:   PooledRemoteA2aAgent (team/compliance_agent/a2a_client.py):
+              shared card cache and keep-alive pool.
+    inprocess: COMPLIANCE_A2A_MODE=inprocess, no A2A hop.
+
+Usage:
+    python benchmarks/a2a_client.py --requests 30
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import statistics
+import sys
+import warnings
+
+from bench_utils import ROOT, build_agent_input, load_records, percentile, run_once
+from mock_llm import MockLlm
+
+sys.path.insert(0, str(ROOT))
+warnings.filterwarnings("ignore")
+
+import uvicorn  # noqa: E402
+from google.adk.a2a.utils.agent_to_a2a import to_a2a  # noqa: E402
+from google.adk.agents.remote_a2a_agent import AGENT_CARD_WELL_KNOWN_PATH, RemoteA2aAgent  # noqa: E402
+from google.adk.runners import InMemoryRunner  # noqa: E402
+
+from compliance_agent import a2a_client  # noqa: E402
+from compliance_agent.agent import root_agent  # noqa: E402
+from compliance_agent.fanout import OUTPUT_KEY, build_fanout_agent  # noqa: E402
+from compliance_agent.routing import BOTH_AGENT  # noqa: E402
+from compliance_agents.nhs.agent import root_agent as nhs_agent  # noqa: E402
+from compliance_agents.sus.agent import root_agent as sus_agent  # noqa: E402
+
+
+class StandInMiddleware:
+    """Adds per-connection and per-card latency to an ASGI app and counts them."""
+
+    def __init__(self, app, connect_s: float, card_s: float):
+        self.app, self.connect_s, self.card_s = app, connect_s, card_s
+        self.connections, self.card_requests = set(), 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            if scope["client"] not in self.connections:
+                self.connections.add(scope["client"])
+                await asyncio.sleep(self.connect_s)
+            if scope["path"].endswith(AGENT_CARD_WELL_KNOWN_PATH):
+                self.card_requests += 1
+                await asyncio.sleep(self.card_s)
+        await self.app(scope, receive, send)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def start_server(agent, args) -> tuple:
+    port = free_port()
+    mocked = agent.clone(update={"model": MockLlm(ttft_s=args.llm_s, output_tokens=0)})
+    app = StandInMiddleware(to_a2a(mocked, host="127.0.0.1", port=port), args.connect_ms / 1000, args.card_ms / 1000)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return f"http://127.0.0.1:{port}{AGENT_CARD_WELL_KNOWN_PATH}", app, server, task
+
+
+def build(scenario: str, urls: dict, args):
+    if scenario == "inprocess":
+        os.environ["COMPLIANCE_A2A_MODE"] = "inprocess"
+        clients = {
+            system: a2a_client.build_compliance_client(f"{system}_compliance_client", "", system)
+            for system in ("sus", "nhs")
+        }
+        for agent in clients.values():
+            agent.model = MockLlm(ttft_s=args.llm_s, output_tokens=0)
+    else:
+        os.environ["COMPLIANCE_A2A_MODE"] = "remote"
+        cls = a2a_client.PooledRemoteA2aAgent if scenario == "pooled" else RemoteA2aAgent
+        clients = {
+            system: cls(name=f"{system}_compliance_client", agent_card=urls[system])
+            for system in ("sus", "nhs")
+        }
+    agent = root_agent.clone(update={
+        "model": MockLlm(),
+        "sub_agents": [clients["sus"], clients["nhs"], build_fanout_agent(BOTH_AGENT, clients["sus"], clients["nhs"])],
+    })
+    return InMemoryRunner(agent=agent, app_name="compliance_agent")
+
+
+async def bench(scenario: str, prompts: list, urls: dict, stand_ins: list, args) -> dict:
+    for app in stand_ins:
+        app.connections.clear()
+        app.card_requests = 0
+    a2a_client.card_cache.invalidate()
+
+    runner = build(scenario, urls, args)
+    latencies = []
+    for prompt in prompts:
+        if scenario == "cold":
+            runner = build(scenario, urls, args)
+        result = await run_once(runner, prompt)
+        if prompt.startswith("system: BOTH"):
+            assert not result["state"][OUTPUT_KEY]["missing_systems"]
+        latencies.append(result["seconds"] * 1000)
+
+    return {
+        "scenario": scenario,
+        "requests": len(prompts),
+        "first_ms": round(latencies[0], 1),
+        "mean_ms": round(statistics.mean(latencies), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "mean_after_first_ms": round(statistics.mean(latencies[1:]), 1) if len(latencies) > 1 else None,
+        "card_fetches": sum(app.card_requests for app in stand_ins),
+        "connections": sum(len(app.connections) for app in stand_ins),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Remote A2A client: cold vs warm vs pooled vs in-process.")
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--connect-ms", type=float, default=60.0,
+                        help="Delay added to each new connection (TLS handshake stand-in).")
+    parser.add_argument("--card-ms", type=float, default=40.0, help="Delay added to each agent-card request.")
+    parser.add_argument("--llm-s", type=float, default=0.2, help="Mock LLM latency of the remote agents.")
+    args = parser.parse_args()
+    servers = {"sus": await start_server(sus_agent, args), "nhs": await start_server(nhs_agent, args)}
+    logging.disable(logging.WARNING)
+    urls = {system: server[0] for system, server in servers.items()}
+    stand_ins = [server[1] for server in servers.values()]
+
+    systems = ("SUS", "NHS", "BOTH")
+    prompts = [
+        f"system: {systems[i % len(systems)]}\n{build_agent_input(r)}"
+        for i, r in enumerate(load_records(limit=args.requests))
+    ]
+    for scenario in ("cold", "warm", "pooled", "inprocess"):
+        print(json.dumps(await bench(scenario, prompts, urls, stand_ins, args)))
+
+    for _, _, server, task in servers.values():
+        server.should_exit = True
+        await task
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,149 @@
+"""
+Adaptive Concurrency Benchmark
+
+A batch of parallel analyses against a simulated Gemini quota, with and
+without the adaptive concurrency limiter (team/common/concurrency.py). The
+quota serves at most --quota calls at a time (latency rising with load) and
+rejects the rest with 429 RESOURCE_EXHAUSTED after a short delay, like a
+per-project quota hit by bursts. Every run sends its three specialists at
+once, then the synthesizer, so --concurrency runs put 3x as many calls in
+flight.
+
+- none: models called directly; a 429 fails the run (the previous
+  behaviour);
+- retry: 429s retried (LLM_MAX_RETRIES, jittered exponential backoff) with
+  no limit, so retries join the burst;
+- adaptive: the limiter (LLM_LIMIT_DEFAULT) with retries through it.
+
+Usage:
+    python benchmarks/adaptive_concurrency.py --runs 200 --concurrency 32 --quota 16 --time-scale 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, AsyncGenerator, Dict, List
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai.errors import ClientError
+
+from bench_utils import build_agent_input, load_records, percentile, run_once
+from mock_llm import MockLlm, use_mock_models
+
+from common import concurrency
+from parallel_analyzer_agent.agent import root_agent
+
+# --- Constants ---
+MODEL = "mock-gemini"
+# Simulated output tokens per agent (as in incremental_reanalysis.py).
+OUTPUT_TOKENS = {
+    "drug_analysis_agent": 60,
+    "dose_drug_analysis_agent": 60,
+    "route_drug_analysis_agent": 60,
+    "drug_report_synthesizer": 150,
+}
+REJECT_S = 0.2
+# Latency grows by this fraction at full quota.
+LOAD_PENALTY = 0.5
+
+
+class Quota:
+    """Concurrent calls a project may have in flight; the rest get 429."""
+
+    def __init__(self, capacity: int, time_scale: float):
+        self.capacity = capacity
+        self.time_scale = time_scale
+        self.inflight = 0
+        self.stats = {"calls": 0, "rejected": 0, "peak_inflight": 0}
+
+
+class QuotaLlm(BaseLlm):
+    """A mock model behind the shared quota."""
+
+    llm: MockLlm
+    quota: Any
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        quota: Quota = self.quota
+        quota.stats["calls"] += 1
+        if quota.inflight >= quota.capacity:
+            quota.stats["rejected"] += 1
+            await asyncio.sleep(REJECT_S * quota.time_scale)
+            raise ClientError(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED",
+                                              "message": "Quota exceeded"}})
+        quota.inflight += 1
+        quota.stats["peak_inflight"] = max(quota.stats["peak_inflight"], quota.inflight)
+        try:
+            await asyncio.sleep(self.llm.ttft_s * quota.time_scale * LOAD_PENALTY * quota.inflight / quota.capacity)
+            async for response in self.llm.generate_content_async(llm_request, stream):
+                yield response
+        finally:
+            quota.inflight -= 1
+
+
+async def bench(mode: str, inputs: List[str], args) -> Dict[str, Any]:
+    quota = Quota(args.quota, args.time_scale)
+    concurrency._limiters.clear()
+    if mode == "retry":
+        concurrency._limiters[MODEL] = concurrency.AdaptiveLimiter(MODEL, 1_000_000, 1_000_000)
+
+    def factory(agent):
+        llm = QuotaLlm(model=MODEL, quota=quota,
+                       llm=MockLlm(output_tokens=OUTPUT_TOKENS[agent.name], time_scale=args.time_scale))
+        return llm if mode == "none" else concurrency.LimitedLlm(model=MODEL, llm=llm, caller=agent.name)
+
+    runner = InMemoryRunner(agent=use_mock_models(root_agent, factory), app_name=f"adaptive_{mode}")
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    failed = 0
+
+    async def one(text: str):
+        nonlocal failed
+        async with semaphore:
+            try:
+                latencies.append((await run_once(runner, text))["seconds"])
+            except (ClientError, ExceptionGroup):  # ParallelAgent raises its branches' errors as a group
+                failed += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(inputs[i % len(inputs)]) for i in range(args.runs)))
+    elapsed = time.perf_counter() - started
+    limiter = concurrency.report().get(MODEL, {})
+    return {
+        "mode": mode,
+        "runs_ok": len(latencies),
+        "runs_failed": failed,
+        "quota_429s": quota.stats["rejected"],
+        "model_calls": quota.stats["calls"],
+        "peak_inflight": quota.stats["peak_inflight"],
+        "runs_per_min": round(len(latencies) / (elapsed / args.time_scale) * 60, 1),
+        "p50_s": round(percentile(latencies, 50) / args.time_scale, 2) if latencies else None,
+        "p95_s": round(percentile(latencies, 95) / args.time_scale, 2) if latencies else None,
+        **({"final_limit": limiter["limit"], "limit_decreases": limiter["decreases"],
+            "queue_ms_mean": round(limiter["queue_ms_mean"] / args.time_scale)} if mode == "adaptive" else {}),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Batch analyses against a quota with and without the AIMD limiter.")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--quota", type=int, default=16, help="Concurrent model calls the quota admits.")
+    parser.add_argument("--time-scale", type=float, default=0.05,
+                        help="Scale simulated delays to speed the run up (results are unscaled).")
+    args = parser.parse_args()
+
+    # Retry backoff on the benchmark's clock.
+    concurrency.RETRY_BASE_S *= args.time_scale
+    concurrency.RETRY_MAX_S *= args.time_scale
+    inputs = [build_agent_input(record) for record in load_records(limit=20)]
+    for mode in ("none", "retry", "adaptive"):
+        print(json.dumps(await bench(mode, inputs, args)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,331 @@
+"""
+ADK API Server Emulator
+
+Lightweight stand-in for ``adk api_server`` for load-testing api-server and
+mcp-server without Gemini. It implements the endpoints their ``run_agent``
+uses:
+
+    GET    /list-apps
+    POST   /apps/{app}/users/{user}/sessions[/{session_id}]
+    GET    /apps/{app}/users/{user}/sessions[/{session_id}]
+    DELETE /apps/{app}/users/{user}/sessions/{session_id}
+    POST   /run
+
+``/run`` waits for a simulated agent latency (lognormal around a per-agent
+median), then writes realistic payloads for the agent's ``output_key``s into
+the session state. Outputs depend only on the input text and the seed, so
+identical requests get identical answers (useful for cache tests).
+
+Knobs: per-agent median latency and spread, error rate, and a concurrency
+cap that either queues or rejects (429) excess runs. GET /emulator/stats
+returns counters; POST /emulator/reset clears them.
+
+Usage:
+    python benchmarks/adk_emulator.py --port 8000 --time-scale 0.1
+    python benchmarks/adk_emulator.py --latency parallel_analyzer_agent=5000 --error-rate 0.02 \\
+        --max-concurrency 16 --overflow reject
+"""
+
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+import uvicorn
+from fastapi import Body, FastAPI, HTTPException, Response
+
+# --- Constants ---
+# Median /run latency per agent in ms (offline suite, mock LLM, ~gemini-2.0-flash speeds).
+DEFAULT_LATENCY_MS = {
+    "simple_prescription_agent": 1800,
+    "parallel_analyzer_agent": 3500,
+    "sequential_analyzer_agent": 5200,
+    "search_agent": 1500,
+    "compliance_agent": 3100,
+}
+LEVELS = ["low", "medium", "high"]
+
+
+def _analysis_text(topic: str, level: str, rng: random.Random) -> str:
+    findings = rng.sample([
+        "no clinically relevant interaction among active prescriptions",
+        "renal function within the expected range for the prescribed doses",
+        "route consistent with the dosage form",
+        "duplicate entries of the same drug with overlapping periods",
+        "dose within the usual adult range",
+        "anticoagulant co-prescribed with an interacting antiarrhythmic",
+        "short course with a clear stop date",
+    ], 3)
+    return (
+        f"{topic} assessment.\n"
+        + "\n".join(f"- {finding.capitalize()}." for finding in findings)
+        + f"\nOverall the {topic.lower()} profile is consistent with the documented clinical context."
+        + f"\nLevel: {level.upper()}"
+    )
+
+
+def _levels(rng: random.Random, flag_rate: float, n: int) -> List[str]:
+    return [
+        rng.choice(LEVELS[1:]) if rng.random() < flag_rate else "low"
+        for _ in range(n)
+    ]
+
+
+def simple_state(rng: random.Random, flag_rate: float) -> Dict[str, Any]:
+    (level,) = _levels(rng, flag_rate, 1)
+    return {"results_criticality": {
+        "level": level,
+        "description": _analysis_text("Prescription safety", level, rng).rsplit("\n", 1)[0],
+    }}
+
+
+def parallel_state(rng: random.Random, flag_rate: float) -> Dict[str, Any]:
+    drug, dose, route = _levels(rng, flag_rate, 3)
+    return {
+        "drug_analysis": _analysis_text("Drug", drug, rng),
+        "dose_drug_analysis": _analysis_text("Dose", dose, rng),
+        "route_drug_analysis": _analysis_text("Route", route, rng),
+        "synthesized_results_criticality": {
+            "level_drug": drug,
+            "level_dose": dose,
+            "level_route": route,
+            "description": "Consolidated drug, dose and route safety assessment; "
+                           "specialist findings agree on the main risks.",
+        },
+    }
+
+
+def sequential_state(rng: random.Random, flag_rate: float) -> Dict[str, Any]:
+    duration, compliance, lifestyle, monitoring = _levels(rng, flag_rate, 4)
+    return {
+        "general_health_report": _analysis_text("General health", "low", rng),
+        "treatment_impact_assessment": _analysis_text("Treatment impact", duration, rng),
+        "synthesized_health_report": {
+            "treatment_duration_criticality": duration,
+            "patient_compliance_criticality": compliance,
+            "lifestyle_impact_criticality": lifestyle,
+            "monitoring_frequency_criticality": monitoring,
+            "executive_summary": "Adult inpatient on a multi-drug regimen; labs broadly stable.",
+            "actionable_recommendations": "Review duplicated entries, monitor renal function and electrolytes.",
+        },
+    }
+
+
+def search_state(rng: random.Random, flag_rate: float) -> Dict[str, Any]:
+    return {"results_search": _analysis_text("Literature search", "low", rng).rsplit("\n", 1)[0]}
+
+
+def compliance_state(rng: random.Random, flag_rate: float) -> Dict[str, Any]:
+    (severity,) = _levels(rng, flag_rate, 1)
+    verdict = {"low": "compliant", "medium": "review_required", "high": "non_compliant"}[severity]
+    return {"compliance_report": {
+        "systems": ["SUS", "NHS"],
+        "overall_compliance": verdict,
+        "severity": severity,
+        "issues": [],
+        "recommendations": [],
+        "missing_systems": [],
+    }}
+
+
+STATE_BUILDERS: Dict[str, Callable[[random.Random, float], Dict[str, Any]]] = {
+    "simple_prescription_agent": simple_state,
+    "parallel_analyzer_agent": parallel_state,
+    "sequential_analyzer_agent": sequential_state,
+    "search_agent": search_state,
+    "compliance_agent": compliance_state,
+}
+
+
+class Emulator:
+    """Sessions, latency model and counters behind the emulated endpoints."""
+
+    def __init__(
+        self,
+        latency_ms: Optional[Dict[str, float]] = None,
+        latency_sigma: float = 0.25,
+        error_rate: float = 0.0,
+        max_concurrency: int = 0,
+        overflow: str = "queue",
+        flag_rate: float = 0.15,
+        time_scale: float = 1.0,
+        seed: int = 0,
+    ):
+        self.latency_ms = {**DEFAULT_LATENCY_MS, **(latency_ms or {})}
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.max_concurrency = max_concurrency
+        self.overflow = overflow
+        self.flag_rate = flag_rate
+        self.time_scale = time_scale
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.sessions: Dict[tuple, Dict[str, Any]] = {}
+        self.semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.stats = {"runs": 0, "errors": 0, "rejected": 0, "in_flight": 0, "max_in_flight": 0,
+                      "sessions_created": 0, "sessions_deleted": 0}
+
+    def latency_s(self, app_name: str) -> float:
+        median_s = self.latency_ms.get(app_name, 1000) / 1000
+        return self.rng.lognormvariate(math.log(median_s), self.latency_sigma) * self.time_scale
+
+    def state_for(self, app_name: str, text: str) -> Dict[str, Any]:
+        digest = hashlib.sha256(f"{self.seed}:{app_name}:{text}".encode("utf-8")).hexdigest()
+        builder = STATE_BUILDERS.get(app_name, search_state)
+        return builder(random.Random(int(digest[:16], 16)), self.flag_rate)
+
+    def session(self, app_name: str, user_id: str, session_id: str) -> Dict[str, Any]:
+        session = self.sessions.get((app_name, user_id, session_id))
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        return session
+
+    async def run(self, app_name: str, user_id: str, session_id: str, text: str) -> List[Dict[str, Any]]:
+        session = self.session(app_name, user_id, session_id)
+        if self.semaphore is not None and self.semaphore.locked() and self.overflow == "reject":
+            self.stats["rejected"] += 1
+            raise HTTPException(status_code=429, detail="Emulator concurrency cap reached")
+
+        async def execute() -> List[Dict[str, Any]]:
+            self.stats["runs"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+            try:
+                await asyncio.sleep(self.latency_s(app_name))
+                if self.rng.random() < self.error_rate:
+                    self.stats["errors"] += 1
+                    raise HTTPException(status_code=500, detail="Emulated agent failure")
+            finally:
+                self.stats["in_flight"] -= 1
+            delta = self.state_for(app_name, text)
+            session["state"].update(delta)
+            event = {
+                "id": uuid.uuid4().hex[:8],
+                "invocationId": f"e-{uuid.uuid4()}",
+                "author": app_name,
+                "content": {"role": "model", "parts": [{"text": str(list(delta.values())[-1])}]},
+                "actions": {"stateDelta": delta},
+                "timestamp": time.time(),
+            }
+            session["events"].append(event)
+            session["lastUpdateTime"] = event["timestamp"]
+            return [event]
+
+        if self.semaphore is None:
+            return await execute()
+        async with self.semaphore:
+            return await execute()
+
+
+def create_app(emulator: Emulator) -> FastAPI:
+    app = FastAPI(title="ADK API Server Emulator")
+
+    def new_session(app_name: str, user_id: str, session_id: Optional[str], body: Optional[dict]) -> dict:
+        session_id = session_id or uuid.uuid4().hex
+        key = (app_name, user_id, session_id)
+        if key in emulator.sessions:
+            raise HTTPException(status_code=400, detail=f"Session already exists: {session_id}")
+        session = {
+            "id": session_id,
+            "appName": app_name,
+            "userId": user_id,
+            # Like ADK, the request body is the initial state.
+            "state": dict(body or {}),
+            "events": [],
+            "lastUpdateTime": time.time(),
+        }
+        emulator.sessions[key] = session
+        emulator.stats["sessions_created"] += 1
+        return session
+
+    @app.get("/list-apps")
+    async def list_apps():
+        return sorted(STATE_BUILDERS)
+
+    @app.post("/apps/{app_name}/users/{user_id}/sessions/{session_id}")
+    async def create_session_with_id(app_name: str, user_id: str, session_id: str, body: Optional[dict] = Body(None)):
+        return new_session(app_name, user_id, session_id, body)
+
+    @app.post("/apps/{app_name}/users/{user_id}/sessions")
+    async def create_session(app_name: str, user_id: str, body: Optional[dict] = Body(None)):
+        return new_session(app_name, user_id, None, body)
+
+    @app.get("/apps/{app_name}/users/{user_id}/sessions/{session_id}")
+    async def get_session(app_name: str, user_id: str, session_id: str):
+        return emulator.session(app_name, user_id, session_id)
+
+    @app.get("/apps/{app_name}/users/{user_id}/sessions")
+    async def list_sessions(app_name: str, user_id: str):
+        return [s for (a, u, _), s in emulator.sessions.items() if a == app_name and u == user_id]
+
+    @app.delete("/apps/{app_name}/users/{user_id}/sessions/{session_id}")
+    async def delete_session(app_name: str, user_id: str, session_id: str):
+        if emulator.sessions.pop((app_name, user_id, session_id), None) is not None:
+            emulator.stats["sessions_deleted"] += 1
+        return Response(status_code=200)
+
+    @app.post("/run")
+    async def run(body: dict = Body(...)):
+        text = "".join(part.get("text", "") for part in body["newMessage"].get("parts", []))
+        return await emulator.run(body["appName"], body["userId"], body["sessionId"], text)
+
+    @app.get("/emulator/stats")
+    async def stats():
+        return {**emulator.stats, "sessions_open": len(emulator.sessions)}
+
+    @app.post("/emulator/reset")
+    async def reset():
+        emulator.reset_stats()
+        emulator.sessions.clear()
+        return {"status": "ok"}
+
+    return app
+
+
+def _parse_latency(values: List[str]) -> Dict[str, float]:
+    latency = {}
+    for value in values:
+        name, _, ms = value.partition("=")
+        latency[name.strip()] = float(ms)
+    return latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emulated ADK API server for load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", action="append", default=[], metavar="APP=MS",
+                        help="Median /run latency for an app (repeatable).")
+    parser.add_argument("--latency-sigma", type=float, default=0.25,
+                        help="Lognormal sigma of the latency (0 = constant).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability that /run returns 500.")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="Concurrent /run cap (0 = unlimited).")
+    parser.add_argument("--overflow", choices=["queue", "reject"], default="queue",
+                        help="What to do with runs above the cap: wait, or answer 429.")
+    parser.add_argument("--flag-rate", type=float, default=0.15, help="Probability of a MEDIUM/HIGH level.")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Multiplier applied to every latency.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    emulator = Emulator(
+        latency_ms=_parse_latency(args.latency),
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        max_concurrency=args.max_concurrency,
+        overflow=args.overflow,
+        flag_rate=args.flag_rate,
+        time_scale=args.time_scale,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(emulator), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
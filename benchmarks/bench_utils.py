@@ -0,0 +1,90 @@
+"""
+Benchmark Utilities
+
+Shared helpers for the scripts in this directory: dataset loading, agent
+input construction, percentiles and a single in-process ADK run.
+"""
+
+import json
+import math
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "team"))
+
+DEFAULT_DATASET = ROOT / "data" / "inputs_to_agent_fake_mimic3.json"
+
+
+def load_records(path: str = str(DEFAULT_DATASET), limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Load the fake MIMIC admissions (optionally only the first ``limit``).
+
+    ``path`` is a JSON array, a JSONL file, or a directory of ``part-*.jsonl``
+    files written by ``python -m mimic_data generate``.
+    """
+    path = Path(path)
+    files = sorted(path.glob("part-*.jsonl")) if path.is_dir() else [path]
+    records: List[Dict[str, Any]] = []
+    for file in files:
+        with open(file, "r", encoding="utf-8") as f:
+            if file.suffix != ".jsonl":
+                records.extend(json.load(f))
+                continue
+            for line in f:
+                if limit and len(records) >= limit:
+                    break
+                if line.strip():
+                    records.append(json.loads(line))
+        if limit and len(records) >= limit:
+            break
+    return records[:limit] if limit else records
+
+
+def build_agent_input(record: Dict[str, Any]) -> str:
+    """Agent input exactly as sent from notebooks/simple-run-agent-team.ipynb."""
+    return f"""
+data: {record["admission_str"]}
+
+current_prescription: {record["current_prescription"]}
+"""
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+async def run_once(runner, text: str, user_id: str = "bench_user") -> Dict[str, Any]:
+    """
+    Run an agent once through an ADK Runner and return its final state,
+    wall time and the events it produced.
+    """
+    from google.genai import types
+
+    session = await runner.session_service.create_session(
+        app_name=runner.app_name, user_id=user_id, session_id=f"s_{uuid.uuid4().hex[:8]}"
+    )
+    events = []
+    start = time.perf_counter()
+    async for event in runner.run_async(
+        user_id=user_id,
+        session_id=session.id,
+        new_message=types.Content(role="user", parts=[types.Part(text=text)]),
+    ):
+        events.append(event)
+    elapsed = time.perf_counter() - start
+    session = await runner.session_service.get_session(
+        app_name=runner.app_name, user_id=user_id, session_id=session.id
+    )
+    await runner.session_service.delete_session(
+        app_name=runner.app_name, user_id=user_id, session_id=session.id
+    )
+    return {"state": dict(session.state), "seconds": elapsed, "events": events}
@@ -0,0 +1,147 @@
+"""
+Bulkhead Isolation Benchmark
+
+Simple prescription checks during a burst of sequential analyses, with the
+client's shared worker pool and with per-agent bulkheads
+(adk_service/bulkheads.py). The ADK server is the emulator
+(adk_emulator.py) with no concurrency cap, so any queueing happens in the
+client, as in api-server and mcp-server:
+
+- burst: --burst sequential_analyzer_agent requests arriving at once;
+- interactive: simple_prescription_agent requests arriving at random
+  (Poisson, --simple-rate per second) from just before the burst until it
+  has been served.
+
+Modes:
+- alone: the simple checks without the burst (the latency to keep);
+- shared: BULKHEADS_ENABLED=0, every run on the ADK_HTTP_POOL_SIZE (32)
+  threads and connections (the previous behaviour);
+- bulkheads: the default BULKHEADS, with waits scaled like the latencies.
+
+Usage:
+    python benchmarks/bulkhead_isolation.py --burst 200 --simple-rate 2 --time-scale 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+
+import uvicorn
+
+from adk_emulator import Emulator, create_app
+from bench_utils import ROOT, build_agent_input, load_records, percentile
+
+sys.path.insert(0, str(ROOT))
+
+from adk_service import BulkheadFull, client  # noqa: E402
+from adk_service.bulkheads import BULKHEADS, bulkheads  # noqa: E402
+
+# --- Constants ---
+BURST_AGENT = "sequential_analyzer_agent"
+SIMPLE_AGENT = "simple_prescription_agent"
+# Simple checks start this long (unscaled) before the burst.
+LEAD_S = 5.0
+
+
+def serve(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def call(agent: str, text: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        await client.run_agent_async(agent, text, user_id="bench")
+        outcome = "completed"
+    except BulkheadFull:
+        outcome = "rejected"
+    return {"outcome": outcome, "seconds": time.perf_counter() - started}
+
+
+async def bench(mode: str, inputs: List[str], args) -> Dict[str, Any]:
+    bulkheads.enabled = mode == "bulkheads"
+    bulkheads._bulkheads.clear()
+    bulkheads.limits = {name: (concurrent, queue, wait_s * args.time_scale)
+                        for name, (concurrent, queue, wait_s) in BULKHEADS.items()}
+    rng = random.Random(args.seed)
+    burst_done = asyncio.Event()
+    burst: List[Dict[str, Any]] = []
+    simple: List[Dict[str, Any]] = []
+
+    async def run_burst():
+        await asyncio.sleep(LEAD_S * args.time_scale)
+        burst.extend(await asyncio.gather(*(call(BURST_AGENT, inputs[i % len(inputs)]) for i in range(args.burst))))
+        burst_done.set()
+
+    async def run_simple(duration_s: float):
+        tasks, started = [], time.perf_counter()
+        while not burst_done.is_set() and (mode != "alone" or time.perf_counter() - started < duration_s):
+            await asyncio.sleep(rng.expovariate(args.simple_rate) * args.time_scale)
+            tasks.append(asyncio.create_task(call(SIMPLE_AGENT, inputs[len(tasks) % len(inputs)])))
+        simple.extend(await asyncio.gather(*tasks))
+
+    started = time.perf_counter()
+    if mode == "alone":
+        await run_simple(args.alone_s * args.time_scale)
+    else:
+        await asyncio.gather(run_burst(), run_simple(0))
+    elapsed = time.perf_counter() - started
+
+    unscale = 1 / args.time_scale
+    simple_ok = [r["seconds"] for r in simple if r["outcome"] == "completed"]
+    result = {
+        "mode": mode,
+        "simple_requests": len(simple),
+        "simple_rejected": len(simple) - len(simple_ok),
+        "simple_p50_s": round(percentile(simple_ok, 50) * unscale, 2),
+        "simple_p95_s": round(percentile(simple_ok, 95) * unscale, 2),
+        "simple_max_s": round(max(simple_ok) * unscale, 2),
+    }
+    if mode != "alone":
+        burst_ok = [r["seconds"] for r in burst if r["outcome"] == "completed"]
+        burst_rejected = [r["seconds"] for r in burst if r["outcome"] == "rejected"]
+        result.update({
+            "burst_completed": len(burst_ok),
+            "burst_rejected": len(burst_rejected),
+            # Rejections involve no simulated latency: wall time, not unscaled.
+            "burst_rejection_p95_ms": round(percentile(burst_rejected, 95) * 1000, 2),
+            "burst_completed_p95_s": round(percentile(burst_ok, 95) * unscale, 2),
+            "elapsed_s": round(elapsed * unscale, 1),
+        })
+    if mode == "bulkheads":
+        result["bulkheads"] = {name: {key: report[key] for key in ("max_concurrent", "peak_inflight", "accepted",
+                                                                    "rejected_full", "rejected_wait")}
+                               for name, report in bulkheads.report().items()}
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Simple checks during a sequential burst, shared pool vs bulkheads.")
+    parser.add_argument("--burst", type=int, default=200, help="Sequential analyses arriving at once.")
+    parser.add_argument("--simple-rate", type=float, default=2.0, help="Simple checks per second.")
+    parser.add_argument("--alone-s", type=float, default=60.0, help="Duration of the baseline (unscaled seconds).")
+    parser.add_argument("--time-scale", type=float, default=0.1,
+                        help="Scale simulated delays to speed the run up (results are unscaled).")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    inputs = [build_agent_input(record) for record in load_records(limit=20)]
+    server = serve(create_app(Emulator(time_scale=args.time_scale, seed=args.seed)), args.port)
+    client.backends.set_urls([f"http://127.0.0.1:{args.port}"])
+    client.session_pool.size = 0
+    for mode in ("alone", "shared", "bulkheads"):
+        print(json.dumps(await bench(mode, inputs, args)))
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+"""
+LLM Cache Replay Benchmark
+
+Records model responses for a sample of admissions (mock LLM with simulated
+latency), then replays the same sample offline from the cache
+(team/common/llm_cache.py). Replay time is pure orchestration overhead:
+ADK runner, sessions, callbacks and cache lookups.
+
+Usage:
+    python benchmarks/cache_replay.py --agent parallel --records 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+
+from bench_utils import build_agent_input, load_records, percentile, run_once
+from mock_llm import MockLlm, use_mock_models
+
+from google.adk.runners import InMemoryRunner
+
+from common import llm_cache
+
+
+def load_agent(name: str):
+    if name == "parallel":
+        from parallel_analyzer_agent.agent import root_agent
+    elif name == "sequential":
+        from sequential_analyzer_agent.agent import root_agent
+    else:
+        from simple_prescription_agent.agent import root_agent
+    return root_agent.clone()
+
+
+async def run_pass(mode: str, agent, prompts: list, concurrency: int) -> dict:
+    os.environ["LLM_CACHE_MODE"] = mode
+    for key in llm_cache.stats:
+        llm_cache.stats[key] = 0
+    runner = InMemoryRunner(agent=agent, app_name="bench")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(prompt):
+        async with semaphore:
+            return await run_once(runner, prompt)
+
+    results = await asyncio.gather(*(one(p) for p in prompts))
+    latencies = [r["seconds"] * 1000 for r in results]
+    return {
+        "mode": mode,
+        "records": len(prompts),
+        "mean_ms": round(statistics.mean(latencies), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        **llm_cache.stats,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Record then replay an agent offline.")
+    parser.add_argument("--agent", choices=("simple", "parallel", "sequential"), default="parallel")
+    parser.add_argument("--records", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    prompts = [build_agent_input(r) for r in load_records(limit=args.records)]
+    agent = use_mock_models(load_agent(args.agent), lambda a: MockLlm(output_tokens=150))
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["LLM_CACHE_DIR"] = directory
+        for mode in ("record", "replay"):
+            print(json.dumps(await run_pass(mode, agent, prompts, args.concurrency)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
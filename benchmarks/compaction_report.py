@@ -0,0 +1,59 @@
+"""
+Compaction Report
+
+Measures how much the context compaction stage (team/common/compaction.py)
+shrinks the agent input across the fake MIMIC dataset.
+
+Usage:
+    python benchmarks/compaction_report.py
+    python benchmarks/compaction_report.py --budget 300 --budget 200
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from bench_utils import DEFAULT_DATASET, build_agent_input, load_records
+
+from common.compaction import compact_admission, estimate_tokens
+
+
+def measure(prompts: list, budget=None) -> dict:
+    before = [estimate_tokens(p) for p in prompts]
+    start = time.perf_counter()
+    compacted = [compact_admission(p, budget) for p in prompts]
+    elapsed = time.perf_counter() - start
+    after = [estimate_tokens(p) for p in compacted]
+    reductions = [1 - a / b for a, b in zip(after, before)]
+    return {
+        "budget": budget,
+        "records": len(prompts),
+        "chars_before": sum(len(p) for p in prompts),
+        "chars_after": sum(len(p) for p in compacted),
+        "tokens_before": sum(before),
+        "tokens_after": sum(after),
+        "mean_tokens_before": round(statistics.mean(before), 1),
+        "mean_tokens_after": round(statistics.mean(after), 1),
+        "max_tokens_after": max(after),
+        "total_reduction_pct": round(100 * (1 - sum(after) / sum(before)), 1),
+        "median_reduction_pct": round(100 * statistics.median(reductions), 1),
+        "compaction_ms_per_record": round(1000 * elapsed / len(prompts), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dataset", default=str(DEFAULT_DATASET))
+    parser.add_argument("--budget", type=int, action="append", default=[],
+                        help="Token budget to evaluate (repeatable).")
+    args = parser.parse_args()
+
+    prompts = [build_agent_input(r) for r in load_records(args.dataset)]
+
+    for budget in [None] + args.budget:
+        print(json.dumps(measure(prompts, budget)))
+
+
+if __name__ == "__main__":
+    main()
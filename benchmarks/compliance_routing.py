@@ -0,0 +1,115 @@
+"""
+Compliance Routing Benchmark
+
+Measures the routing latency saved by the deterministic pre-router of
+team/compliance_agent and the SUS+NHS concurrent fan-out. The remote A2A
+agents are replaced by local LlmAgents on the mock LLM that return
+schema-valid SUS/NHS responses; the LLM router is a mock that issues the
+same transfer after a simulated generation.
+
+Usage:
+    python benchmarks/compliance_routing.py --records 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import AsyncGenerator
+
+from bench_utils import ROOT, build_agent_input, load_records, percentile
+from mock_llm import MockLlm
+
+sys.path.insert(0, str(ROOT))
+
+from google.adk.agents import LlmAgent  # noqa: E402
+from google.adk.models import LlmRequest, LlmResponse  # noqa: E402
+from google.adk.runners import InMemoryRunner  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from compliance_agent.agent import root_agent  # noqa: E402
+from compliance_agent.fanout import OUTPUT_KEY, build_fanout_agent  # noqa: E402
+from compliance_agent.routing import BOTH_AGENT, TARGETS, detect_target_system  # noqa: E402
+from compliance_agents.nhs.agent import NhsComplianceResponse  # noqa: E402
+from compliance_agents.sus.agent import SusComplianceResponse  # noqa: E402
+
+PROMPTS = {
+    "SUS": "Avalie a conformidade desta prescrição com o SUS.",
+    "NHS": "Check this prescription against NHS guidance.",
+    "BOTH": "Compare this prescription against both SUS and NHS guidance.",
+}
+
+
+class RouterMockLlm(MockLlm):
+    """Mock LLM router: simulated generation, then the same transfer the pre-router would make."""
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        await asyncio.sleep((self.ttft_s + self.output_tokens * self.seconds_per_token) * self.time_scale)
+        text = llm_request.contents[-1].parts[0].text or ""
+        target = TARGETS[detect_target_system(text) or "SUS"]
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(
+            function_call=types.FunctionCall(name="transfer_to_agent", args={"agent_name": target}))]))
+
+
+def build_agent(time_scale: float):
+    def specialist(name, schema):
+        return LlmAgent(name=name, model=MockLlm(output_tokens=400, time_scale=time_scale),
+                        instruction="Compliance review.", output_schema=schema)
+
+    sus = specialist("sus_compliance_client", SusComplianceResponse)
+    nhs = specialist("nhs_compliance_client", NhsComplianceResponse)
+    return root_agent.clone(update={
+        "model": RouterMockLlm(output_tokens=20, time_scale=time_scale),
+        "sub_agents": [sus, nhs, build_fanout_agent(BOTH_AGENT, sus, nhs)],
+    })
+
+
+async def run(runner, text: str) -> dict:
+    session = await runner.session_service.create_session(app_name=runner.app_name, user_id="bench")
+    start = time.perf_counter()
+    routed_at = None
+    async for event in runner.run_async(
+        user_id="bench", session_id=session.id,
+        new_message=types.Content(role="user", parts=[types.Part(text=text)]),
+    ):
+        if routed_at is None and any(r.name == "transfer_to_agent" for r in event.get_function_responses()):
+            routed_at = time.perf_counter()
+    end = time.perf_counter()
+    session = await runner.session_service.get_session(
+        app_name=runner.app_name, user_id="bench", session_id=session.id)
+    return {"route_s": routed_at - start, "total_s": end - start, "state": session.state}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compliance routing latency: pre-router vs LLM router.")
+    parser.add_argument("--records", type=int, default=20)
+    parser.add_argument("--time-scale", type=float, default=0.1)
+    args = parser.parse_args()
+
+    records = load_records(limit=args.records)
+    for fast in ("0", "1"):
+        os.environ["COMPLIANCE_FAST_ROUTING"] = fast
+        runner = InMemoryRunner(agent=build_agent(args.time_scale), app_name="compliance_agent")
+        for system, prefix in PROMPTS.items():
+            results = [await run(runner, f"{prefix}\n{build_agent_input(r)}") for r in records]
+            route = [r["route_s"] / args.time_scale * 1000 for r in results]
+            total = [r["total_s"] / args.time_scale for r in results]
+            if system == "BOTH":
+                assert all(OUTPUT_KEY in r["state"] for r in results)
+            print(json.dumps({
+                "router": "deterministic" if fast == "1" else "llm",
+                "system": system,
+                "routing_ms_mean": round(statistics.mean(route), 1),
+                "routing_ms_p95": round(percentile(route, 95), 1),
+                "total_s_mean": round(statistics.mean(total), 2),
+            }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,227 @@
+"""
+Deadline Cancellation Benchmark
+
+Wasted model work under load with and without server-side cancellation
+(adk_service/deadlines.py). A real ADK app (AdkWebServer) serving the
+parallel and sequential pipelines on the mock LLM runs in-process, and
+concurrent clients call it through ``adk_service.run_agent_async``:
+
+- most requests have a generous deadline and complete;
+- --tight-rate of them have a deadline shorter than the pipeline needs;
+- --disconnect-rate of them have a caller that goes away mid-run.
+
+Work is counted on the server: model calls started and output tokens
+generated by every mock model. Delivered work is the usage of the runs
+whose results reached the caller, so wasted = server work - delivered work.
+"off" serves the app without DeadlineMiddleware (the client still gives up
+at the deadline, the server finishes the run anyway); "on" installs it as
+the launcher does. A model call cancelled mid-generation counts as started
+but generates no tokens.
+
+Usage:
+    python benchmarks/deadline_cancellation.py --requests 120 --concurrency 24 --time-scale 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List
+
+import uvicorn
+from google.adk.artifacts.in_memory_artifact_service import InMemoryArtifactService
+from google.adk.auth.credential_service.in_memory_credential_service import InMemoryCredentialService
+from google.adk.cli.adk_web_server import AdkWebServer
+from google.adk.cli.utils.base_agent_loader import BaseAgentLoader
+from google.adk.evaluation.local_eval_set_results_manager import LocalEvalSetResultsManager
+from google.adk.evaluation.local_eval_sets_manager import LocalEvalSetsManager
+from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+
+from bench_utils import ROOT, build_agent_input, load_records, percentile
+from mock_llm import MockLlm, use_mock_models
+from parallel_analyzer_agent.agent import root_agent as parallel_agent
+from sequential_analyzer_agent.agent import root_agent as sequential_agent
+
+sys.path.insert(0, str(ROOT))
+
+from adk_service import client, deadlines  # noqa: E402
+from adk_service.deadlines import Deadline, DeadlineExceeded, RunCancelled  # noqa: E402
+
+# --- Constants ---
+# Simulated output tokens per agent (as in incremental_reanalysis.py).
+OUTPUT_TOKENS = {
+    "general_health_agent": 700,
+    "treatment_assessment_agent": 800,
+    "synthesizer_health_report_agent": 300,
+    "drug_analysis_agent": 60,
+    "dose_drug_analysis_agent": 60,
+    "route_drug_analysis_agent": 60,
+    "drug_report_synthesizer": 150,
+}
+# Server idle for this long (wall time) = no run left in flight.
+QUIET_S = 1.0
+
+
+class StaticAgentLoader(BaseAgentLoader):
+    def __init__(self, agents: Dict[str, Any]):
+        self.agents = agents
+
+    def load_agent(self, agent_name: str):
+        return self.agents[agent_name]
+
+    def list_agents(self) -> List[str]:
+        return sorted(self.agents)
+
+
+def build_app(agents: Dict[str, Any], cancellation: bool, workdir: str):
+    web_server = AdkWebServer(
+        agent_loader=StaticAgentLoader(agents),
+        session_service=InMemorySessionService(),
+        artifact_service=InMemoryArtifactService(),
+        memory_service=InMemoryMemoryService(),
+        credential_service=InMemoryCredentialService(),
+        eval_sets_manager=LocalEvalSetsManager(agents_dir=workdir),
+        eval_set_results_manager=LocalEvalSetResultsManager(agents_dir=workdir),
+        agents_dir=workdir,
+    )
+    app = web_server.get_fast_api_app()
+    if cancellation:
+        deadlines.install(app, deadlines.RunRegistry())
+    return app
+
+
+def serve(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def server_work(models: List[MockLlm]) -> Dict[str, int]:
+    return {"llm_calls": sum(m.calls for m in models), "output_tokens": sum(m.completion_tokens for m in models)}
+
+
+async def drain(models: List[MockLlm]) -> None:
+    """Waits until runs the clients gave up on stop generating."""
+    last, quiet_since = server_work(models), time.perf_counter()
+    while time.perf_counter() - quiet_since < QUIET_S:
+        await asyncio.sleep(0.1)
+        current = server_work(models)
+        if current != last:
+            last, quiet_since = current, time.perf_counter()
+
+
+def plan(n: int, inputs: List[str], durations: Dict[str, float], args) -> List[Dict[str, Any]]:
+    """The same requests for both modes: agent, input, deadline and disconnect time (seconds)."""
+    rng = random.Random(args.seed)
+    requests = []
+    for i in range(n):
+        agent = sorted(durations)[i % len(durations)]
+        duration = durations[agent]
+        kind = rng.choices(("normal", "tight", "disconnect"),
+                           weights=(1 - args.tight_rate - args.disconnect_rate, args.tight_rate, args.disconnect_rate))[0]
+        requests.append({
+            "agent": agent,
+            "input": inputs[i % len(inputs)],
+            "kind": kind,
+            "timeout_s": duration * (rng.uniform(0.2, 0.8) if kind == "tight" else 10),
+            "disconnect_after_s": duration * rng.uniform(0.2, 0.8) if kind == "disconnect" else None,
+        })
+    return requests
+
+
+async def call(request: Dict[str, Any], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    async with semaphore:
+        started = time.perf_counter()
+        is_disconnected = None
+        if request["disconnect_after_s"] is not None:
+            async def is_disconnected():
+                return time.perf_counter() - started >= request["disconnect_after_s"]
+        try:
+            _, usage = await client.run_agent_async(request["agent"], request["input"], user_id="bench",
+                                                    deadline=Deadline(request["timeout_s"]),
+                                                    is_disconnected=is_disconnected)
+            outcome = "completed"
+        except DeadlineExceeded:
+            usage, outcome = None, "deadline"
+        except RunCancelled:
+            usage, outcome = None, "disconnected"
+        return {"outcome": outcome, "usage": usage, "seconds": time.perf_counter() - started}
+
+
+async def bench(mode: str, requests: List[Dict[str, Any]], models: List[MockLlm], args) -> Dict[str, Any]:
+    for model in models:
+        model.calls = model.completion_tokens = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+    results = await asyncio.gather(*(call(r, semaphore) for r in requests))
+    await drain(models)
+
+    delivered = [r["usage"] for r in results if r["usage"] is not None]
+    work = server_work(models)
+    wasted_calls = work["llm_calls"] - sum(u["llm_calls"] for u in delivered)
+    wasted_tokens = work["output_tokens"] - sum(u["output_tokens"] for u in delivered)
+    outcomes = {name: sum(r["outcome"] == name for r in results) for name in ("completed", "deadline", "disconnected")}
+    completed = [r["seconds"] for r in results if r["outcome"] == "completed"]
+    return {
+        "cancellation": mode,
+        **outcomes,
+        "server_llm_calls_started": work["llm_calls"],
+        "server_output_tokens": work["output_tokens"],
+        "wasted_llm_calls": wasted_calls,
+        "wasted_output_tokens": wasted_tokens,
+        "wasted_pct": round(100 * wasted_tokens / max(1, work["output_tokens"]), 1),
+        "completed_p50_s": round(percentile(completed, 50) / args.time_scale, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Wasted model work with and without run cancellation.")
+    parser.add_argument("--requests", type=int, default=120)
+    parser.add_argument("--concurrency", type=int, default=24)
+    parser.add_argument("--tight-rate", type=float, default=0.25)
+    parser.add_argument("--disconnect-rate", type=float, default=0.15)
+    parser.add_argument("--time-scale", type=float, default=0.05,
+                        help="Scale simulated delays to speed the run up (results are unscaled).")
+    parser.add_argument("--port", type=int, default=8791)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    models: List[MockLlm] = []
+
+    def factory(agent):
+        models.append(MockLlm(output_tokens=OUTPUT_TOKENS[agent.name], time_scale=args.time_scale))
+        return models[-1]
+
+    agents = {
+        "parallel_analyzer_agent": use_mock_models(parallel_agent, factory),
+        "sequential_analyzer_agent": use_mock_models(sequential_agent, factory),
+    }
+    inputs = [build_agent_input(record) for record in load_records(limit=20)]
+    client.session_pool.size = 0
+    # Client-side bulkheads would cap the runs this measures on the server.
+    client.bulkheads.enabled = False
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for i, mode in enumerate(("off", "on")):
+            port = args.port + i
+            server = serve(build_app(agents, mode == "on", workdir), port)
+            client.backends.set_urls([f"http://127.0.0.1:{port}"])
+            if i == 0:
+                durations = {}
+                for agent in agents:
+                    started = time.perf_counter()
+                    client.run_agent(agent, inputs[0], user_id="bench")
+                    durations[agent] = time.perf_counter() - started
+                requests = plan(args.requests, inputs, durations, args)
+            print(json.dumps(await bench(mode, requests, models, args)))
+            server.should_exit = True
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
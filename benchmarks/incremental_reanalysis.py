@@ -0,0 +1,103 @@
+"""
+Incremental Re-analysis Benchmark
+
+Latency, LLM calls and tokens of repeat encounters with and without
+INCREMENTAL_ANALYSIS (team/common/incremental.py), against the mock LLM.
+Every patient has three encounters with the same admission history:
+
+- first: the record's own current prescription (cold cache);
+- new: a different prescription (taken from another record), so only the
+  history-level analyses can be reused;
+- repeat: the first prescription again (re-ordered medication), so the
+  per-drug verdicts are reused as well.
+
+Both the sequential and the parallel analyzer are measured.
+
+Usage:
+    python benchmarks/incremental_reanalysis.py --records 20 --time-scale 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+from typing import Any, Dict, List
+
+from bench_utils import build_agent_input, load_records, run_once
+from mock_llm import MockLlm, use_mock_models
+
+from google.adk.runners import InMemoryRunner
+
+from common import incremental
+from parallel_analyzer_agent.agent import root_agent as parallel_agent
+from sequential_analyzer_agent.agent import build_pipeline
+
+# --- Constants ---
+# Simulated output tokens per agent.
+OUTPUT_TOKENS = {
+    "general_health_agent": 700,
+    "treatment_assessment_agent": 800,
+    "synthesizer_health_report_agent": 300,
+    "drug_analysis_agent": 60,
+    "dose_drug_analysis_agent": 60,
+    "route_drug_analysis_agent": 60,
+    "drug_report_synthesizer": 150,
+}
+ENCOUNTERS = ("first", "new", "repeat")
+
+
+def encounters(records: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Agent inputs per encounter, in patient order."""
+    inputs: Dict[str, List[str]] = {name: [] for name in ENCOUNTERS}
+    for i, record in enumerate(records):
+        other = records[(i + 1) % len(records)]["current_prescription"]
+        inputs["first"].append(build_agent_input(record))
+        inputs["new"].append(build_agent_input({**record, "current_prescription": other}))
+        inputs["repeat"].append(build_agent_input(record))
+    return inputs
+
+
+async def bench(label: str, agent, inputs: Dict[str, List[str]], args) -> List[Dict[str, Any]]:
+    runner = InMemoryRunner(agent=agent, app_name=label)
+    rows = []
+    for encounter in ENCOUNTERS:
+        results = [await run_once(runner, text) for text in inputs[encounter]]
+        usage = [[e.usage_metadata for e in r["events"] if e.usage_metadata] for r in results]
+        rows.append({
+            "mean_s": round(statistics.mean(r["seconds"] for r in results) / args.time_scale, 2),
+            "llm_calls": round(statistics.mean(len(u) for u in usage), 2),
+            "input_tokens": round(statistics.mean(sum(m.prompt_token_count or 0 for m in u) for u in usage)),
+            "output_tokens": round(statistics.mean(sum(m.candidates_token_count or 0 for m in u) for u in usage)),
+        })
+    return rows
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Repeat encounters with and without incremental re-analysis.")
+    parser.add_argument("--records", type=int, default=20)
+    parser.add_argument("--time-scale", type=float, default=0.05,
+                        help="Scale simulated delays to speed the run up (results are unscaled).")
+    args = parser.parse_args()
+
+    def factory(agent):
+        return MockLlm(output_tokens=OUTPUT_TOKENS[agent.name], time_scale=args.time_scale)
+
+    agents = {
+        "sequential_analyzer_agent": use_mock_models(build_pipeline("strict"), factory),
+        "parallel_analyzer_agent": use_mock_models(parallel_agent, factory),
+    }
+    inputs = encounters(load_records(limit=args.records))
+    for mode in ("off", "on"):
+        os.environ["INCREMENTAL_ANALYSIS"] = "1" if mode == "on" else "0"
+        with tempfile.TemporaryDirectory() as cache:
+            os.environ["INCREMENTAL_CACHE_DIR"] = cache
+            for label, agent in agents.items():
+                for encounter, row in zip(ENCOUNTERS, await bench(label, agent, inputs, args)):
+                    print(json.dumps({"agent": label, "incremental": mode, "encounter": encounter, **row}))
+    print(json.dumps({"cache": incremental.stats}))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
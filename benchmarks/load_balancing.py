@@ -0,0 +1,157 @@
+"""
+Load Balancing Benchmark
+
+Throughput of the ADK client over 1..--backends ADK backends
+(adk_service/backends.py). Each backend is an ADK emulator process
+(adk_emulator.py) that runs at most --capacity runs at a time and queues
+the rest, like an ADK server bounded by its CPU and model quota. A fixed
+pool of clients calls ``adk_service.run_agent_async`` with enough runs in
+flight to saturate every backend, through the session pool as in
+api-server. Sessions are pinned to the backend that created them. A call
+routed elsewhere would get 404 from the emulator, so ``errors`` also
+checks session affinity.
+
+Then the failover scenario: one of the backends is killed a third of the
+way through. Runs in flight on it fail; the backend is ejected after
+ADK_EJECT_AFTER failures or a failed health check, and the rest of the
+runs go to the survivors.
+
+Usage:
+    python benchmarks/load_balancing.py --backends 4 --capacity 8 --runs-per-backend 200 --time-scale 0.25
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from bench_utils import ROOT, build_agent_input, load_records, percentile
+
+sys.path.insert(0, str(ROOT))
+# One executor thread per run in flight (client.run_agent_async).
+os.environ.setdefault("ADK_HTTP_POOL_SIZE", "256")
+
+from adk_service import client  # noqa: E402
+from adk_service.sessions import SessionPool  # noqa: E402
+
+# --- Constants ---
+AGENT = "simple_prescription_agent"
+EMULATOR = Path(__file__).resolve().parent / "adk_emulator.py"
+HEALTH_INTERVAL_S = 1.0
+
+
+def start_backends(n: int, args) -> List[subprocess.Popen]:
+    processes = [
+        subprocess.Popen([sys.executable, str(EMULATOR), "--port", str(args.port + i),
+                          "--max-concurrency", str(args.capacity), "--time-scale", str(args.time_scale),
+                          "--seed", str(i)])
+        for i in range(n)
+    ]
+    for i in range(n):
+        while True:
+            try:
+                requests.get(f"http://127.0.0.1:{args.port + i}/list-apps", timeout=1).raise_for_status()
+                break
+            except requests.RequestException:
+                time.sleep(0.1)
+    return processes
+
+
+def emulator_runs(urls: List[str]) -> List[Optional[int]]:
+    """Runs served by each backend since the last call (None for a backend that is down)."""
+    runs = []
+    for url in urls:
+        try:
+            runs.append(requests.get(f"{url}/emulator/stats", timeout=2).json()["runs"])
+            requests.post(f"{url}/emulator/reset", timeout=2)
+        except requests.RequestException:
+            runs.append(None)
+    return runs
+
+
+async def bench(label: str, urls: List[str], runs: int, inputs: List[str], args, kill=None) -> Dict[str, Any]:
+    client.backends.set_urls(urls)
+    client.session_pool = SessionPool(client.create_session, client.delete_session, client.list_sessions,
+                                      rank=client.backends.rank, unpin=client.backends.unpin, reap_interval_s=0)
+    emulator_runs(urls)
+    seconds: List[float] = []
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(runs):
+        queue.put_nowait(inputs[i % len(inputs)])
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            text = queue.get_nowait()
+            if kill is not None and runs - queue.qsize() == runs // 3:
+                kill()
+            started = time.perf_counter()
+            try:
+                await client.run_agent_async(AGENT, text, user_id="bench")
+                seconds.append(time.perf_counter() - started)
+            except Exception:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.clients)))
+    elapsed = time.perf_counter() - started
+    client.session_pool.close()
+
+    unscale = 1 / args.time_scale
+    report = client.backends.report()
+    return {
+        "scenario": label,
+        "backends": len(urls),
+        "runs_ok": len(seconds),
+        "errors": errors,
+        "runs_per_min": round(len(seconds) / (elapsed * unscale) * 60, 1),
+        "p50_s": round(percentile(seconds, 50) * unscale, 2),
+        "p95_s": round(percentile(seconds, 95) * unscale, 2),
+        "runs_per_backend": emulator_runs(urls),
+        "ejections": sum(backend["ejections"] for backend in report.values()),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Client throughput over several ADK backends.")
+    parser.add_argument("--backends", type=int, default=4)
+    parser.add_argument("--capacity", type=int, default=8, help="Concurrent runs per backend.")
+    parser.add_argument("--clients", type=int, default=0,
+                        help="Runs in flight (default: 2x the capacity of all backends).")
+    parser.add_argument("--runs-per-backend", type=int, default=200)
+    parser.add_argument("--time-scale", type=float, default=0.25,
+                        help="Scale simulated delays to speed the run up (results are unscaled).")
+    parser.add_argument("--port", type=int, default=8810)
+    args = parser.parse_args()
+    args.clients = args.clients or 2 * args.capacity * args.backends
+
+    # Client-side bulkheads would cap the runs in flight this measures.
+    client.bulkheads.enabled = False
+    client.backends.health_interval_s = HEALTH_INTERVAL_S
+    inputs = [build_agent_input(record) for record in load_records(limit=20)]
+    processes = start_backends(args.backends, args)
+    urls = [f"http://127.0.0.1:{args.port + i}" for i in range(args.backends)]
+    try:
+        baseline = None
+        for n in range(1, args.backends + 1):
+            result = await bench("scaling", urls[:n], n * args.runs_per_backend, inputs, args)
+            baseline = baseline or result["runs_per_min"]
+            result["scaling_efficiency"] = round(result["runs_per_min"] / (n * baseline), 2)
+            print(json.dumps(result))
+        print(json.dumps(await bench("failover", urls, args.backends * args.runs_per_backend, inputs, args,
+                                     kill=processes[-1].kill)))
+    finally:
+        for process in processes:
+            process.kill()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
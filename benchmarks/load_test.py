@@ -0,0 +1,192 @@
+"""
+Health Analysis API Load Test
+
+Open-loop load generator for api-server. For each endpoint it steps through a
+list of arrival rates; within a step, requests are sent at Poisson arrival
+times regardless of how many are still in flight, so queueing in the server
+shows up as latency instead of silently lowering the offered load.
+
+Request bodies are admissions sampled (seeded) from the MIMIC files in data/.
+Each step reports achieved throughput, latency percentiles and errors. A
+step is saturated when the error rate exceeds --max-error-rate, p95 exceeds
+--slo-p95-s, or p95 grows beyond --max-latency-growth times the p95 of the
+first (lowest) rate, i.e. where latency falls off a cliff. The highest rate
+before saturation is reported as the endpoint's sustainable rate.
+Results are written as JSON for comparison between releases.
+
+Usage:
+    python benchmarks/load_test.py --url http://localhost:8002 \\
+        --endpoints /analyze/parallel,/analyze/all --rates 0.5,1,2,4 --duration 30 \\
+        --output load_results.json
+
+Pair with benchmarks/adk_emulator.py to run without Gemini.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import httpx
+
+from bench_utils import DEFAULT_DATASET, ROOT, build_agent_input, load_records, percentile
+
+sys.path.insert(0, str(ROOT))
+
+from mimic_data.render import render_admission  # noqa: E402
+
+
+def admission_text(record: Dict[str, Any]) -> str:
+    """Request text for a record of inputs_to_agent_fake_mimic3.json or payload_mimic3.json."""
+    if "admission_str" in record:
+        return build_agent_input(record)
+    return render_admission(record).text
+
+
+def sample_bodies(paths: List[str], count: int, seed: int) -> List[Dict[str, str]]:
+    records = [record for path in paths for record in load_records(path)]
+    rng = random.Random(seed)
+    return [{"health_data": admission_text(rng.choice(records))} for _ in range(count)]
+
+
+async def run_step(
+    client: httpx.AsyncClient, url: str, rate: float, bodies: List[Dict[str, str]], baseline_p95: float, args
+) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    results: List[Dict[str, Any]] = []
+    in_flight = {"now": 0, "max": 0}
+
+    async def send(body):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        start = time.perf_counter()
+        try:
+            response = await client.post(url, json=body)
+            status = response.status_code
+            ok = response.is_success and _payload_ok(response)
+        except httpx.HTTPError as e:
+            status, ok = type(e).__name__, False
+        finally:
+            in_flight["now"] -= 1
+        results.append({"ok": ok, "status": status, "seconds": time.perf_counter() - start})
+
+    tasks = []
+    start = time.perf_counter()
+    next_at = 0.0
+    i = 0
+    while next_at < args.duration:
+        delay = start + next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(bodies[i % len(bodies)])))
+        i += 1
+        next_at += rng.expovariate(rate) if args.arrivals == "poisson" else 1 / rate
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    latencies = [r["seconds"] for r in results if r["ok"]]
+    errors = Counter(str(r["status"]) for r in results if not r["ok"])
+    throughput = len(latencies) / elapsed
+    error_rate = sum(errors.values()) / len(results) if results else 0.0
+    p95 = percentile(latencies, 95)
+    return {
+        "offered_rps": rate,
+        "requests": len(results),
+        "throughput_rps": round(throughput, 3),
+        "error_rate": round(error_rate, 4),
+        "errors": dict(errors),
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p90_s": round(percentile(latencies, 90), 3),
+        "p95_s": round(p95, 3),
+        "p99_s": round(percentile(latencies, 99), 3),
+        "max_s": round(max(latencies), 3) if latencies else None,
+        "mean_s": round(statistics.mean(latencies), 3) if latencies else None,
+        "max_in_flight": in_flight["max"],
+        "saturated": (
+            error_rate > args.max_error_rate
+            or p95 > args.slo_p95_s
+            or (baseline_p95 > 0 and p95 > args.max_latency_growth * baseline_p95)
+        ),
+    }
+
+
+def _payload_ok(response: httpx.Response) -> bool:
+    """/analyze/all answers 200 even when an analysis failed; count that as an error."""
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    if isinstance(body, dict) and "status" not in body:
+        return all(isinstance(v, dict) and v.get("status") == "success" for v in body.values())
+    return body.get("status") == "success"
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Open-loop load test for the Health Analysis API.")
+    parser.add_argument("--url", default="http://localhost:8002")
+    parser.add_argument("--endpoints", default="/analyze/parallel,/analyze/all")
+    parser.add_argument("--rates", default="0.5,1,2,4,8", help="Arrival rates (requests/s) to step through.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of arrivals per step.")
+    parser.add_argument("--arrivals", choices=["poisson", "constant"], default="poisson")
+    parser.add_argument("--datasets", default=str(DEFAULT_DATASET),
+                        help="Comma-separated MIMIC JSON files to sample admissions from.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout in seconds.")
+    parser.add_argument("--slo-p95-s", type=float, default=30.0, help="p95 latency above which a step is saturated.")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--max-latency-growth", type=float, default=3.0,
+                        help="p95 growth over the first step above which a step is saturated.")
+    parser.add_argument("--keep-going", action="store_true", help="Run every rate even after saturation.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    rates = [float(r) for r in args.rates.split(",")]
+    bodies = sample_bodies(args.datasets.split(","), 1000, args.seed)
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "args": vars(args),
+        "endpoints": {},
+    }
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        for endpoint in args.endpoints.split(","):
+            steps = []
+            for rate in rates:
+                baseline_p95 = steps[0]["p95_s"] if steps else 0.0
+                step = await run_step(client, endpoint, rate, bodies, baseline_p95, args)
+                steps.append(step)
+                print(json.dumps({"endpoint": endpoint, **step}))
+                if step["saturated"] and not args.keep_going:
+                    break
+            sustained = [s["offered_rps"] for s in steps if not s["saturated"]]
+            saturated = [s["offered_rps"] for s in steps if s["saturated"]]
+            report["endpoints"][endpoint] = {
+                "max_sustained_rps": max(sustained) if sustained else None,
+                "saturation_rps": min(saturated) if saturated else None,
+                "steps": steps,
+            }
+            print(json.dumps({"endpoint": endpoint, **{k: v for k, v in report["endpoints"][endpoint].items() if k != "steps"}}))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
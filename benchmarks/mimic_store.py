@@ -0,0 +1,113 @@
+"""
+MIMIC Store Benchmark
+
+Compares the notebook approach (json.load the whole payload, build a pandas
+DataFrame, filter it for every lookup) with mimic_data.MimicStore on open
+time, per-lookup latency and peak resident memory (each backend is measured in
+a fresh process, after the store has been converted). ``--replicate N`` writes a
+JSONL payload with N shifted copies of data/payload_mimic3.json first, to see
+how both scale past the 129 admissions shipped in the repo.
+
+Usage:
+    python benchmarks/mimic_store.py --replicate 100 --lookups 2000
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_utils import ROOT
+
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+from mimic_data import MimicStore, convert_payload, iter_payload  # noqa: E402
+
+PAYLOAD = ROOT / "data" / "payload_mimic3.json"
+ID_SHIFT = 10_000_000
+
+
+def replicate(copies: int, out: Path) -> Path:
+    admissions = list(iter_payload(PAYLOAD))
+    with open(out, "w", encoding="utf-8") as f:
+        for copy in range(copies):
+            for admission in admissions:
+                shifted = dict(admission, subject_id=admission["subject_id"] + copy * ID_SHIFT,
+                               hadm_id=admission["hadm_id"] + copy * ID_SHIFT)
+                f.write(json.dumps(shifted) + "\n")
+    return out
+
+
+def time_lookups(lookup, subject_ids, count: int, seed: int) -> float:
+    rng = random.Random(seed)
+    timings = []
+    for _ in range(count):
+        subject_id = rng.choice(subject_ids)
+        start = time.perf_counter()
+        lookup(subject_id)
+        timings.append(time.perf_counter() - start)
+    return round(statistics.mean(timings) * 1000, 4)
+
+
+def bench_pandas(source: Path, lookups: int, seed: int) -> dict:
+    start = time.perf_counter()
+    df = pd.DataFrame(list(iter_payload(source)))
+    opened = time.perf_counter() - start
+
+    def lookup(subject_id):
+        rows = df[df["subject_id"] == subject_id]
+        return rows.sort_values("hadm_id", ascending=False).iloc[0].to_dict()
+
+    subject_ids = df["subject_id"].unique().tolist()
+    return {"open_s": round(opened, 3), "lookup_ms": time_lookups(lookup, subject_ids, lookups, seed)}
+
+
+def bench_store(store_dir: Path, lookups: int, seed: int) -> dict:
+    start = time.perf_counter()
+    store = MimicStore(store_dir)
+    opened = time.perf_counter() - start
+    subject_ids = store.subject_ids.tolist()
+    return {"open_s": round(opened, 3), "lookup_ms": time_lookups(store.get_most_recent_admission, subject_ids, lookups, seed)}
+
+
+def in_child(func, *args) -> dict:
+    """Run a backend in a fresh interpreter and add its peak RSS."""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_measured, (func, *args))
+
+
+def _measured(func, *args) -> dict:
+    return {**func(*args), "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pandas scan vs. indexed columnar MIMIC store.")
+    parser.add_argument("--replicate", type=int, default=1, help="Copies of the payload to benchmark on.")
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = PAYLOAD if args.replicate == 1 else replicate(args.replicate, tmp / "payload.jsonl")
+        start = time.perf_counter()
+        counts = convert_payload(iter_payload(source), tmp / "store")
+        print(json.dumps({
+            **counts,
+            "convert_s": round(time.perf_counter() - start, 3),
+            "store_mb": round(sum(p.stat().st_size for p in (tmp / "store").iterdir()) / 2**20, 1),
+            "store": in_child(bench_store, tmp / "store", args.lookups, args.seed),
+            "pandas": in_child(bench_pandas, source, args.lookups, args.seed),
+        }))
+
+
+if __name__ == "__main__":
+    main()
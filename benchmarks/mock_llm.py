@@ -0,0 +1,143 @@
+"""
+Mock LLM
+
+An offline stand-in for Gemini used by the benchmarks. It simulates
+generation latency (time to first token + per output token), returns text
+or schema-valid JSON for agents with an ``output_schema`` and reports usage
+metadata, so agent orchestration can be measured without network or quota.
+"""
+
+import asyncio
+import json
+import random
+import typing
+from typing import Any, AsyncGenerator, Callable, Dict, Optional
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+from pydantic import BaseModel
+
+import bench_utils  # noqa: F401  (puts team/ on sys.path)
+from common.compaction import estimate_tokens
+
+# --- Constants ---
+# Roughly gemini-2.0-flash: ~0.4s to first token, ~150 output tokens/s.
+DEFAULT_TTFT_S = 0.4
+DEFAULT_SECONDS_PER_TOKEN = 1 / 150
+DEFAULT_OUTPUT_TOKENS = 200
+LEVELS = ("low", "medium", "high")
+
+
+def _fake_value(annotation: Any, field_name: str, level: str) -> Any:
+    origin = typing.get_origin(annotation)
+    if origin is typing.Literal:
+        options = typing.get_args(annotation)
+        return level if level in options else options[0]
+    if origin in (list, typing.List):
+        return []
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return fake_output(annotation, level)
+    if annotation is int:
+        return 0
+    if annotation is float:
+        return 0.0
+    if annotation is bool:
+        return False
+    if "level" in field_name or "criticality" in field_name or field_name == "severity":
+        return level
+    return f"Mock {field_name.replace('_', ' ')}."
+
+
+def fake_output(schema: type, level: str = "low") -> Dict[str, Any]:
+    """Build a dict that validates against a pydantic output schema."""
+    return {
+        name: _fake_value(field.annotation, name, level)
+        for name, field in schema.model_fields.items()
+    }
+
+
+class MockLlm(BaseLlm):
+    """BaseLlm implementation with simulated latency and deterministic output."""
+
+    model: str = "mock-llm"
+    ttft_s: float = DEFAULT_TTFT_S
+    seconds_per_token: float = DEFAULT_SECONDS_PER_TOKEN
+    output_tokens: int = DEFAULT_OUTPUT_TOKENS
+    level: str = "low"
+    """Criticality level reported by the mock ('low', 'medium', 'high' or 'random')."""
+    level_weights: Optional[Dict[str, float]] = None
+    """Sampling weights per level, used when level is 'random' (uniform if unset)."""
+    low_confidence_rate: float = 0.0
+    """Probability of reporting 'Confidence: low'."""
+    time_scale: float = 1.0
+    """Multiplier applied to every simulated delay (e.g. 0.1 for quick runs)."""
+    seed: Optional[int] = None
+
+    # Counters, updated on every call.
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    def _level(self, rng: random.Random) -> str:
+        if self.level != "random":
+            return self.level
+        weights = self.level_weights or {}
+        return rng.choices(LEVELS, weights=[weights.get(lv, 1.0) for lv in LEVELS])[0]
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        rng = random.Random(None if self.seed is None else self.seed + self.calls)
+        level = self._level(rng)
+        confidence = "low" if rng.random() < self.low_confidence_rate else "high"
+
+        await asyncio.sleep(
+            (self.ttft_s + self.output_tokens * self.seconds_per_token) * self.time_scale
+        )
+
+        schema = llm_request.config.response_schema if llm_request.config else None
+        # Agents with tools and an output_schema answer through set_model_response.
+        response_tool = llm_request.tools_dict.get("set_model_response")
+        if response_tool is not None:
+            text = None
+        elif isinstance(schema, type) and issubclass(schema, BaseModel):
+            text = json.dumps(fake_output(schema, level))
+        else:
+            filler = " ".join(["analysis"] * max(0, self.output_tokens - 8))
+            text = f"{filler}\nLevel: {level.upper()}\nConfidence: {confidence}".strip()
+
+        prompt = "\n".join(
+            part.text
+            for content in llm_request.contents
+            for part in (content.parts or [])
+            if part.text
+        )
+        if llm_request.config and llm_request.config.system_instruction:
+            prompt = f"{llm_request.config.system_instruction}\n{prompt}"
+        self.prompt_tokens += estimate_tokens(prompt)
+        self.completion_tokens += self.output_tokens
+
+        if text is None:
+            part = types.Part(function_call=types.FunctionCall(
+                name="set_model_response", args=fake_output(response_tool.output_schema, level)))
+        else:
+            part = types.Part(text=text)
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=estimate_tokens(prompt),
+                candidates_token_count=self.output_tokens,
+                total_token_count=estimate_tokens(prompt) + self.output_tokens,
+            ),
+        )
+
+
+def use_mock_models(agent: BaseAgent, factory: Callable[[LlmAgent], BaseLlm]) -> BaseAgent:
+    """Replace the model of every LlmAgent in an agent tree (in place)."""
+    if isinstance(agent, LlmAgent):
+        agent.model = factory(agent)
+    for sub_agent in agent.sub_agents:
+        use_mock_models(sub_agent, factory)
+    return agent
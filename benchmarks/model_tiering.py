@@ -0,0 +1,148 @@
+"""
+Model Tiering Benchmark
+
+Throughput, latency and cost of the parallel analyzer with the specialist
+agents (drug, dose, route) on fixed models versus the fast -> strong cascade
+(team/common/models.py), using the mock LLM on the fake MIMIC set.
+
+Latency and price profiles below are illustrative (public list prices in
+USD per 1M tokens); edit PROFILES to match your contract and region.
+
+For the cascade, ``reported_*`` are the same figures from the runs' usage
+accounting (adk_service/usage.py); they match the mocks' counts only if
+escalated calls report the fast call as well as the strong one.
+
+Usage:
+    python benchmarks/model_tiering.py --records 50 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+from bench_utils import ROOT, build_agent_input, load_records, percentile, run_once
+from mock_llm import MockLlm, use_mock_models
+
+from google.adk.runners import InMemoryRunner
+
+from common.models import CascadeLlm
+from parallel_analyzer_agent.agent import root_agent
+
+sys.path.insert(0, str(ROOT))
+
+from adk_service.usage import summarize_events  # noqa: E402
+
+# --- Constants ---
+PROFILES = {
+    "gemini-2.0-flash-lite": {"ttft_s": 0.3, "tokens_per_s": 200, "input_usd": 0.075, "output_usd": 0.30},
+    "gemini-2.0-flash": {"ttft_s": 0.4, "tokens_per_s": 150, "input_usd": 0.10, "output_usd": 0.40},
+    "gemini-2.5-flash": {"ttft_s": 0.8, "tokens_per_s": 120, "input_usd": 0.30, "output_usd": 2.50},
+}
+SPECIALISTS = ("drug_analysis_agent", "dose_drug_analysis_agent", "route_drug_analysis_agent")
+SPECIALIST_OUTPUT_TOKENS = 80
+SYNTHESIZER_OUTPUT_TOKENS = 150
+SYNTHESIZER_MODEL = "gemini-2.0-flash"
+
+
+def scenario_factory(scenario: str, args, mocks: list):
+    def mock(model: str, output_tokens: int) -> MockLlm:
+        profile = PROFILES[model]
+        llm = MockLlm(
+            model=model,
+            ttft_s=profile["ttft_s"],
+            seconds_per_token=1 / profile["tokens_per_s"],
+            output_tokens=output_tokens,
+            level="random",
+            level_weights={"low": 1 - args.flag_rate, "medium": args.flag_rate / 2, "high": args.flag_rate / 2},
+            low_confidence_rate=args.low_confidence_rate,
+            time_scale=args.time_scale,
+            seed=args.seed + len(mocks),
+        )
+        mocks.append(llm)
+        return llm
+
+    def factory(agent):
+        if agent.name not in SPECIALISTS:
+            return mock(SYNTHESIZER_MODEL, SYNTHESIZER_OUTPUT_TOKENS)
+        if scenario == "cascade":
+            return CascadeLlm(
+                model=f"cascade:{agent.name}",
+                fast=mock(args.fast_model, SPECIALIST_OUTPUT_TOKENS),
+                strong=mock(args.strong_model, SPECIALIST_OUTPUT_TOKENS),
+            )
+        return mock(scenario, SPECIALIST_OUTPUT_TOKENS)
+
+    return factory
+
+
+def cost_usd(mocks: list) -> float:
+    return sum(
+        m.prompt_tokens / 1e6 * PROFILES[m.model]["input_usd"]
+        + m.completion_tokens / 1e6 * PROFILES[m.model]["output_usd"]
+        for m in mocks
+    )
+
+
+async def bench(scenario: str, prompts: list, args) -> dict:
+    mocks: list = []
+    agent = use_mock_models(root_agent.clone(), scenario_factory(scenario, args, mocks))
+    runner = InMemoryRunner(agent=agent, app_name="parallel_analyzer_agent")
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(prompt):
+        async with semaphore:
+            return await run_once(runner, prompt)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(p) for p in prompts))
+    elapsed = (time.perf_counter() - start) / args.time_scale
+    latencies = [r["seconds"] / args.time_scale for r in results]
+
+    escalations = [
+        e.custom_metadata["cascade_escalated"]
+        for r in results for e in r["events"]
+        if e.custom_metadata and "cascade_escalated" in e.custom_metadata
+    ]
+    result = {
+        "scenario": scenario,
+        "records": len(prompts),
+        "throughput_rps": round(len(prompts) / elapsed, 3),
+        "mean_s": round(statistics.mean(latencies), 2),
+        "p95_s": round(percentile(latencies, 95), 2),
+        "llm_calls_per_record": round(sum(m.calls for m in mocks) / len(prompts), 2),
+        "usd_per_1k_records": round(1000 * cost_usd(mocks) / len(prompts), 4),
+        "escalation_rate": round(sum(escalations) / len(escalations), 3) if escalations else None,
+    }
+    if scenario == "cascade":
+        # Events carry no modelVersion here: the synthesizer is priced as USAGE_DEFAULT_MODEL
+        # (SYNTHESIZER_MODEL) and the specialists by their cascade_model / cascade_fast_model.
+        usage = [summarize_events([e.model_dump(mode="json", by_alias=True, exclude_none=True)
+                                   for e in r["events"]]) for r in results]
+        result["reported_llm_calls_per_record"] = round(sum(u["llm_calls"] for u in usage) / len(prompts), 2)
+        result["reported_usd_per_1k_records"] = round(1000 * sum(u["cost_usd"] for u in usage) / len(prompts), 4)
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Fixed-model vs cascade throughput and cost.")
+    parser.add_argument("--records", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--time-scale", type=float, default=0.05)
+    parser.add_argument("--fast-model", default="gemini-2.0-flash-lite")
+    parser.add_argument("--strong-model", default="gemini-2.5-flash")
+    parser.add_argument("--flag-rate", type=float, default=0.15,
+                        help="Probability that the fast model reports MEDIUM/HIGH.")
+    parser.add_argument("--low-confidence-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    prompts = [build_agent_input(r) for r in load_records(limit=args.records)]
+    for scenario in (args.fast_model, "gemini-2.0-flash", args.strong_model, "cascade"):
+        print(json.dumps(await bench(scenario, prompts, args)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Sequential Pipeline Latency Benchmark
+
+Compares end-to-end latency of the sequential analyzer in ``strict`` and
+``pipelined`` mode (team/sequential_analyzer_agent) against the mock LLM.
+
+Each agent gets a simulated output length (tokens); generation latency is
+time-to-first-token + tokens / throughput. In pipelined mode the treatment
+assessment reuses the duration/monitoring estimates produced concurrently by
+treatment_planning_agent, so its own output shrinks by ``--planning-share``.
+
+Usage:
+    python benchmarks/pipeline_latency.py --records 20 --time-scale 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+
+from bench_utils import build_agent_input, load_records, percentile, run_once
+from mock_llm import MockLlm, use_mock_models
+
+from google.adk.runners import InMemoryRunner
+
+from sequential_analyzer_agent.agent import build_pipeline
+
+# Output tokens per agent in strict mode.
+OUTPUT_TOKENS = {
+    "general_health_agent": 700,
+    "treatment_assessment_agent": 800,
+    "treatment_planning_agent": 350,
+    "synthesizer_health_report_agent": 300,
+}
+
+
+async def bench_mode(mode: str, prompts: list, args) -> dict:
+    def factory(agent):
+        tokens = OUTPUT_TOKENS[agent.name]
+        if mode == "pipelined" and agent.name == "treatment_assessment_agent":
+            tokens = int(tokens * (1 - args.planning_share))
+        return MockLlm(output_tokens=tokens, time_scale=args.time_scale)
+
+    agent = use_mock_models(build_pipeline(mode), factory)
+    runner = InMemoryRunner(agent=agent, app_name="sequential_analyzer_agent")
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(prompt):
+        async with semaphore:
+            return await run_once(runner, prompt)
+
+    results = await asyncio.gather(*(one(p) for p in prompts))
+    # Report latencies in simulated (unscaled) seconds.
+    latencies = [r["seconds"] / args.time_scale for r in results]
+    output_tokens = [
+        sum(e.usage_metadata.candidates_token_count for e in r["events"] if e.usage_metadata)
+        for r in results
+    ]
+    assert all("synthesized_health_report" in r["state"] for r in results)
+    return {
+        "mode": mode,
+        "records": len(prompts),
+        "mean_s": round(statistics.mean(latencies), 2),
+        "p50_s": round(percentile(latencies, 50), 2),
+        "p95_s": round(percentile(latencies, 95), 2),
+        "output_tokens_per_record": statistics.mean(output_tokens),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Sequential analyzer strict vs pipelined latency.")
+    parser.add_argument("--records", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--time-scale", type=float, default=0.1,
+                        help="Scale simulated delays to speed the run up (results are unscaled).")
+    parser.add_argument("--planning-share", type=float, default=0.4,
+                        help="Share of the treatment assessment output moved to the planning agent.")
+    args = parser.parse_args()
+
+    prompts = [build_agent_input(r) for r in load_records(limit=args.records)]
+    baseline = None
+    for mode in ("strict", "pipelined"):
+        report = await bench_mode(mode, prompts, args)
+        baseline = baseline or report["mean_s"]
+        report["speedup_vs_strict"] = round(baseline / report["mean_s"], 2)
+        print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,163 @@
+"""
+Priority Scheduling Benchmark
+
+Interactive latency while a screening batch runs through the same ADK
+server, with and without the priority scheduler (adk_service/scheduler.py).
+The ADK server is the emulator (adk_emulator.py) with a concurrency cap of
+--slots runs that queues the rest in arrival order, standing in for the
+model quota every run shares. Clients call it through
+``adk_service.run_agent_async``:
+
+- batch: --batch parallel_analyzer_agent runs, --batch-concurrency at a
+  time, priority "batch";
+- interactive: simple_prescription_agent runs arriving at random
+  (Poisson, --interactive-rate per second) while the batch lasts, priority
+  "interactive".
+
+Modes:
+- alone: the interactive stream without the batch (the latency to keep);
+- none: no scheduler, every run queues at the cap (the previous behaviour);
+- weights: scheduler on --slots slots, weights only (interactive=8, batch=3);
+- priority: weights plus a reservation of --reserved slots for interactive
+  runs (SCHEDULER_CLASSES default).
+
+Usage:
+    python benchmarks/priority_scheduling.py --batch 1000 --batch-concurrency 64 --slots 16 --time-scale 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+
+from adk_emulator import Emulator, create_app
+from bench_utils import ROOT, build_agent_input, load_records, percentile
+
+sys.path.insert(0, str(ROOT))
+# One executor thread per run in flight (client.run_agent_async).
+os.environ.setdefault("ADK_HTTP_POOL_SIZE", "256")
+
+from adk_service import client, scheduler  # noqa: E402
+
+# --- Constants ---
+BATCH_AGENT = "parallel_analyzer_agent"
+INTERACTIVE_AGENT = "simple_prescription_agent"
+
+
+def serve(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def classes_for(mode: str, args) -> Optional[Dict[str, Any]]:
+    if mode == "weights":
+        return {"interactive": (8.0, 0), "batch": (3.0, 0)}
+    if mode == "priority":
+        return {"interactive": (8.0, args.reserved), "batch": (3.0, 0)}
+    return None
+
+
+async def call(agent: str, text: str, priority: str) -> float:
+    started = time.perf_counter()
+    await client.run_agent_async(agent, text, user_id="bench", priority=priority)
+    return time.perf_counter() - started
+
+
+async def bench(mode: str, inputs: List[str], args) -> Dict[str, Any]:
+    emulator = Emulator(max_concurrency=args.slots, time_scale=args.time_scale, seed=args.seed)
+    app = create_app(emulator)
+    classes = classes_for(mode, args)
+    if classes is not None:
+        scheduler.install(app, args.slots, classes)
+    port = args.port + ("alone", "none", "weights", "priority").index(mode)
+    server = serve(app, port)
+    client.backends.set_urls([f"http://127.0.0.1:{port}"])
+
+    rng = random.Random(args.seed)
+    batch_done = asyncio.Event()
+    batch_seconds: List[float] = []
+    interactive_seconds: List[float] = []
+
+    async def batch_worker(queue: asyncio.Queue):
+        while not queue.empty():
+            text = queue.get_nowait()
+            batch_seconds.append(await call(BATCH_AGENT, text, "batch"))
+
+    async def run_batch():
+        queue: asyncio.Queue = asyncio.Queue()
+        for i in range(args.batch):
+            queue.put_nowait(inputs[i % len(inputs)])
+        await asyncio.gather(*(batch_worker(queue) for _ in range(args.batch_concurrency)))
+        batch_done.set()
+
+    async def interactive(text: str):
+        interactive_seconds.append(await call(INTERACTIVE_AGENT, text, "interactive"))
+
+    async def run_interactive(until_batch_done: bool):
+        tasks = []
+        for i in range(args.interactive):
+            if until_batch_done and batch_done.is_set():
+                break
+            await asyncio.sleep(rng.expovariate(args.interactive_rate) * args.time_scale)
+            tasks.append(asyncio.create_task(interactive(inputs[i % len(inputs)])))
+        await asyncio.gather(*tasks)
+
+    started = time.perf_counter()
+    if mode == "alone":
+        await run_interactive(until_batch_done=False)
+    else:
+        await asyncio.gather(run_batch(), run_interactive(until_batch_done=True))
+    elapsed = time.perf_counter() - started
+    server.should_exit = True
+
+    unscale = 1 / args.time_scale
+    result = {
+        "mode": mode,
+        "interactive_runs": len(interactive_seconds),
+        "interactive_p50_s": round(percentile(interactive_seconds, 50) * unscale, 2),
+        "interactive_p95_s": round(percentile(interactive_seconds, 95) * unscale, 2),
+        "interactive_max_s": round(max(interactive_seconds) * unscale, 2),
+    }
+    if mode != "alone":
+        result.update({
+            "batch_runs": len(batch_seconds),
+            "batch_runs_per_min": round(len(batch_seconds) / (elapsed * unscale) * 60, 1),
+            "batch_p50_s": round(percentile(batch_seconds, 50) * unscale, 2),
+        })
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Interactive latency beside a batch, with and without priorities.")
+    parser.add_argument("--batch", type=int, default=1000, help="Batch runs (admissions screened).")
+    parser.add_argument("--batch-concurrency", type=int, default=64)
+    parser.add_argument("--interactive", type=int, default=200, help="Most interactive requests per mode.")
+    parser.add_argument("--interactive-rate", type=float, default=0.5, help="Interactive requests per second.")
+    parser.add_argument("--slots", type=int, default=16, help="Concurrent runs the server (quota) sustains.")
+    parser.add_argument("--reserved", type=int, default=2, help="Slots reserved for interactive runs.")
+    parser.add_argument("--time-scale", type=float, default=0.1,
+                        help="Scale simulated delays to speed the run up (results are unscaled).")
+    parser.add_argument("--port", type=int, default=8795)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    inputs = [build_agent_input(record) for record in load_records(limit=20)]
+    client.session_pool.size = 0
+    # Client-side bulkheads would cap the runs this measures on the server.
+    client.bulkheads.enabled = False
+    for mode in ("alone", "none", "weights", "priority"):
+        print(json.dumps(await bench(mode, inputs, args)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+Admission Rendering Benchmark
+
+Renders a seeded sample of admissions (with repeats, as when the same
+patients are re-analyzed) four ways: the uncached ``format_admission_info``,
+the memoized ``AdmissionRenderer``, and the compact variant both as
+``compact_admission(format_admission_info(...))`` (what the agents'
+before-model callback does) and as the renderer's direct ``compact=True``.
+Reports microseconds per render, the cache hit rate and the estimated tokens
+of both variants, and checks that both compact paths give the same text: on
+the payload (which has no prescription forms) and on a copy where every
+other prescription has one.
+
+Usage:
+    python benchmarks/render_cache.py --renders 20000
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from bench_utils import ROOT
+
+sys.path.insert(0, str(ROOT))
+
+from common.compaction import compact_admission  # noqa: E402
+from mimic_data import AdmissionRenderer, format_admission_info, format_compact, open_store  # noqa: E402
+
+
+def per_render_us(func, admissions) -> float:
+    start = time.perf_counter()
+    for admission in admissions:
+        func(admission)
+    return round((time.perf_counter() - start) / len(admissions) * 1e6, 2)
+
+
+def compact_mismatches(admissions) -> int:
+    return sum(format_compact(a) != compact_admission(format_admission_info(a)) for a in admissions)
+
+
+def with_forms(admission):
+    prescriptions = [dict(p, form="TAB") if i % 2 else p for i, p in enumerate(admission["prescricoes"])]
+    return dict(admission, prescricoes=prescriptions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uncached vs memoized admission rendering.")
+    parser.add_argument("--renders", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = open_store(tmp, source=ROOT / "data" / "payload_mimic3.json")
+        pool = list(store.iter_admissions())
+    rng = random.Random(args.seed)
+    admissions = [dict(rng.choice(pool), subject_id=i) for i in range(args.renders)]
+
+    full, compact = AdmissionRenderer(), AdmissionRenderer()
+    print(json.dumps({
+        "renders": args.renders,
+        "distinct_admissions": len(pool),
+        "format_admission_info_us": per_render_us(format_admission_info, admissions),
+        "renderer_us": per_render_us(full.render, admissions),
+        "compact_admission_us": per_render_us(lambda a: compact_admission(format_admission_info(a)), admissions),
+        "renderer_compact_us": per_render_us(lambda a: compact.render(a, compact=True), admissions),
+        "hit_rate": full.report()["hit_rate"],
+        "tokens_mean": round(statistics.mean(full.render(a).tokens for a in pool)),
+        "compact_tokens_mean": round(statistics.mean(compact.render(a, compact=True).tokens for a in pool)),
+        "compact_mismatches": compact_mismatches(pool),
+        "compact_mismatches_with_forms": compact_mismatches([with_forms(a) for a in pool]),
+    }))
+
+
+if __name__ == "__main__":
+    main()
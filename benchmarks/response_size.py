@@ -0,0 +1,135 @@
+"""
+Response Size Benchmark
+
+Size and serialization time of api-server's AnalysisResponse for the real
+agent states captured in notebooks/simple-run-agent-team.ipynb (Gemini
+outputs, including the free-text reports of the sequential pipeline), with a
+usage block of the agent's shape.
+
+For every agent it compares the previous response (full state, including
+the ``state``/``user_id``/``session_id`` keys the old create-session body
+leaked into it, rendered by JSONResponse) with the ``full``, ``final`` and
+``verdict`` views rendered by ORJSONResponse, plus their gzip size. Times
+are FastAPI's response_model serialization plus rendering, in microseconds.
+
+Usage:
+    python benchmarks/response_size.py --repeat 2000
+"""
+
+import argparse
+import ast
+import gzip
+import json
+import sys
+import time
+from typing import Any, Dict, List
+
+from bench_utils import ROOT
+
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "api-server"))
+
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+
+from adk_service import VIEWS, project, project_usage, summarize_events  # noqa: E402
+from adk_service.projection import FINAL_OUTPUT_KEYS  # noqa: E402
+import main as api  # noqa: E402
+
+# --- Constants ---
+NOTEBOOK = ROOT / "notebooks" / "simple-run-agent-team.ipynb"
+LEGACY_KEYS = ("state", "user_id", "session_id")
+SUB_AGENTS = {
+    "simple_prescription_agent": [None],
+    "parallel_analyzer_agent": ["individual_drug_analyzer.drug_analysis_agent",
+                                "individual_drug_analyzer.dose_drug_analysis_agent",
+                                "individual_drug_analyzer.route_drug_analysis_agent", None],
+    "sequential_analyzer_agent": [None, None, None],
+}
+
+
+def load_states() -> Dict[str, Dict[str, Any]]:
+    """First captured state of each agent, keyed by agent name."""
+    notebook = json.loads(NOTEBOOK.read_text(encoding="utf-8"))
+    states: Dict[str, Dict[str, Any]] = {}
+    for cell in notebook["cells"]:
+        for output in cell.get("outputs", []):
+            text = "".join(output.get("data", {}).get("text/plain", []) or output.get("text", []))
+            try:
+                state = ast.literal_eval(text)
+            except (ValueError, SyntaxError):
+                continue
+            if not isinstance(state, dict):
+                continue
+            for agent, key in FINAL_OUTPUT_KEYS.items():
+                if key in state and agent in SUB_AGENTS:
+                    states.setdefault(agent, state)
+    return states
+
+
+def usage_for(agent: str) -> Dict[str, Any]:
+    events = [{"author": "user", "timestamp": 0.0}]
+    for i, branch in enumerate(SUB_AGENTS[agent]):
+        events.append({
+            "author": f"{agent}_{i}", "branch": branch, "timestamp": 0.5 * i,
+            "usageMetadata": {"promptTokenCount": 1200, "candidatesTokenCount": 300},
+        })
+    usage = summarize_events(events, run_ms=4000.0)
+    return {"agent": agent, **usage,
+            "stages_ms": {"create_session": 4.0, "run": 4000.0, "get_session": 5.0, "delete_session": 4.0,
+                          "total": 4013.0}}
+
+
+def run_sync(coroutine):
+    """Result of a coroutine that never suspends, without event loop overhead."""
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("coroutine suspended")
+
+
+def measure(field, response: api.AnalysisResponse, response_class, repeat: int) -> Dict[str, Any]:
+    async def render():
+        content = await serialize_response(field=field, response_content=response, is_coroutine=True)
+        return response_class(content).body
+
+    body = run_sync(render())
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run_sync(render())
+    serialize_us = (time.perf_counter() - start) / repeat * 1e6
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        compressed = gzip.compress(body, compresslevel=api.GZIP_LEVEL)
+    gzip_us = (time.perf_counter() - start) / repeat * 1e6
+    return {"bytes": len(body), "gzip_bytes": len(compressed),
+            "serialize_us": round(serialize_us, 1), "gzip_us": round(gzip_us, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AnalysisResponse size and serialization time per view.")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    field = next(r for r in api.app.routes if getattr(r, "path", "") == "/analyze/parallel").response_field
+    rows: List[Dict[str, Any]] = []
+    for agent, legacy_state in load_states().items():
+        state = {k: v for k, v in legacy_state.items() if k not in LEGACY_KEYS}
+        usage = usage_for(agent)
+        legacy = api.AnalysisResponse(status="success", data=legacy_state, usage=usage, message="ok")
+        rows.append({"agent": agent, "response": "before (JSONResponse)",
+                     **measure(field, legacy, JSONResponse, args.repeat)})
+        for view in VIEWS:
+            response = api.AnalysisResponse(status="success", data=project(state, agent, view),
+                                             usage=project_usage(usage, view), message="ok")
+            rows.append({"agent": agent, "response": f"{view} (ORJSONResponse)",
+                         **measure(field, response, ORJSONResponse, args.repeat)})
+
+    for row in rows:
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Agent Benchmark Suite
+
+Replays a sample of the fake MIMIC admissions
+(data/inputs_to_agent_fake_mimic3.json) through the simple, parallel and
+sequential agents at one or more concurrency levels and reports, per agent
+and concurrency:
+
+    - throughput and p50/p95/p99 latency,
+    - LLM calls and prompt/output tokens per record (from usage metadata),
+    - detection precision and recall, overall and per ``poison_choice``.
+
+A record counts as flagged when any criticality level in the agent's output
+reaches ``--threshold``. Per-choice precision is computed over that choice's
+poisoned records plus all clean records, since a false positive cannot be
+attributed to a poison type.
+
+By default every model is replaced by the mock LLM, so the suite runs
+offline and catches orchestration regressions; detection scores then only
+reflect the mock's ``--flag-rate``. Use ``--live`` to call the configured
+models (or ``--live`` with LLM_CACHE_MODE=replay to replay recorded answers).
+
+Usage:
+    python benchmarks/run_suite.py --records 100 --concurrency 1,8,32
+    python benchmarks/run_suite.py --agents parallel --records 50 --live --concurrency 4
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import random
+import statistics
+import time
+from collections import Counter
+from typing import Any, Dict, List
+
+from bench_utils import DEFAULT_DATASET, build_agent_input, load_records, percentile, run_once
+from mock_llm import MockLlm, use_mock_models
+
+from google.adk.runners import InMemoryRunner
+
+# --- Constants ---
+# Short name -> (app name, state key holding the final assessment).
+AGENTS = {
+    "simple": ("simple_prescription_agent", "results_criticality"),
+    "parallel": ("parallel_analyzer_agent", "synthesized_results_criticality"),
+    "sequential": ("sequential_analyzer_agent", "synthesized_health_report"),
+}
+LEVELS = ["low", "medium", "high"]
+POISON_CHOICES = ["drug", "drug_type", "dose_val", "dose_unit", "route"]
+
+
+def sample_records(args) -> List[Dict[str, Any]]:
+    records = load_records(args.dataset)
+    if args.records and args.records < len(records):
+        records = random.Random(args.seed).sample(records, args.records)
+    return records
+
+
+def output_levels(output: Any) -> List[str]:
+    """Criticality levels ("low", "medium", "high") found in an agent's output."""
+    if isinstance(output, str):
+        try:
+            output = json.loads(output)
+        except json.JSONDecodeError:
+            return []
+    if not isinstance(output, dict):
+        return []
+    return [
+        str(value).strip().lower()
+        for key, value in output.items()
+        if ("level" in key or "criticality" in key) and str(value).strip().lower() in LEVELS
+    ]
+
+
+def is_flagged(output: Any, threshold: str) -> bool:
+    return any(LEVELS.index(level) >= LEVELS.index(threshold) for level in output_levels(output))
+
+
+def precision_recall(tp: int, fp: int, fn: int) -> Dict[str, Any]:
+    return {
+        "precision": round(tp / (tp + fp), 3) if tp + fp else None,
+        "recall": round(tp / (tp + fn), 3) if tp + fn else None,
+        "tp": tp,
+        "fp": fp,
+        "fn": fn,
+    }
+
+
+def detection_report(records: List[Dict[str, Any]], flagged: List[bool]) -> Dict[str, Any]:
+    fp = sum(f and not r["is_poisoned"] for r, f in zip(records, flagged))
+    report = {"overall": precision_recall(
+        tp=sum(f and r["is_poisoned"] for r, f in zip(records, flagged)),
+        fp=fp,
+        fn=sum(not f and r["is_poisoned"] for r, f in zip(records, flagged)),
+    )}
+    for choice in POISON_CHOICES:
+        subset = [f for r, f in zip(records, flagged) if r["poison_choice"] == choice]
+        if subset:
+            report[choice] = precision_recall(tp=sum(subset), fp=fp, fn=len(subset) - sum(subset))
+    return report
+
+
+def build_agent(name: str, args):
+    app_name, _ = AGENTS[name]
+    agent = importlib.import_module(f"{app_name}.agent").root_agent.clone()
+    if not args.live:
+        counter = iter(range(10**6))
+        use_mock_models(agent, lambda llm_agent: MockLlm(
+            level="random",
+            level_weights={"low": 1 - args.flag_rate, "medium": args.flag_rate / 2, "high": args.flag_rate / 2},
+            output_tokens=args.output_tokens,
+            time_scale=args.time_scale,
+            seed=args.seed + next(counter),
+        ))
+    return InMemoryRunner(agent=agent, app_name=app_name)
+
+
+async def bench(name: str, concurrency: int, records: List[Dict[str, Any]], args) -> Dict[str, Any]:
+    runner = build_agent(name, args)
+    _, output_key = AGENTS[name]
+    semaphore = asyncio.Semaphore(concurrency)
+    time_scale = 1.0 if args.live else args.time_scale
+
+    async def one(record):
+        async with semaphore:
+            try:
+                return await run_once(runner, build_agent_input(record))
+            except Exception as e:
+                return {"error": f"{type(e).__name__}: {e}"}
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(r) for r in records))
+    elapsed = (time.perf_counter() - start) / time_scale
+
+    ok = [r for r in results if "error" not in r]
+    latencies = [r["seconds"] / time_scale for r in ok]
+    usage = [e.usage_metadata for r in ok for e in r["events"] if e.usage_metadata]
+    flagged = [
+        "error" not in r and is_flagged(r["state"].get(output_key), args.threshold)
+        for r in results
+    ]
+    errors = Counter(r["error"].split(":")[0] for r in results if "error" in r)
+    return {
+        "agent": name,
+        "concurrency": concurrency,
+        "records": len(records),
+        "errors": dict(errors),
+        "throughput_rps": round(len(records) / elapsed, 3),
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "p99_s": round(percentile(latencies, 99), 3),
+        "mean_s": round(statistics.mean(latencies), 3) if latencies else None,
+        "llm_calls_per_record": round(len(usage) / len(records), 2),
+        "prompt_tokens_per_record": round(sum(u.prompt_token_count or 0 for u in usage) / len(records), 1),
+        "output_tokens_per_record": round(sum(u.candidates_token_count or 0 for u in usage) / len(records), 1),
+        "detection": detection_report(records, flagged),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Throughput, latency, token and detection benchmark suite.")
+    parser.add_argument("--agents", default="simple,parallel,sequential",
+                        help=f"Comma-separated subset of {list(AGENTS)}.")
+    parser.add_argument("--records", type=int, default=100, help="Sample size (0 = whole dataset).")
+    parser.add_argument("--concurrency", default="1,8", help="Comma-separated concurrency levels.")
+    parser.add_argument("--dataset", default=str(DEFAULT_DATASET),
+                        help="Fake admissions JSON, JSONL or generated part-*.jsonl directory.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--threshold", choices=LEVELS[1:], default="medium",
+                        help="Lowest criticality level counted as a detection.")
+    parser.add_argument("--live", action="store_true", help="Use the configured models instead of the mock.")
+    parser.add_argument("--time-scale", type=float, default=0.25,
+                        help="Mock only: delay multiplier (small values let CPU overhead dominate).")
+    parser.add_argument("--output-tokens", type=int, default=200, help="Mock only: output tokens per call.")
+    parser.add_argument("--flag-rate", type=float, default=0.15,
+                        help="Mock only: probability of a MEDIUM/HIGH answer.")
+    parser.add_argument("--output", help="Also write all results to this JSON file.")
+    args = parser.parse_args()
+
+    records = sample_records(args)
+    results = []
+    for name in args.agents.split(","):
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            result = await bench(name.strip(), concurrency, records, args)
+            results.append(result)
+            print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,146 @@
+"""
+Structured-Output Repair Benchmark
+
+Runs the SUS compliance agent (compliance_agents/sus) on a mock LLM that
+returns a valid SusComplianceResponse with a common deviation applied
+(enum spelling, prose or code fences around the JSON, truncation, missing
+or mistyped lists, or no JSON at all). The last corruptions cannot be
+repaired without changing the report (an issue without its risk level, an
+enum value of unclear meaning) and must keep failing. Each corruption is run with and
+without the repair callback (compliance_agents/schema_repair.py). A run
+succeeds when the agent's final response validates against the schema, which
+is what the A2A caller needs; every run that only succeeds with repair is a
+model retry saved.
+
+Usage:
+    python benchmarks/schema_repair.py --runs 20
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from typing import AsyncGenerator
+
+from bench_utils import ROOT, build_agent_input, load_records, run_once
+from mock_llm import MockLlm
+
+sys.path.insert(0, str(ROOT))
+
+from google.adk.models import LlmRequest, LlmResponse  # noqa: E402
+from google.adk.runners import InMemoryRunner  # noqa: E402
+from google.genai import types  # noqa: E402
+from pydantic import ValidationError  # noqa: E402
+
+from compliance_agents import schema_repair  # noqa: E402
+from compliance_agents.sus.agent import SusComplianceResponse, root_agent  # noqa: E402
+
+VALID = {
+    "system": "SUS",
+    "overall_compliance": "review_required",
+    "severity": "medium",
+    "issues": [
+        {"category": "drug_interaction", "description": "Warfarin with amiodarone raises INR.",
+         "sus_reference": "general SUS-aligned safety practice", "risk_level": "high"},
+        {"category": "monitoring", "description": "No renal function follow-up for vancomycin.",
+         "sus_reference": "PCDT", "risk_level": "medium"},
+    ],
+    "recommendations": ["Monitor INR within 72h.", "Order serum creatinine and vancomycin trough."],
+    "notes_for_pharmacist": "Review anticoagulation and renal monitoring before dispensing.",
+}
+
+
+def _dumps(data) -> str:
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _with(**changes) -> dict:
+    return {**VALID, **changes}
+
+
+CORRUPTIONS = {
+    "valid": lambda: _dumps(VALID),
+    "enum_spelling": lambda: _dumps(_with(
+        severity="Moderate",
+        issues=[{**VALID["issues"][0], "category": "Drug-Drug Interaction", "risk_level": "HIGH"},
+                {**VALID["issues"][1], "category": "monitorization", "risk_level": "moderate"}],
+    )),
+    "prose_and_fence": lambda: f"Here is the SUS compliance analysis:\n```json\n{_dumps(VALID)}\n```\nLet me know if you need more.",
+    "truncated": lambda: _dumps(VALID)[:int(len(_dumps(VALID)) * 0.7)],
+    "missing_lists": lambda: _dumps({k: v for k, v in VALID.items() if k != "recommendations"} | {"issues": None}),
+    "mistyped_fields": lambda: _dumps(_with(recommendations="Monitor INR within 72h.",
+                                            notes_for_pharmacist=["Review anticoagulation.", "Check renal function."])),
+    "no_json": lambda: "The prescription requires review of anticoagulation and renal monitoring.",
+    # Not repairable without changing the report: must still fail validation.
+    "issue_without_risk": lambda: _dumps(_with(
+        issues=[VALID["issues"][0], {k: v for k, v in VALID["issues"][1].items() if k != "risk_level"}],
+    )),
+    "ambiguous_enum": lambda: _dumps(_with(
+        issues=[{**VALID["issues"][0], "risk_level": "not high"}, {**VALID["issues"][1], "category": "allergy"}],
+    )),
+}
+
+
+class CorruptedMockLlm(MockLlm):
+    """Mock LLM that always returns the given text."""
+
+    text: str = ""
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        await asyncio.sleep((self.ttft_s + self.output_tokens * self.seconds_per_token) * self.time_scale)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=self.text)]))
+
+
+async def run_corruption(name: str, repair: bool, prompts: list, args) -> dict:
+    agent = root_agent.clone(update={
+        "model": CorruptedMockLlm(text=CORRUPTIONS[name](), time_scale=args.time_scale),
+        "after_model_callback": root_agent.after_model_callback if repair else None,
+    })
+    runner = InMemoryRunner(agent=agent, app_name="sus_compliance_agent")
+    ok = 0
+    for prompt in prompts:
+        final = [e for e in (await run_once(runner, prompt))["events"] if e.is_final_response()][-1]
+        try:
+            SusComplianceResponse.model_validate_json(final.content.parts[0].text)
+            ok += 1
+        except ValidationError:
+            pass
+    return {"ok": ok, "failed": len(prompts) - ok}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compliance output repair: failures with vs without repair.")
+    parser.add_argument("--runs", type=int, default=20, help="Runs per corruption type.")
+    parser.add_argument("--time-scale", type=float, default=0.01)
+    args = parser.parse_args()
+
+    prompts = [build_agent_input(r) for r in load_records(limit=args.runs)]
+    for name in CORRUPTIONS:
+        before = dict(schema_repair.stats, fields=schema_repair.stats["fields"].copy())
+        without = await run_corruption(name, False, prompts, args)
+        with_repair = await run_corruption(name, True, prompts, args)
+        fields = schema_repair.stats["fields"] - before["fields"]
+        print(json.dumps({
+            "corruption": name,
+            "failed_without_repair": without["failed"],
+            "failed_with_repair": with_repair["failed"],
+            "retries_saved": schema_repair.stats["repaired"] - before["repaired"],
+            "repaired_fields": sorted(fields),
+        }))
+
+    timings = []
+    for text in (c() for c in CORRUPTIONS.values()):
+        start = time.perf_counter()
+        for _ in range(200):
+            schema_repair.repair_output(text, SusComplianceResponse)
+        timings.append((time.perf_counter() - start) / 200 * 1000)
+    print(json.dumps({"repair_ms_mean": round(statistics.mean(timings), 3), "report": schema_repair.repair_report()}))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
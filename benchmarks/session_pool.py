@@ -0,0 +1,104 @@
+"""
+Session Pool Benchmark
+
+Per-request overhead of adk_service.run_agent around /run, against the ADK
+emulator (benchmarks/adk_emulator.py) started in-process with zero agent
+latency, so everything measured is session handling and HTTP:
+
+- before: create, run, get, delete per request, a new connection per call
+  (the previous client);
+- keep-alive: the same lifecycle over the pooled HTTP connections;
+- pooled: a pre-created session and /run only (SESSION_POOL_SIZE sessions),
+  recycled in the background.
+
+Overhead is the request's wall time minus the time of /run. ``--adk-url``
+measures against a running ADK API server instead of the emulator.
+
+Usage:
+    python benchmarks/session_pool.py --requests 500
+    python benchmarks/session_pool.py --requests 50 --adk-url http://localhost:8000
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+
+import requests
+import uvicorn
+
+from adk_emulator import Emulator, create_app
+from bench_utils import ROOT, percentile
+
+sys.path.insert(0, str(ROOT))
+
+from adk_service import client  # noqa: E402
+
+# --- Constants ---
+AGENT = "parallel_analyzer_agent"
+
+
+class NoKeepAlive:
+    """Stand-in for the client's requests.Session: one connection per call."""
+
+    def request(self, method, url, **kwargs):
+        return requests.request(method, url, **kwargs)
+
+
+def start_emulator(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(create_app(Emulator(time_scale=0.0)), port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def run(label: str, n: int) -> dict:
+    overheads, totals = [], []
+    for i in range(n):
+        _, usage = client.run_agent_with_usage(AGENT, f"Subject ID: {i}", user_id="bench")
+        stages = usage["stages_ms"]
+        totals.append(stages["total"])
+        overheads.append(stages["total"] - stages["run"])
+    return {
+        "client": label,
+        "requests": n,
+        "overhead_p50_ms": round(percentile(overheads, 50), 2),
+        "overhead_mean_ms": round(statistics.mean(overheads), 2),
+        "total_p50_ms": round(percentile(totals, 50), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request session overhead with and without the pool.")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--adk-url", default=None, help="Running ADK API server (default: in-process emulator).")
+    args = parser.parse_args()
+
+    server = None if args.adk_url else start_emulator(args.port)
+    client.backends.set_urls([args.adk_url or f"http://127.0.0.1:{args.port}"])
+    pooled_http = client._http
+
+    client.session_pool.size = 0
+    client._http = NoKeepAlive()
+    print(json.dumps(run("before", args.requests)))
+
+    client._http = pooled_http
+    print(json.dumps(run("keep-alive", args.requests)))
+
+    client.session_pool.size = args.pool_size
+    client.session_pool.warm([AGENT], "bench")
+    time.sleep(0.5)
+    print(json.dumps({**run("pooled", args.requests), "pool": client.session_pool.report()}))
+
+    client.session_pool.close()
+    if server is not None:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Trace Report
+
+Offline analysis of the JSONL files written by the file trace exporter
+(TRACE_EXPORTER=file, see adk_service/tracing.py). Spans from several
+services (api-server, mcp-server, ADK server) are joined by trace id.
+
+Prints, per span name: count, p50/p95 duration, self time (duration not
+covered by child spans, so parallel branches are not double counted) and
+token totals; then the span tree of the slowest traces.
+
+Usage:
+    python benchmarks/trace_report.py api_traces.jsonl adk_traces.jsonl --slowest 1
+"""
+
+import argparse
+import json
+import re
+import statistics
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from bench_utils import percentile
+
+# Session ids and UUIDs in span names (HTTP paths) are grouped together.
+_ID_RE = re.compile(r"/s_[0-9a-f]{8}\b|/[0-9a-f-]{36}\b")
+
+
+def load_spans(paths: List[str]) -> List[Dict[str, Any]]:
+    spans = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            spans.extend(json.loads(line) for line in f if line.strip())
+    return spans
+
+
+def self_time_ms(span: Dict[str, Any], children: List[Dict[str, Any]]) -> float:
+    """Span duration minus the union of its children's intervals."""
+    covered, end = 0, span["start_ns"]
+    for child in sorted(children, key=lambda c: c["start_ns"]):
+        start, stop = max(child["start_ns"], end), min(child["end_ns"], span["end_ns"])
+        if stop > start:
+            covered += stop - start
+            end = stop
+    return (span["end_ns"] - span["start_ns"] - covered) / 1e6
+
+
+def print_tree(span, children, depth=0):
+    attrs = span["attributes"]
+    details = [f"{span['duration_ms']:.1f} ms", span.get("service") or ""]
+    for key in ("gen_ai.agent.name", "gen_ai.usage.input_tokens", "gen_ai.usage.output_tokens",
+                "llm_cache.hit", "compaction.tokens_after", "rag.results", "http.response.status_code"):
+        if key in attrs:
+            details.append(f"{key.split('.')[-1]}={attrs[key]}")
+    print("  " * depth + f"{span['name']}  ({', '.join(d for d in details if d)})")
+    for child in sorted(children.get(span["span_id"], []), key=lambda c: c["start_ns"]):
+        print_tree(child, children, depth + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize JSONL trace files.")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--slowest", type=int, default=1, help="Print the span tree of the N slowest traces.")
+    args = parser.parse_args()
+
+    spans = load_spans(args.files)
+    children = defaultdict(list)
+    for span in spans:
+        children[span["parent_id"]].append(span)
+
+    by_name = defaultdict(lambda: {"durations": [], "self": [], "input_tokens": 0, "output_tokens": 0})
+    for span in spans:
+        entry = by_name[_ID_RE.sub("/{id}", span["name"])]
+        entry["durations"].append(span["duration_ms"])
+        entry["self"].append(self_time_ms(span, children[span["span_id"]]))
+        if span["name"].startswith("call_llm"):
+            entry["input_tokens"] += span["attributes"].get("gen_ai.usage.input_tokens") or 0
+            entry["output_tokens"] += span["attributes"].get("gen_ai.usage.output_tokens") or 0
+
+    print(f"{'span':60} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'self ms':>9} {'in tok':>8} {'out tok':>8}")
+    for name, entry in sorted(by_name.items(), key=lambda item: -sum(item[1]["self"])):
+        print(f"{name[:60]:60} {len(entry['durations']):>6} {percentile(entry['durations'], 50):>9.1f} "
+              f"{percentile(entry['durations'], 95):>9.1f} {statistics.mean(entry['self']):>9.1f} "
+              f"{entry['input_tokens']:>8} {entry['output_tokens']:>8}")
+
+    span_ids = {span["span_id"] for span in spans}
+    roots = [s for s in spans if s["parent_id"] is None or s["parent_id"] not in span_ids]
+    for root in sorted(roots, key=lambda s: -s["duration_ms"])[:args.slowest]:
+        print(f"\ntrace {root['trace_id']}")
+        print_tree(root, children)
+
+
+if __name__ == "__main__":
+    main()
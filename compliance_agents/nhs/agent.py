@@ -1,6 +1,12 @@
+import os
 from typing import List, Literal
 from pydantic import BaseModel, Field
 from google.adk.agents import LlmAgent
+
+try:
+    from ..schema_repair import make_repair_callback
+except ImportError:  # loaded as a top-level app by `adk api_server compliance_agents`
+    from schema_repair import make_repair_callback
 # from google.adk.a2a.utils.agent_to_a2a import to_a2a
 
 
@@ -114,9 +120,11 @@ Não inclua texto fora do JSON.
 
 nhs_agent = LlmAgent(
     name="nhs_compliance_agent",
-    model="gemini-2.0-flash",
+    model=os.getenv("MODEL_NHS_COMPLIANCE_AGENT", os.getenv("GEMINI_MODEL", "gemini-2.0-flash")),
     instruction=SYSTEM_INSTRUCTIONS_NHS,
     output_schema=NhsComplianceResponse,
+    # Fix small schema deviations locally instead of failing the run.
+    after_model_callback=make_repair_callback(NhsComplianceResponse),
 )
 
 root_agent = nhs_agent
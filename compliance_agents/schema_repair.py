@@ -0,0 +1,262 @@
+"""
+Structured-Output Repair
+
+Local validation and repair of the JSON returned by the compliance agents.
+Small deviations from the response schema (JSON wrapped in prose or code
+fences, truncated output, enum values with the wrong spelling, a missing
+list) are fixed here instead of failing the run or calling the model again.
+Repairs never change what a response says: an enum value is only mapped
+when its spelling is unambiguous, and an issue that cannot be repaired
+fails validation instead of being dropped from the report.
+
+Used as an ``after_model_callback``: valid responses are left untouched,
+repairable ones are rewritten, and anything else is passed through so ADK
+reports the validation error as before.
+"""
+
+import difflib
+import json
+import logging
+import re
+import typing
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmResponse
+from google.genai import types
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+# Frequent model spellings that difflib would not map to the right value.
+ENUM_SYNONYMS = {
+    "moderate": "medium",
+    "severe": "high",
+    "critical": "high",
+    "minor": "low",
+    "mild": "low",
+    "interaction": "drug_interaction",
+    "drug_drug_interaction": "drug_interaction",
+    "dosage": "dose",
+    "dosing": "dose",
+    "contra_indication": "contraindication",
+    "duplicate": "duplication",
+    "therapeutic_duplication": "duplication",
+    "partially_compliant": "review_required",
+    "needs_review": "review_required",
+    "review": "review_required",
+    "not_compliant": "non_compliant",
+    "noncompliant": "non_compliant",
+    "monitorization": "monitoring",
+}
+# Only near-identical spellings (typos, plurals); anything else fails validation.
+ENUM_CUTOFF = 0.85
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL)
+
+stats: Dict[str, Any] = {"valid": 0, "repaired": 0, "failed": 0, "fields": Counter()}
+
+
+# --- JSON extraction ---
+def _close_truncated(text: str) -> str:
+    """Close the strings, arrays and objects left open by a truncated response."""
+    stack: List[str] = []
+    in_string = escaped = False
+    # Last position where the text can be cut cleanly, with the brackets open there.
+    cut: Optional[Tuple[int, List[str]]] = None
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            cut = (i + 1, list(stack))
+        elif char == ",":
+            cut = (i, list(stack))
+
+    if not stack and not in_string:
+        return text
+    if cut is None:
+        return text + ('"' if in_string else "") + "".join(reversed(stack))
+    # Drop the incomplete trailing member, then close what is still open.
+    position, open_brackets = cut
+    return text[:position].rstrip().rstrip(",") + "".join(reversed(open_brackets))
+
+
+def extract_json(text: str) -> Tuple[Optional[Any], List[str]]:
+    """
+    Parse the JSON object in a model response.
+
+    Returns:
+        Tuple[Optional[Any], List[str]]: The parsed value (None if nothing
+        could be parsed) and the repairs applied ("prose", "truncated").
+    """
+    repairs = []
+    fenced = _FENCE_RE.search(text)
+    candidate = fenced.group(1) if fenced else text
+    start = candidate.find("{")
+    if start == -1:
+        return None, repairs
+    end = candidate.rfind("}")
+    if fenced or candidate[:start].strip() or candidate[end + 1:].strip():
+        repairs.append("prose")
+
+    try:
+        return json.loads(candidate[start:end + 1]), repairs
+    except json.JSONDecodeError:
+        pass
+    try:
+        value = json.loads(_close_truncated(candidate[start:]))
+    except json.JSONDecodeError:
+        return None, repairs
+    return value, repairs + ["truncated"]
+
+
+# --- Schema repair ---
+def _normalize(value: str) -> str:
+    return re.sub(r"[\s\-/]+", "_", value.strip().lower())
+
+
+def nearest_enum(value: Any, options: Tuple[str, ...]) -> Optional[str]:
+    """Map a misspelled value to its Literal option (case and spacing, ENUM_SYNONYMS, near-identical spelling), or None."""
+    if not isinstance(value, str):
+        return None
+    normalized = _normalize(value)
+    by_normalized = {_normalize(option): option for option in options}
+    if normalized in by_normalized:
+        return by_normalized[normalized]
+    synonym = ENUM_SYNONYMS.get(normalized)
+    if synonym in options:
+        return synonym
+    close = difflib.get_close_matches(normalized, list(by_normalized), n=1, cutoff=ENUM_CUTOFF)
+    return by_normalized[close[0]] if close else None
+
+
+def _repair_value(value: Any, annotation: Any, path: str, fixed: List[str]) -> Any:
+    origin = typing.get_origin(annotation)
+    if origin is typing.Literal:
+        options = typing.get_args(annotation)
+        if value in options:
+            return value
+        mapped = nearest_enum(value, options)
+        if mapped is not None:
+            fixed.append(path)
+            return mapped
+        return value
+
+    if origin in (list, List):
+        (item_type,) = typing.get_args(annotation) or (Any,)
+        if value is None:
+            fixed.append(path)
+            return []
+        if not isinstance(value, list):
+            fixed.append(path)
+            value = [value]
+        # Items that are still invalid are kept, so the response fails validation.
+        return [_repair_value(item, item_type, f"{path}[]", fixed) for item in value]
+
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return repair_dict(value, annotation, path, fixed) if isinstance(value, dict) else value
+
+    if annotation is str and value is not None and not isinstance(value, str):
+        fixed.append(path)
+        return "; ".join(map(str, value)) if isinstance(value, list) else str(value)
+    return value
+
+
+def repair_dict(data: Dict[str, Any], schema: Type[BaseModel], path: str = "", fixed: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Repair a parsed response field by field against a pydantic schema."""
+    fixed = [] if fixed is None else fixed
+    repaired = {}
+    for name, field in schema.model_fields.items():
+        field_path = f"{path}.{name}" if path else name
+        if name not in data or data[name] is None:
+            origin = typing.get_origin(field.annotation)
+            if origin in (list, List):
+                repaired[name] = []
+                fixed.append(field_path)
+            elif field.annotation is str and field.is_required():
+                repaired[name] = ""
+                fixed.append(field_path)
+            continue
+        repaired[name] = _repair_value(data[name], field.annotation, field_path, fixed)
+    return repaired
+
+
+def repair_output(text: str, schema: Type[BaseModel]) -> Tuple[Optional[BaseModel], List[str]]:
+    """
+    Validate a response against the schema, repairing it if needed.
+
+    Returns:
+        Tuple[Optional[BaseModel], List[str]]: The validated model (None if
+        it could not be repaired) and the repaired fields.
+    """
+    data, fixed = extract_json(text)
+    if not isinstance(data, dict):
+        return None, fixed
+    repaired = repair_dict(data, schema, fixed=fixed)
+    try:
+        return schema.model_validate(repaired), fixed
+    except ValidationError:
+        return None, fixed
+
+
+def make_repair_callback(schema: Type[BaseModel]) -> Callable[[CallbackContext, LlmResponse], Optional[LlmResponse]]:
+    """after_model_callback that validates and, if needed, repairs the agent's JSON output."""
+
+    def repair_after_model(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        if llm_response.partial or not llm_response.content or not llm_response.content.parts:
+            return None
+        text = "".join(part.text or "" for part in llm_response.content.parts if not part.thought)
+        if not text:
+            return None
+
+        try:
+            schema.model_validate_json(text)
+            stats["valid"] += 1
+            return None
+        except ValidationError:
+            pass
+
+        result, fixed = repair_output(text, schema)
+        if result is None:
+            stats["failed"] += 1
+            logger.warning("Could not repair %s output for agent %s", schema.__name__, callback_context.agent_name)
+            return None
+
+        stats["repaired"] += 1
+        stats["fields"].update(fixed)
+        logger.info("Repaired %s output for agent %s: %s", schema.__name__, callback_context.agent_name, fixed)
+        return llm_response.model_copy(update={
+            "content": types.Content(
+                role=llm_response.content.role or "model",
+                parts=[types.Part(text=result.model_dump_json(exclude_none=True))],
+            ),
+            "custom_metadata": {**(llm_response.custom_metadata or {}), "schema_repair": fixed},
+        })
+
+    return repair_after_model
+
+
+def repair_report() -> Dict[str, Any]:
+    """Snapshot of the repair counters: repaired responses are model retries saved."""
+    total = stats["valid"] + stats["repaired"] + stats["failed"]
+    return {
+        "responses": total,
+        "valid": stats["valid"],
+        "repaired": stats["repaired"],
+        "failed": stats["failed"],
+        "repair_rate": round(stats["repaired"] / total, 4) if total else 0.0,
+        "fields": dict(stats["fields"].most_common()),
+    }
@@ -1,8 +1,14 @@
+import os
 from typing import List, Literal
 from pydantic import BaseModel, Field
 from google.adk.agents import LlmAgent
 from google.adk.a2a.utils.agent_to_a2a import to_a2a
 
+try:
+    from ..schema_repair import make_repair_callback
+except ImportError:  # loaded as a top-level app by `adk api_server compliance_agents`
+    from schema_repair import make_repair_callback
+
 
 class SusComplianceIssue(BaseModel):
     category: Literal[
@@ -124,9 +130,11 @@ Não inclua texto fora do JSON.
 # Agente SUS em si
 sus_agent = LlmAgent(
     name="sus_compliance_agent",
-    model="gemini-2.0-flash",
+    model=os.getenv("MODEL_SUS_COMPLIANCE_AGENT", os.getenv("GEMINI_MODEL", "gemini-2.0-flash")),
     instruction=SYSTEM_INSTRUCTIONS_SUS,
     output_schema=SusComplianceResponse,
+    # Fix small schema deviations locally instead of failing the run.
+    after_model_callback=make_repair_callback(SusComplianceResponse),
 )
 
 root_agent = sus_agent
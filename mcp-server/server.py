@@ -1,14 +1,23 @@
 from fastmcp import FastMCP
 import asyncio, platform
-from datetime import datetime
-import requests
-import json
-import uuid
-import os
+import sys
+from pathlib import Path
+
+# adk_service fica na raiz do repositório (copiado ao lado de server.py no Docker)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from typing import Optional
+
+from adk_service import (
+    Deadline, View, bulkheads, configure_tracing, ledger, list_apps, list_sessions, project, project_usage,
+    run_agent_async, session_pool, traced,
+)
 
 # Configuração
-BASE_URL = os.getenv("ADK_API_URL", "http://localhost:8000")
 APP_NAME = "lead_qualification_agent"
+CALLER = "mcp"
+
+configure_tracing("health-mcp-server")
 
 if platform.system() == "Windows":
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
@@ -20,53 +29,35 @@ AGENTS = {
     "prescription": "simple_prescription_agent"
 }
 
-def run_agent(agent_name: str, input_data: str, user_id: str = "u_test") -> dict:
-    """
-    Executa um agente e retorna o estado completo.
-    Cria e deleta a sessão automaticamente.
-    """
-    session_id = f"s_{uuid.uuid4().hex[:8]}"
-    
-    # 1. Criar sessão
-    requests.post(
-        f"{BASE_URL}/apps/{agent_name}/users/{user_id}/sessions/{session_id}",
-        json={"state": {}, "user_id": user_id, "session_id": session_id}
-    )
-    
-    # 2. Executar agente
-    requests.post(
-        f"{BASE_URL}/run",
-        json={
-            "appName": agent_name,
-            "userId": user_id,
-            "sessionId": session_id,
-            "newMessage": {"parts": [{"text": input_data}], "role": "user"}
-        }
-    )
-    
-    # 3. Obter resultado
-    response = requests.get(
-        f"{BASE_URL}/apps/{agent_name}/users/{user_id}/sessions/{session_id}"
-    )
-    
-    # 4. Deletar sessão
-    requests.delete(
-        f"{BASE_URL}/apps/{agent_name}/users/{user_id}/sessions/{session_id}"
-    )
-    
-    return response.json().get("state", {})
+# Pré-cria sessões para tirar a criação do caminho de cada chamada (SESSION_POOL_SIZE)
+session_pool.warm(AGENTS.values(), "u_test")
 
+# Threads, conexões e fila separados por agente (BULKHEADS)
+bulkheads.register(AGENTS.values())
 
 def get_all_sessions(agent_name: str, user_id: str = "u_test") -> list:
     """Obtém todas as sessões de um usuário para um agente específico."""
-    response = requests.get(
-        f"{BASE_URL}/apps/{agent_name}/users/{user_id}/sessions"
-    )
-    return response.json()
+    return list_sessions(agent_name, user_id)
+
+async def analyze(agent_name: str, health_data: str, view: View = "final", fields: Optional[str] = None,
+                  idempotency_key: Optional[str] = None, timeout_s: Optional[float] = None,
+                  priority: Optional[str] = None) -> dict:
+    """
+    Executa o agente e devolve o estado projetado (view/fields) com o bloco de uso ("usage").
+    Com idempotency_key, repetições da chamada devolvem o resultado da primeira execução (usage.replayed).
+    A execução é cancelada no servidor ADK quando o prazo (timeout_s, padrão: REQUEST_DEADLINES_S do agente)
+    expira ou quando o cliente cancela a chamada da ferramenta.
+    priority é a classe de prioridade da execução no servidor ADK (padrão: DEFAULT_PRIORITY).
+    """
+    deadline = Deadline.for_agents([agent_name], timeout_s * 1000 if timeout_s is not None else None)
+    state, usage = await run_agent_async(agent_name, health_data, user_id="u_test", caller=CALLER,
+                                         idempotency_key=idempotency_key, deadline=deadline, priority=priority)
+    return {**project(state, agent_name, view, fields), "usage": project_usage(usage, view)}
     
 mcp = FastMCP(name="HelpSUSServer")
 
 @mcp.tool()
+@traced("mcp.get_all_apps")
 def get_all_apps():
     """
     Recupera a lista de todos os aplicativos disponíveis na API ADK.
@@ -74,47 +65,92 @@ def get_all_apps():
     Returns:
         list - Lista de aplicativos.
     """
-    response = requests.get(f"{BASE_URL}/list-apps")
-    return response.json()
+    return list_apps()
+
+@mcp.tool()
+@traced("mcp.get_usage_report")
+def get_usage_report() -> dict:
+    """
+    Token, call and cost totals since startup per agent, sub-agent and caller, most expensive first.
+
+    Returns:
+        dict - {"agents": {...}, "sub_agents": {...}, "callers": {...}} with requests, llm_calls, input_tokens, output_tokens, tool_calls, rename_queries, cost_usd and wall time.
+    """
+    return ledger.report()
+
+@mcp.tool()
+@traced("mcp.get_bulkhead_report")
+def get_bulkhead_report() -> dict:
+    """
+    Utilization of each analysis pipeline's bulkhead: a saturated pipeline rejects new calls fast (BulkheadFull) without slowing the others.
+
+    Returns:
+        dict - Per agent: max_concurrent, max_queue, max_wait_s, inflight, queued, utilization, peak_inflight, accepted, rejected_full, rejected_wait, wait_ms_mean and run_s_recent.
+    """
+    return bulkheads.report()
 
 @mcp.tool()
-def simple_prescription_analysis(health_data: str) -> dict:
+@traced("mcp.simple_prescription_analysis")
+async def simple_prescription_analysis(health_data: str, view: View = "final", fields: Optional[str] = None,
+                                       idempotency_key: Optional[str] = None, timeout_s: Optional[float] = None,
+                                       priority: Optional[str] = None) -> dict:
     """
     Performs routine safety checks on patient prescriptions using a simple agent.
     This agent provides overall prescription safety assessment with permissive evaluation criteria.
     
     Arguments:
         health_data: str - Patient health data and prescription information in text format.
+        view: str - "final" (default): final structured result; "verdict": criticality levels only; "full": also the intermediate analyses.
+        fields: str - Optional comma-separated dotted paths to return instead, e.g. "results_criticality.level".
+        idempotency_key: str - Optional client-chosen key (e.g. a UUID) reused on retries: a retry returns the first call's result, or waits for it while it runs, instead of analyzing again. Results are kept for IDEMPOTENCY_TTL_S (default: 24h).
+        timeout_s: float - Optional deadline in seconds; when it passes, the remaining sub-agent and tool calls are cancelled and the tool fails. Defaults to the agent's REQUEST_DEADLINES_S entry.
+        priority: str - Optional priority class: "interactive" (default, a clinician waiting on the answer), "batch" (screening jobs) or "background"; batch and background runs only use capacity interactive runs leave free.
     Outputs:
-        dict - Dictionary containing overall criticality level (low/medium/high) and description.
+        dict - Dictionary containing overall criticality level (low/medium/high) and description, plus "usage" (tokens, calls and wall time per sub-agent).
     """
-    return run_agent("simple_prescription_agent", health_data)
+    return await analyze("simple_prescription_agent", health_data, view, fields, idempotency_key, timeout_s, priority)
 
 @mcp.tool()
-def parallel_prescription_analysis(health_data: str) -> dict:
+@traced("mcp.parallel_prescription_analysis")
+async def parallel_prescription_analysis(health_data: str, view: View = "final", fields: Optional[str] = None,
+                                         idempotency_key: Optional[str] = None, timeout_s: Optional[float] = None,
+                                         priority: Optional[str] = None) -> dict:
     """
     Analyzes prescription safety using parallel agents for drug, dose, and route analysis.
     Three specialist agents work concurrently to evaluate different aspects, then synthesize results.
     
     Arguments:
         health_data: str - Patient health data and prescription information in text format.
+        view: str - "final" (default): final structured result; "verdict": criticality levels only; "full": also the intermediate analyses.
+        fields: str - Optional comma-separated dotted paths to return instead, e.g. "synthesized_results_criticality.level_drug".
+        idempotency_key: str - Optional client-chosen key (e.g. a UUID) reused on retries: a retry returns the first call's result, or waits for it while it runs, instead of analyzing again. Results are kept for IDEMPOTENCY_TTL_S (default: 24h).
+        timeout_s: float - Optional deadline in seconds; when it passes, the remaining sub-agent and tool calls are cancelled and the tool fails. Defaults to the agent's REQUEST_DEADLINES_S entry.
+        priority: str - Optional priority class: "interactive" (default, a clinician waiting on the answer), "batch" (screening jobs) or "background"; batch and background runs only use capacity interactive runs leave free.
     Outputs:
-        dict - Dictionary with individual criticality levels for drug, dose, and route analysis plus synthesis description.
+        dict - Dictionary with individual criticality levels for drug, dose, and route analysis plus synthesis description, plus "usage" (tokens, calls and wall time per sub-agent).
     """
-    return run_agent("parallel_analyzer_agent", health_data)
+    return await analyze("parallel_analyzer_agent", health_data, view, fields, idempotency_key, timeout_s, priority)
 
 @mcp.tool()
-def sequential_health_analysis(health_data: str) -> dict:
+@traced("mcp.sequential_health_analysis")
+async def sequential_health_analysis(health_data: str, view: View = "final", fields: Optional[str] = None,
+                                     idempotency_key: Optional[str] = None, timeout_s: Optional[float] = None,
+                                     priority: Optional[str] = None) -> dict:
     """
     Performs comprehensive health analysis using sequential agents for general health, treatment impact assessment, and synthesis.
     Pipeline analyzes patient profile, evaluates treatment duration and impacts, then consolidates into actionable health report.
     
     Arguments:
         health_data: str - Patient health data and prescription information in text format.
+        view: str - "final" (default): final structured result; "verdict": criticality levels only; "full": also the intermediate analyses.
+        fields: str - Optional comma-separated dotted paths to return instead, e.g. "synthesized_health_report.executive_summary".
+        idempotency_key: str - Optional client-chosen key (e.g. a UUID) reused on retries: a retry returns the first call's result, or waits for it while it runs, instead of analyzing again. Results are kept for IDEMPOTENCY_TTL_S (default: 24h).
+        timeout_s: float - Optional deadline in seconds; when it passes, the remaining sub-agent and tool calls are cancelled and the tool fails. Defaults to the agent's REQUEST_DEADLINES_S entry.
+        priority: str - Optional priority class: "interactive" (default, a clinician waiting on the answer), "batch" (screening jobs) or "background"; batch and background runs only use capacity interactive runs leave free.
     Outputs:
-        dict - Dictionary with treatment duration criticality, patient compliance risk, lifestyle impact, monitoring frequency, executive summary, and actionable recommendations.
+        dict - Dictionary with treatment duration criticality, patient compliance risk, lifestyle impact, monitoring frequency, executive summary, and actionable recommendations, plus "usage" (tokens, calls and wall time per sub-agent).
     """
-    return run_agent("sequential_analyzer_agent", health_data)
+    return await analyze("sequential_analyzer_agent", health_data, view, fields, idempotency_key, timeout_s, priority)
 
 if __name__ == "__main__":
     # Start an HTTP server on port 8001
@@ -0,0 +1,11 @@
+"""
+MIMIC Data Utilities
+
+Columnar, indexed access to the MIMIC-III admissions payload used to build
+agent inputs, and a generator of labelled fake admissions. Requires pyarrow
+and numpy.
+"""
+
+from .store import MimicStore, convert_payload, iter_payload, open_store
+from .generate import AdmissionSampler, generate_admissions
+from .render import AdmissionRenderer, format_admission_info, format_compact, render_admission
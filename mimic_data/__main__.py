@@ -0,0 +1,26 @@
+"""
+Command-line entry point: ``python -m mimic_data <command> ...``
+
+Commands:
+    convert   Convert a MIMIC payload (JSON / JSONL) to a columnar store.
+    generate  Generate labelled (optionally poisoned) fake admissions as JSONL.
+"""
+
+import sys
+
+from . import generate, store
+
+COMMANDS = {"convert": store.main, "generate": generate.main}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print(__doc__.strip())
+        sys.exit(2)
+    command = sys.argv.pop(1)
+    sys.argv[0] = f"python -m mimic_data {command}"
+    COMMANDS[command]()
+
+
+if __name__ == "__main__":
+    main()
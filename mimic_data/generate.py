@@ -0,0 +1,210 @@
+"""
+Fake Admission Generator
+
+Vectorized, seeded version of the poisoning loop in
+notebooks/generate-inputs-to-agents.ipynb. Each record takes the most recent
+admission of a subject, holds out its last prescription as
+``current_prescription`` and, with probability ``p``, poisons one of its
+``drug``, ``drug_type``, ``dose_val``, ``dose_unit`` or ``route`` fields
+with another value seen in the payload.
+
+Records are generated in fixed-size chunks. Chunk ``k`` draws everything
+from ``numpy.random.default_rng([seed, k])``, so the output depends only on
+the seed, ``n`` and the chunk size, not on the number of workers. Chunks are
+written as ``part-NNNNN.jsonl`` by a process pool, next to a
+``manifest.json`` with the arguments and label counts.
+
+Differences from the notebook:
+    - subjects are sampled up front instead of retried until one has
+      prescriptions (same distribution: admissions rows whose subject's
+      latest admission has prescriptions);
+    - a poisoned field always gets a value different from the original, so
+      ``is_poisoned`` never labels an unchanged prescription;
+    - the payload is never mutated (the notebook poisons the shared
+      prescription dict, so later samples of the same subject inherit it);
+    - records also carry the source ``hadm_id`` and, when poisoned, the
+      ``original_value``.
+
+``admission_str`` comes from ``AdmissionRenderer``, so each held-out
+admission is formatted once per worker and only the subject line changes.
+
+Usage:
+    python -m mimic_data generate --n 100000 --seed 42 --workers 8 --out data/fake_admissions
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .render import AdmissionRenderer
+from .store import MimicStore, open_store
+
+# --- Constants ---
+POISON_CHOICES = ["drug", "drug_type", "dose_val", "dose_unit", "route"]
+DEFAULT_STORE = "data/mimic3_store"
+DEFAULT_SOURCE = "data/payload_mimic3.json"
+DEFAULT_CHUNK_SIZE = 10_000
+DEFAULT_POISON_RATE = 0.15
+
+
+class AdmissionSampler:
+    """Draws labelled fake admissions from a MimicStore."""
+
+    def __init__(self, store: MimicStore, p: float = DEFAULT_POISON_RATE, seed: int = 0):
+        self.store = store
+        self.p = p
+        self.seed = seed
+
+        # The notebook samples subject ids from the admissions column (so subjects
+        # with more admissions are drawn more often) and retries when the latest
+        # admission has no prescriptions: sample from the eligible rows directly.
+        subject_ids = store.admissions.column("subject_id").to_numpy()
+        latest = dict(zip(store.subject_ids.tolist(), store.latest_rows().tolist()))
+        source_rows = np.array([latest[s] for s in subject_ids.tolist()], dtype=np.int64)
+        self._source_rows = source_rows[store.prescription_counts()[source_rows] > 0]
+        if not len(self._source_rows):
+            raise ValueError(f"No admission with prescriptions in {store.path}")
+
+        # Distinct values per poisonable field, and each value's position.
+        self._pools = {}
+        self._positions = {}
+        for field in POISON_CHOICES:
+            pool = store.prescriptions.column(field).unique().to_pylist()
+            self._pools[field] = pool
+            self._positions[field] = {value: i for i, value in enumerate(pool)}
+
+        self._held_out = lru_cache(maxsize=None)(self._held_out_uncached)
+        self.renderer = AdmissionRenderer()
+
+    def _held_out_uncached(self, row: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        admission = self.store.admission(row)
+        current = admission["prescricoes"].pop()
+        return admission, current
+
+    def chunk(self, index: int, size: int) -> Iterator[Dict[str, Any]]:
+        """Records ``index * size`` to ``(index + 1) * size - 1``."""
+        rng = np.random.default_rng([self.seed, index])
+        rows = self._source_rows[rng.integers(len(self._source_rows), size=size)]
+        poisoned = rng.random(size) < self.p
+        choices = rng.integers(len(POISON_CHOICES), size=size)
+        draws = rng.random(size)
+
+        first_id = index * size
+        for i, row in enumerate(rows.tolist()):
+            admission, current = self._held_out(row)
+            current = dict(current)
+            poison_choice = original_value = None
+            if poisoned[i]:
+                poison_choice = POISON_CHOICES[choices[i]]
+                original_value = current[poison_choice]
+                current[poison_choice] = self._other_value(poison_choice, original_value, draws[i])
+            record = {
+                "old_subject_id": admission["subject_id"],
+                "hadm_id": admission["hadm_id"],
+                "admission_str": self.renderer.render(dict(admission, subject_id=first_id + i)).text,
+                "current_prescription": current,
+                "is_poisoned": bool(poisoned[i]),
+                "poison_choice": poison_choice,
+            }
+            if poison_choice:
+                record["original_value"] = original_value
+            yield record
+
+    def _other_value(self, field: str, original: Any, draw: float) -> Any:
+        """Uniform draw over the field's distinct values, excluding ``original``."""
+        pool = self._pools[field]
+        if len(pool) < 2:
+            return original
+        i = int(draw * (len(pool) - 1))
+        return pool[i + 1] if i >= self._positions[field][original] else pool[i]
+
+
+# --- Parallel chunk writer ---
+_sampler: Optional[AdmissionSampler] = None
+
+
+def _init_worker(store_path: str, p: float, seed: int) -> None:
+    global _sampler
+    _sampler = AdmissionSampler(MimicStore(store_path), p=p, seed=seed)
+
+
+def _write_chunk(index: int, size: int, out_dir: str) -> Dict[str, Any]:
+    path = Path(out_dir) / f"part-{index:05d}.jsonl"
+    counts = {"records": 0, "poisoned": 0, **{choice: 0 for choice in POISON_CHOICES}}
+    with open(path, "w", encoding="utf-8") as f:
+        for record in _sampler.chunk(index, size):
+            f.write(json.dumps(record) + "\n")
+            counts["records"] += 1
+            if record["is_poisoned"]:
+                counts["poisoned"] += 1
+                counts[record["poison_choice"]] += 1
+    return counts
+
+
+def generate_admissions(
+    store_path: str,
+    out_dir: str,
+    n: int,
+    p: float = DEFAULT_POISON_RATE,
+    seed: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 1,
+) -> Dict[str, Any]:
+    """Write ``n`` records to ``out_dir`` in chunks of ``chunk_size``; returns the manifest."""
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    chunks = -(-n // chunk_size)
+    sizes = [min(chunk_size, n - k * chunk_size) for k in range(chunks)]
+    start = time.perf_counter()
+
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(store_path, p, seed)) as pool:
+            parts = list(pool.map(_write_chunk, range(chunks), sizes, [out_dir] * chunks))
+    else:
+        _init_worker(store_path, p, seed)
+        parts = [_write_chunk(k, size, out_dir) for k, size in enumerate(sizes)]
+
+    totals: Dict[str, int] = {}
+    for part in parts:
+        for key, value in part.items():
+            totals[key] = totals.get(key, 0) + value
+    manifest = {
+        "store": str(store_path),
+        "n": n,
+        "p": p,
+        "seed": seed,
+        "chunk_size": chunk_size,
+        "files": [f"part-{k:05d}.jsonl" for k in range(chunks)],
+        **totals,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    with open(Path(out_dir) / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate labelled (optionally poisoned) fake admissions.")
+    parser.add_argument("--n", type=int, default=1000, help="Number of records.")
+    parser.add_argument("--p", type=float, default=DEFAULT_POISON_RATE, help="Poisoning probability.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", required=True, help="Output directory for part-*.jsonl and manifest.json.")
+    parser.add_argument("--store", default=DEFAULT_STORE, help="MIMIC store (converted from --source if missing).")
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="Payload to convert when --store does not exist.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    open_store(args.store, source=args.source)
+    manifest = generate_admissions(args.store, args.out, args.n, args.p, args.seed, args.chunk_size, args.workers)
+    print(json.dumps({k: v for k, v in manifest.items() if k != "files"}))
+
+
+if __name__ == "__main__":
+    main()
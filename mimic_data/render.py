@@ -0,0 +1,244 @@
+"""
+Admission Rendering
+
+Turns a payload admission into the text sent to the agents:
+
+- ``format_admission_info`` produces the ``admission_str`` exactly as the
+  function of the same name in notebooks/generate-inputs-to-agents.ipynb,
+  so records generated from the store are indistinguishable from
+  data/inputs_to_agent_fake_mimic3.json;
+- ``format_compact`` produces the same text as
+  ``team/common/compaction.compact_admission`` applied to it, but straight
+  from the structured record instead of re-parsing the rendered string.
+
+Both build a list of fragments and join it once. ``AdmissionRenderer``
+memoizes rendered admissions by ``hadm_id`` and content: the key holds every
+rendered field except ``subject_id`` (the generator renumbers subjects), so
+an admission edited in place is re-rendered and the cached body is shared by
+every record drawn from the same admission. Each result carries its
+estimated token count.
+
+Configuration (environment variables):
+    RENDER_CACHE_SIZE: rendered admissions kept per renderer (default: 10000).
+"""
+
+import math
+import os
+from collections import OrderedDict
+from operator import itemgetter
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+# --- Constants ---
+MAX_PRESCRIPTIONS = 10
+# The notebook renders from a DataFrame, where missing lab values are NaN.
+NAN_FIELDS = ("creatinina", "hemoglobina", "potassio", "sodio")
+# Same heuristic as team/common/compaction.estimate_tokens.
+CHARS_PER_TOKEN = 4
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "10000"))
+
+# (label, value field, unit field) for every line after "Subject ID".
+HEADER_FIELDS = [
+    ("Admission ID", "hadm_id", None),
+    ("Admission Date", "admittime", None),
+    ("Discharge Date", "dischtime", None),
+    ("Insurance", "insurance", None),
+    ("Age", "age_estimada", None),
+    ("Gender", "gender", None),
+    ("Language", "language", None),
+    ("Marital Status", "marital_status", None),
+    ("Ethnicity", "ethnicity", None),
+    ("Creatinine", "creatinina", "creatinina_uom"),
+    ("Hemoglobin", "hemoglobina", "hemoglobina_uom"),
+    ("Potassium", "potassio", "potassio_uom"),
+    ("Sodium", "sodio", "sodio_uom"),
+    ("Notes (24h Summary)", "notas_24h_resumo", None),
+]
+PRESCRIPTION_FIELDS = ("drug", "drug_type", "dose_val", "dose_unit", "form", "route", "starttime", "stoptime")
+PRESCRIPTION_SEPARATOR = "-" * 32
+ADMISSION_SEPARATOR = "-" * 40
+COMPACT_PRESCRIPTIONS_HEADER = "Prescriptions: (drug | type | dose | route | period | count)"
+# Same as compaction.py: the form column only when some entry has a form.
+COMPACT_PRESCRIPTIONS_HEADER_WITH_FORM = "Prescriptions: (drug | type | dose | form | route | period | count)"
+_EMPTY = ("", "None", "nan")
+_MIDNIGHT = " 00:00:00"
+
+
+class RenderedAdmission(NamedTuple):
+    text: str
+    tokens: int
+    cached: bool
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _value(admission: Dict[str, Any], field: str) -> Any:
+    value = admission[field]
+    return "nan" if value is None and field in NAN_FIELDS else value
+
+
+def _header_lines(admission: Dict[str, Any]) -> List[str]:
+    lines = []
+    for label, field, unit in HEADER_FIELDS:
+        if unit is None:
+            lines.append(f"{label}: {_value(admission, field)}")
+        else:
+            lines.append(f"{label}: {_value(admission, field)} {admission[unit]}")
+    return lines
+
+
+def format_prescription(prescription: Dict[str, Any]) -> str:
+    return (
+        f"  - Drug: {prescription['drug']}, "
+        f"Type: {prescription['drug_type']}, "
+        f"Dose: {prescription['dose_val']} {prescription['dose_unit']}, "
+        f"Form: {prescription['form']}, "
+        f"Route: {prescription['route']}, "
+        f"Start: {prescription['starttime']}, "
+        f"Stop: {prescription['stoptime']}"
+        f"{PRESCRIPTION_SEPARATOR}"
+    )
+
+
+def _format_body(admission: Dict[str, Any]) -> str:
+    """Everything after the "Subject ID" line of format_admission_info."""
+    prescriptions = [format_prescription(p) for p in admission["prescricoes"][-MAX_PRESCRIPTIONS:]]
+    lines = _header_lines(admission)
+    lines.append("Prescriptions: " + "\n".join(prescriptions))
+    lines.append(ADMISSION_SEPARATOR)
+    lines.append("")
+    return "\n".join(lines)
+
+
+def format_admission_info(admission: Dict[str, Any]) -> str:
+    """Render an admission and its last MAX_PRESCRIPTIONS prescriptions."""
+    return f"Subject ID: {admission['subject_id']}\n{_format_body(admission)}"
+
+
+# --- Compact variant ---
+def _is_empty(value: Any) -> bool:
+    return str(value).strip() in _EMPTY
+
+
+def _short_date(value: Any) -> str:
+    value = str(value).strip()
+    return value[: -len(_MIDNIGHT)] if value.endswith(_MIDNIGHT) else value
+
+
+def _compact_prescriptions(prescriptions: List[Dict[str, Any]]) -> List[str]:
+    """Header and entries: identical orders collapsed into one counted entry with the merged date range."""
+    entries: Dict[Tuple[str, ...], List[Any]] = {}
+    for p in prescriptions:
+        key = (
+            str(p["drug"]).strip(),
+            str(p["drug_type"]).strip(),
+            f"{p['dose_val']} {p['dose_unit']}".strip(),
+            str(p["form"]).strip(),
+            str(p["route"]).strip(),
+        )
+        start, stop = _short_date(p["starttime"]), _short_date(p["stoptime"])
+        entry = entries.get(key)
+        if entry is None:
+            entries[key] = [start, stop, 1]
+            continue
+        if not _is_empty(start) and (_is_empty(entry[0]) or start < entry[0]):
+            entry[0] = start
+        if not _is_empty(stop) and (_is_empty(entry[1]) or stop > entry[1]):
+            entry[1] = stop
+        entry[2] += 1
+
+    with_form = any(not _is_empty(form) for _, _, _, form, _ in entries)
+    lines = [COMPACT_PRESCRIPTIONS_HEADER_WITH_FORM if with_form else COMPACT_PRESCRIPTIONS_HEADER]
+    for (drug, drug_type, dose, form, route), (start, stop, count) in entries.items():
+        fields = [drug, drug_type, dose]
+        if with_form:
+            fields.append("-" if _is_empty(form) else form)
+        fields.append(route)
+        fields.append(start if start == stop or _is_empty(stop) else f"{start} to {stop}")
+        line = "  - " + " | ".join(fields)
+        lines.append(f"{line} | x{count}" if count > 1 else line)
+    return lines
+
+
+def _format_compact_body(admission: Dict[str, Any]) -> str:
+    prescriptions = admission["prescricoes"][-MAX_PRESCRIPTIONS:]
+    if not prescriptions:
+        return _format_body(admission)
+    lines = [line for line in _header_lines(admission) if not _is_empty(line.partition(": ")[2])]
+    lines.extend(_compact_prescriptions(prescriptions))
+    lines.append("")
+    return "\n".join(lines)
+
+
+def format_compact(admission: Dict[str, Any]) -> str:
+    """Compact rendering: empty fields, separators and duplicate prescriptions removed."""
+    if not admission["prescricoes"]:
+        return format_admission_info(admission)
+    subject = "" if _is_empty(admission["subject_id"]) else f"Subject ID: {admission['subject_id']}\n"
+    return subject + _format_compact_body(admission)
+
+
+# --- Memoized renderer ---
+# itemgetter keeps the key ~5x cheaper to build than the text it stands for.
+_header_values = itemgetter(
+    *[field for _, field, _ in HEADER_FIELDS], *[unit for _, _, unit in HEADER_FIELDS if unit]
+)
+_prescription_values = itemgetter(*PRESCRIPTION_FIELDS)
+
+
+def content_key(admission: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Every rendered value except ``subject_id``."""
+    prescriptions = admission["prescricoes"][-MAX_PRESCRIPTIONS:]
+    return _header_values(admission), tuple(map(_prescription_values, prescriptions))
+
+
+class AdmissionRenderer:
+    """LRU cache of rendered admission bodies keyed by (variant, hadm_id, content)."""
+
+    def __init__(self, maxsize: int = RENDER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._cache: "OrderedDict[Tuple[Any, ...], str]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def render(self, admission: Dict[str, Any], compact: bool = False) -> RenderedAdmission:
+        key = (compact, admission.get("hadm_id"), content_key(admission))
+        body = self._cache.get(key)
+        cached = body is not None
+        if cached:
+            self._cache.move_to_end(key)
+            self.stats["hits"] += 1
+        else:
+            body = _format_compact_body(admission) if compact else _format_body(admission)
+            self._cache[key] = body
+            self.stats["misses"] += 1
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+                self.stats["evictions"] += 1
+
+        subject_id = admission["subject_id"]
+        if compact and admission["prescricoes"] and _is_empty(subject_id):
+            text = body
+        else:
+            text = f"Subject ID: {subject_id}\n{body}"
+        return RenderedAdmission(text, estimate_tokens(text), cached)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def report(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._cache),
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else None,
+        }
+
+
+renderer = AdmissionRenderer()
+
+
+def render_admission(admission: Dict[str, Any], compact: bool = False) -> RenderedAdmission:
+    """Render with the module-level cache."""
+    return renderer.render(admission, compact)
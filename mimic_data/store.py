@@ -0,0 +1,234 @@
+"""
+Columnar MIMIC Payload Store
+
+Converts the admissions payload (data/payload_mimic3.json, or a JSONL file
+with one admission per line) into two Arrow IPC files:
+
+    admissions.arrow     one row per admission, scalar columns plus
+                         ``presc_offset`` / ``presc_count`` into prescriptions
+    prescriptions.arrow  flattened prescriptions, in admission order
+
+Both files are memory-mapped on open, so only the pages that are touched are
+read. Lookups by ``hadm_id`` and by ``subject_id`` (most recent admission,
+i.e. highest ``hadm_id``) are O(1) dictionary hits built once from the id
+columns; iteration streams record batches.
+
+Usage:
+    python -m mimic_data convert data/payload_mimic3.json --out data/mimic3_store
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+try:
+    import numpy as np
+    import pyarrow as pa
+except ImportError as e:  # pragma: no cover - optional dependency
+    raise ImportError("mimic_data requires pyarrow and numpy: pip install pyarrow numpy") from e
+
+# --- Constants ---
+ADMISSION_SCHEMA = pa.schema([
+    ("subject_id", pa.int64()),
+    ("hadm_id", pa.int64()),
+    ("admittime", pa.int64()),
+    ("dischtime", pa.int64()),
+    ("admission_type", pa.string()),
+    ("insurance", pa.string()),
+    ("language", pa.string()),
+    ("marital_status", pa.string()),
+    ("ethnicity", pa.string()),
+    ("gender", pa.string()),
+    ("age_estimada", pa.float64()),
+    ("diag_list", pa.string()),
+    ("creatinina", pa.float64()),
+    ("creatinina_uom", pa.string()),
+    ("hemoglobina", pa.float64()),
+    ("hemoglobina_uom", pa.string()),
+    ("potassio", pa.float64()),
+    ("potassio_uom", pa.string()),
+    ("sodio", pa.float64()),
+    ("sodio_uom", pa.string()),
+    ("notas_24h_resumo", pa.string()),
+])
+PRESCRIPTION_SCHEMA = pa.schema([
+    ("drug", pa.string()),
+    ("drug_type", pa.string()),
+    ("dose_val", pa.string()),
+    ("dose_unit", pa.string()),
+    ("form", pa.string()),
+    ("route", pa.string()),
+    ("starttime", pa.string()),
+    ("stoptime", pa.string()),
+])
+OFFSET_FIELDS = [("presc_offset", pa.int64()), ("presc_count", pa.int32())]
+ADMISSIONS_FILE = "admissions.arrow"
+PRESCRIPTIONS_FILE = "prescriptions.arrow"
+DEFAULT_BATCH_SIZE = 1_000
+
+
+def iter_payload(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """Yield admissions from a JSON array file or (streamed) from a JSONL file."""
+    path = Path(path)
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix == ".jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def _cast(value: Any, type_: pa.DataType) -> Any:
+    if value is None or type_ != pa.string():
+        return value
+    return value if isinstance(value, str) else str(value)
+
+
+def _column(rows: List[Dict[str, Any]], field: pa.Field) -> pa.Array:
+    return pa.array([_cast(row.get(field.name), field.type) for row in rows], type=field.type)
+
+
+def convert_payload(
+    admissions: Iterable[Dict[str, Any]],
+    out_dir: Union[str, Path],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    Write admissions (payload dicts with a ``prescricoes`` list) to a store directory.
+
+    Admissions are consumed in batches, so the input can be a generator over a
+    file larger than memory.
+
+    Returns:
+        Dict[str, int]: Number of admissions and prescriptions written.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    admission_schema = pa.schema(list(ADMISSION_SCHEMA) + [pa.field(n, t) for n, t in OFFSET_FIELDS])
+    counts = {"admissions": 0, "prescriptions": 0}
+
+    with pa.OSFile(str(out_dir / ADMISSIONS_FILE), "wb") as adm_sink, \
+            pa.OSFile(str(out_dir / PRESCRIPTIONS_FILE), "wb") as presc_sink, \
+            pa.ipc.new_file(adm_sink, admission_schema) as adm_writer, \
+            pa.ipc.new_file(presc_sink, PRESCRIPTION_SCHEMA) as presc_writer:
+
+        def flush(batch: List[Dict[str, Any]]) -> None:
+            prescriptions = [p for admission in batch for p in admission.get("prescricoes") or []]
+            sizes = np.array([len(admission.get("prescricoes") or []) for admission in batch], dtype=np.int64)
+            offsets = counts["prescriptions"] + np.concatenate(([0], np.cumsum(sizes)[:-1]))
+            columns = [_column(batch, field) for field in ADMISSION_SCHEMA]
+            columns += [pa.array(offsets, pa.int64()), pa.array(sizes, pa.int32())]
+            adm_writer.write_batch(pa.record_batch(columns, schema=admission_schema))
+            if prescriptions:
+                presc_writer.write_batch(pa.record_batch(
+                    [_column(prescriptions, field) for field in PRESCRIPTION_SCHEMA], schema=PRESCRIPTION_SCHEMA,
+                ))
+            counts["admissions"] += len(batch)
+            counts["prescriptions"] += len(prescriptions)
+
+        batch: List[Dict[str, Any]] = []
+        for admission in admissions:
+            batch.append(admission)
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+    return counts
+
+
+class MimicStore:
+    """Memory-mapped, indexed view over a store written by convert_payload."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._adm_reader = pa.ipc.open_file(pa.memory_map(str(self.path / ADMISSIONS_FILE), "r"))
+        self._presc_reader = pa.ipc.open_file(pa.memory_map(str(self.path / PRESCRIPTIONS_FILE), "r"))
+        # Zero-copy tables over the mapped files.
+        self.admissions: pa.Table = self._adm_reader.read_all()
+        self.prescriptions: pa.Table = self._presc_reader.read_all()
+
+        subject_ids = self.admissions.column("subject_id").to_numpy()
+        hadm_ids = self.admissions.column("hadm_id").to_numpy()
+        self._offsets = self.admissions.column("presc_offset").to_numpy()
+        self._counts = self.admissions.column("presc_count").to_numpy()
+        self._row_by_hadm = dict(zip(hadm_ids.tolist(), range(len(hadm_ids))))
+
+        # Most recent admission per subject: sort by (subject, hadm), keep the last row of each subject.
+        order = np.lexsort((hadm_ids, subject_ids))
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = subject_ids[order][1:] != subject_ids[order][:-1]
+        self._latest_row = dict(zip(subject_ids[order][last].tolist(), order[last].tolist()))
+
+    def __len__(self) -> int:
+        return self.admissions.num_rows
+
+    @property
+    def subject_ids(self) -> np.ndarray:
+        """Distinct subject ids."""
+        return np.fromiter(self._latest_row.keys(), dtype=np.int64, count=len(self._latest_row))
+
+    def latest_rows(self) -> np.ndarray:
+        """Row index of each subject's most recent admission (aligned with subject_ids)."""
+        return np.fromiter(self._latest_row.values(), dtype=np.int64, count=len(self._latest_row))
+
+    def prescription_range(self, row: int) -> slice:
+        offset = int(self._offsets[row])
+        return slice(offset, offset + int(self._counts[row]))
+
+    def prescription_counts(self) -> np.ndarray:
+        return self._counts
+
+    def admission(self, row: int) -> Dict[str, Any]:
+        """Admission at a row index, in the payload format (with its ``prescricoes`` list)."""
+        record = {name: column[0] for name, column in self.admissions.slice(row, 1).to_pydict().items()}
+        offset, count = record.pop("presc_offset"), record.pop("presc_count")
+        record["prescricoes"] = self.prescriptions.slice(offset, count).to_pylist()
+        return record
+
+    def get_admission(self, hadm_id: int) -> Optional[Dict[str, Any]]:
+        row = self._row_by_hadm.get(int(hadm_id))
+        return None if row is None else self.admission(row)
+
+    def get_most_recent_admission(self, subject_id: int) -> Optional[Dict[str, Any]]:
+        """Most recent (highest hadm_id) admission of a subject, or None."""
+        row = self._latest_row.get(int(subject_id))
+        return None if row is None else self.admission(row)
+
+    def iter_admissions(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Stream all admissions in file order, materializing one batch at a time."""
+        for start in range(0, len(self), batch_size):
+            batch = self.admissions.slice(start, batch_size)
+            first = int(self._offsets[start])
+            total = int(self._counts[start:start + batch_size].sum())
+            prescriptions = self.prescriptions.slice(first, total).to_pylist()
+            for record in batch.to_pylist():
+                offset, count = record.pop("presc_offset") - first, record.pop("presc_count")
+                record["prescricoes"] = prescriptions[offset:offset + count]
+                yield record
+
+
+def open_store(path: Union[str, Path], source: Optional[Union[str, Path]] = None) -> MimicStore:
+    """Open a store, converting ``source`` into it first if it does not exist yet."""
+    path = Path(path)
+    if not (path / ADMISSIONS_FILE).exists():
+        if source is None:
+            raise FileNotFoundError(f"No MIMIC store at {path} and no source payload given")
+        convert_payload(iter_payload(source), path)
+    return MimicStore(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the MIMIC payload to a columnar store.")
+    parser.add_argument("source", help="payload_mimic3.json (JSON array) or a .jsonl file")
+    parser.add_argument("--out", required=True, help="Store directory")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    counts = convert_payload(iter_payload(args.source), args.out, args.batch_size)
+    print(json.dumps({"store": args.out, **counts}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""
+Shared Agent Utilities
+
+Helpers shared by the agent packages in this directory (model callbacks,
+prompt compaction, model selection, adaptive concurrency limits, response
+cache, per-patient incremental re-analysis, tracing). This package does not
+define an agent.
+"""
+
+from .callbacks import after_model_callbacks, before_model_callbacks
+from .compaction import compact_admission, compact_before_model, estimate_tokens
+from .concurrency import LimitedLlm
+from .llm_cache import LlmCacheMiss
+from .models import CascadeLlm, get_model
@@ -0,0 +1,52 @@
+"""
+Model Callbacks
+
+The before/after model callback chains attached to every LlmAgent in the
+team. ADK runs the callbacks in order until one returns a response, so the
+order matters: the prompt is compacted before it is used as a cache key.
+
+Agents whose output is cached per patient in incremental mode (see
+incremental.py) also get the before/after agent callbacks below, and agents
+with tools the before/after tool callbacks that record and replay their
+results (llm_cache.py).
+"""
+
+from typing import Callable, List
+
+from .compaction import compact_before_model
+from .incremental import reuse_before_agent, store_after_agent, strip_current_prescription
+from .llm_cache import cache_after_model, cache_after_tool, cache_before_model, cache_before_tool
+
+
+def before_model_callbacks(stable_input: bool = False) -> List[Callable]:
+    """
+    Callbacks for ``LlmAgent(before_model_callback=...)``. ``stable_input``
+    drops the current prescription from the prompt in incremental mode.
+    """
+    callbacks = [compact_before_model, cache_before_model]
+    return [strip_current_prescription] + callbacks if stable_input else callbacks
+
+
+def after_model_callbacks() -> List[Callable]:
+    """Callbacks for ``LlmAgent(after_model_callback=...)``."""
+    return [cache_after_model]
+
+
+def before_agent_callbacks(output_key: str, scope: str) -> List[Callable]:
+    """Callbacks for ``LlmAgent(before_agent_callback=...)``: reuse ``output_key`` (incremental.SCOPES)."""
+    return [reuse_before_agent(output_key, scope)]
+
+
+def after_agent_callbacks(output_key: str, scope: str) -> List[Callable]:
+    """Callbacks for ``LlmAgent(after_agent_callback=...)``: cache ``output_key`` after a miss."""
+    return [store_after_agent(output_key, scope)]
+
+
+def before_tool_callbacks() -> List[Callable]:
+    """Callbacks for ``LlmAgent(before_tool_callback=...)`` of agents with tools: replay cached results."""
+    return [cache_before_tool]
+
+
+def after_tool_callbacks() -> List[Callable]:
+    """Callbacks for ``LlmAgent(after_tool_callback=...)`` of agents with tools: record results."""
+    return [cache_after_tool]
@@ -0,0 +1,255 @@
+"""
+Context Compaction
+
+This module shrinks the admission text sent to the agents before each model
+call. MIMIC admissions repeat the same prescription line many times and pad
+every line with dashes, so the compactor:
+
+- collapses identical prescriptions (same drug, type, dose and route) into a
+  single counted entry with the merged start/stop date range;
+- strips separators, empty fields (``Form: None``) and midnight timestamps;
+- optionally enforces a per-agent token budget by dropping the lowest
+  priority prescription entries (BASE solutions and older orders first).
+
+The ``current_prescription`` section is never touched.
+
+Configuration (environment variables):
+    CONTEXT_COMPACTION: "0"/"false"/"off" disables compaction (default: on).
+    COMPACTION_TOKEN_BUDGET: default token budget for every agent (default: none).
+    COMPACTION_TOKEN_BUDGETS: per-agent budgets, e.g.
+        "drug_analysis_agent=400,general_health_agent=1500".
+"""
+
+import logging
+import math
+import os
+import re
+from typing import Dict, List, Optional, Union
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+
+from .tracing import set_attributes
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+CHARS_PER_TOKEN = 4
+
+# Lower rank = kept first when a token budget forces entries out.
+DRUG_TYPE_PRIORITY = {"MAIN": 0, "ADDITIVE": 1, "BASE": 2}
+
+_PRESCRIPTION_RE = re.compile(
+    r"^\s*-\s*Drug: (?P<drug>.*?), Type: (?P<drug_type>[^,]*), "
+    r"Dose: (?P<dose>.*?), Form: (?P<form>.*?), Route: (?P<route>[^,]*), "
+    r"Start: (?P<start>[^,]*), Stop: (?P<stop>.*?)-*\s*$"
+)
+_PRESCRIPTIONS_HEADER = "Prescriptions:"
+_SEPARATOR_RE = re.compile(r"^\s*-{4,}\s*$")
+_EMPTY_FIELD_RE = re.compile(r"^[A-Za-z][\w ()]*: (None|nan|)\s*$")
+_MIDNIGHT = " 00:00:00"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for budgets and reports."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _is_empty(value: Optional[str]) -> bool:
+    return value is None or value.strip() in ("", "None", "nan")
+
+
+def _short_date(value: str) -> str:
+    value = value.strip()
+    return value[: -len(_MIDNIGHT)] if value.endswith(_MIDNIGHT) else value
+
+
+class _PrescriptionEntry:
+    """One collapsed prescription: identical orders merged with a count and date range."""
+
+    def __init__(self, match: re.Match, order: int):
+        self.drug = match.group("drug").strip()
+        self.drug_type = match.group("drug_type").strip()
+        self.dose = match.group("dose").strip()
+        self.form = match.group("form").strip()
+        self.route = match.group("route").strip()
+        self.start = _short_date(match.group("start"))
+        self.stop = _short_date(match.group("stop"))
+        self.count = 1
+        self.order = order
+
+    @property
+    def key(self) -> tuple:
+        return (self.drug, self.drug_type, self.dose, self.form, self.route)
+
+    def merge(self, other: "_PrescriptionEntry") -> None:
+        self.count += 1
+        if not _is_empty(other.start) and (_is_empty(self.start) or other.start < self.start):
+            self.start = other.start
+        if not _is_empty(other.stop) and (_is_empty(self.stop) or other.stop > self.stop):
+            self.stop = other.stop
+        self.order = max(self.order, other.order)
+
+    def priority(self) -> tuple:
+        # MAIN drugs first, then the most recent orders.
+        return (DRUG_TYPE_PRIORITY.get(self.drug_type.upper(), len(DRUG_TYPE_PRIORITY)),
+                -self.order)
+
+    def render(self, with_form: bool = False) -> str:
+        fields = [self.drug, self.drug_type, self.dose]
+        if with_form:
+            fields.append("-" if _is_empty(self.form) else self.form)
+        fields.append(self.route)
+        if self.start == self.stop or _is_empty(self.stop):
+            fields.append(self.start)
+        else:
+            fields.append(f"{self.start} to {self.stop}")
+        line = "  - " + " | ".join(fields)
+        return f"{line} | x{self.count}" if self.count > 1 else line
+
+
+class _PrescriptionBlock:
+    """A run of consecutive prescription lines in the input text."""
+
+    def __init__(self):
+        self.entries: List[_PrescriptionEntry] = []
+        self._by_key: Dict[tuple, _PrescriptionEntry] = {}
+        self.omitted = 0
+
+    def add(self, entry: _PrescriptionEntry) -> None:
+        existing = self._by_key.get(entry.key)
+        if existing is None:
+            self._by_key[entry.key] = entry
+            self.entries.append(entry)
+        else:
+            existing.merge(entry)
+
+    def drop(self, entry: _PrescriptionEntry) -> None:
+        self.entries.remove(entry)
+        self.omitted += entry.count
+
+    def render(self) -> str:
+        # The form column is only emitted when some entry has one; the header always matches the rows.
+        with_form = any(not _is_empty(entry.form) for entry in self.entries)
+        columns = "drug | type | dose | " + ("form | " if with_form else "") + "route | period | count"
+        lines = [f"{_PRESCRIPTIONS_HEADER} ({columns})"]
+        lines.extend(entry.render(with_form) for entry in self.entries)
+        if self.omitted:
+            lines.append(f"  ({self.omitted} lower-priority prescription lines omitted)")
+        return "\n".join(lines)
+
+
+def _parse(text: str) -> List[Union[str, _PrescriptionBlock]]:
+    """Split text into plain lines and prescription blocks."""
+    segments: List[Union[str, _PrescriptionBlock]] = []
+    block: Optional[_PrescriptionBlock] = None
+    order = 0
+
+    for line in text.splitlines():
+        if line.startswith(_PRESCRIPTIONS_HEADER):
+            block = _PrescriptionBlock()
+            segments.append(block)
+            line = line[len(_PRESCRIPTIONS_HEADER):]
+            if not line.strip():
+                continue
+
+        match = _PRESCRIPTION_RE.match(line)
+        if match:
+            if block is None:
+                block = _PrescriptionBlock()
+                segments.append(block)
+            block.add(_PrescriptionEntry(match, order))
+            order += 1
+            continue
+
+        block = None
+        if _SEPARATOR_RE.match(line) or _EMPTY_FIELD_RE.match(line):
+            continue
+        segments.append(line)
+
+    return segments
+
+
+def _render(segments: List[Union[str, _PrescriptionBlock]]) -> str:
+    return "\n".join(s if isinstance(s, str) else s.render() for s in segments).strip() + "\n"
+
+
+def compact_admission(text: str, token_budget: Optional[int] = None) -> str:
+    """
+    Compact an admission/prompt text.
+
+    Args:
+        text: Raw agent input (``admission_str`` plus current prescription).
+        token_budget: Optional upper bound (estimated tokens) for the result.
+            Prescription entries are dropped lowest-priority first until the
+            text fits; everything else is always kept.
+
+    Returns:
+        str: The compacted text. Text without prescription lines is returned
+        unchanged.
+    """
+    if "Drug:" not in text:
+        return text
+
+    segments = _parse(text)
+    blocks = [s for s in segments if isinstance(s, _PrescriptionBlock)]
+    if not any(block.entries for block in blocks):
+        return text
+
+    compacted = _render(segments)
+    if token_budget is None or estimate_tokens(compacted) <= token_budget:
+        return compacted
+
+    candidates = sorted(
+        ((entry, block) for block in blocks for entry in block.entries),
+        key=lambda item: item[0].priority(),
+        reverse=True,
+    )
+    for entry, block in candidates:
+        block.drop(entry)
+        compacted = _render(segments)
+        if estimate_tokens(compacted) <= token_budget:
+            break
+    return compacted
+
+
+def _enabled() -> bool:
+    return os.getenv("CONTEXT_COMPACTION", "1").strip().lower() not in ("0", "false", "off", "no")
+
+
+def get_token_budget(agent_name: str) -> Optional[int]:
+    """Token budget for an agent from COMPACTION_TOKEN_BUDGETS / COMPACTION_TOKEN_BUDGET."""
+    for item in os.getenv("COMPACTION_TOKEN_BUDGETS", "").split(","):
+        name, _, value = item.partition("=")
+        if name.strip() == agent_name and value.strip():
+            return int(value)
+    default = os.getenv("COMPACTION_TOKEN_BUDGET", "").strip()
+    return int(default) if default else None
+
+
+def compact_before_model(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """
+    before_model_callback that compacts the user turns of the request in place.
+
+    Only the outgoing request is rewritten; the session history keeps the
+    original text so every agent compacts against its own budget.
+    """
+    if not _enabled():
+        return None
+
+    budget = get_token_budget(callback_context.agent_name)
+    for content in llm_request.contents:
+        if content.role != "user" or not content.parts:
+            continue
+        for part in content.parts:
+            if not part.text:
+                continue
+            compacted = compact_admission(part.text, budget)
+            if compacted is not part.text:
+                before, after = estimate_tokens(part.text), estimate_tokens(compacted)
+                logger.debug("Compacted input for %s: %d -> %d tokens", callback_context.agent_name, before, after)
+                set_attributes(**{"compaction.tokens_before": before, "compaction.tokens_after": after})
+                part.text = compacted
+    return None
@@ -0,0 +1,327 @@
+"""
+Adaptive Concurrency Limits
+
+All agents share one Gemini quota, and a batch of parallel analyses used to
+send every specialist and synthesizer call at once: the quota answered with
+bursts of 429s, and retries made the bursts worse. With LLM_ADAPTIVE_LIMIT=1,
+every model call (see ``get_model``) and RENAME embedding call takes a slot
+from a process-wide limiter for its model, and calls over the limit wait in
+FIFO order.
+
+The limit adapts by AIMD (additive increase, multiplicative decrease):
+
+- a successful call made while the limit was in use raises the limit by
+  1/limit (about +1 per limit's worth of calls), up to its maximum;
+- a 429 / RESOURCE_EXHAUSTED, a timeout, or a latency spike multiplies it by
+  LLM_LIMIT_BACKOFF, once per congestion event: failures of calls started
+  before the last decrease do not decrease it again. A spike is recent
+  latency above LLM_LATENCY_TOLERANCE times the long-run average of the same
+  caller (agent), since agents sharing a model generate answers of very
+  different lengths.
+
+A model call rejected with a 429 is retried (LLM_MAX_RETRIES times, with
+jittered exponential backoff) through the limiter, so retries queue behind
+the reduced limit instead of adding to the burst.
+
+The limit, in-flight calls and queueing delay per model are OpenTelemetry
+metrics (``llm.concurrency.limit``, ``llm.concurrency.inflight``,
+``llm.concurrency.queue_delay``), and the queueing delay and limit are set
+on the model call's span.
+
+Configuration (environment variables):
+    LLM_ADAPTIVE_LIMIT: "1" enables the limiters (default: disabled).
+    LLM_LIMITS: per-model "initial:max" limits, e.g.
+        "gemini-2.5-flash=4:16,models/gemini-embedding-001=8:32".
+    LLM_LIMIT_DEFAULT: "initial:max" of models not listed (default: 8:64).
+    LLM_LIMIT_BACKOFF: multiplicative decrease (default: 0.7).
+    LLM_LATENCY_TOLERANCE: latency spike threshold (default: 2.0).
+    LLM_MAX_RETRIES: retries of a model call rejected with 429 (default: 2).
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator, Deque, Dict, List, Optional, Tuple, Union
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.models.registry import LLMRegistry
+from opentelemetry import metrics
+
+from .tracing import set_attributes
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+DEFAULT_LIMITS = "8:64"
+MIN_LIMIT = 1
+# Smoothing of the recent and long-run latency averages.
+SHORT_ALPHA = 0.2
+LONG_ALPHA = 0.02
+# Latency samples before spikes are detected.
+WARMUP_SAMPLES = 10
+RETRY_BASE_S = 1.0
+RETRY_MAX_S = 20.0
+OVERLOAD_NAMES = ("ResourceExhausted", "TooManyRequests", "DeadlineExceeded", "Timeout")
+
+OK, OVERLOAD, ERROR, CANCELLED = "ok", "overload", "error", "cancelled"
+
+
+def enabled() -> bool:
+    return os.getenv("LLM_ADAPTIVE_LIMIT", "0").strip().lower() in ("1", "true", "on", "yes")
+
+
+def _parse_limits(spec: str) -> Tuple[int, int]:
+    initial, _, maximum = spec.partition(":")
+    return int(initial), int(maximum or initial)
+
+
+def limits_for(model: str) -> Tuple[int, int]:
+    """(initial, max) limit of a model from LLM_LIMITS / LLM_LIMIT_DEFAULT."""
+    for item in os.getenv("LLM_LIMITS", "").split(","):
+        name, _, spec = item.partition("=")
+        if spec and name.strip() == model:
+            return _parse_limits(spec)
+    return _parse_limits(os.getenv("LLM_LIMIT_DEFAULT", DEFAULT_LIMITS))
+
+
+def is_overload(error: BaseException) -> bool:
+    """429 / RESOURCE_EXHAUSTED or a timeout, from the genai, api_core, httpx or asyncio clients."""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+        return True
+    if getattr(error, "code", None) in (429, 504) or getattr(error, "status_code", None) in (429, 504):
+        return True
+    text = f"{type(error).__name__} {error}"
+    return "RESOURCE_EXHAUSTED" in text or any(name in type(error).__name__ for name in OVERLOAD_NAMES)
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit with a FIFO queue, shared by all event loops of the process."""
+
+    def __init__(self, name: str, initial: int, max_limit: int, min_limit: int = MIN_LIMIT,
+                 backoff: Optional[float] = None, tolerance: Optional[float] = None):
+        self.name = name
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff if backoff is not None else float(os.getenv("LLM_LIMIT_BACKOFF", "0.7"))
+        self.tolerance = tolerance if tolerance is not None else float(os.getenv("LLM_LATENCY_TOLERANCE", "2.0"))
+        self.inflight = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+        # Recent and long-run latency and sample count per caller.
+        self._latency: Dict[str, List[float]] = {}
+        self._last_decrease = 0.0
+        self.stats = {"calls": 0, "queued": 0, "overloads": 0, "decreases": 0, "queue_ms_total": 0.0,
+                      "queue_ms_max": 0.0}
+
+    # --- Slots ---
+    async def acquire(self) -> float:
+        """Waits for a slot; returns the time (monotonic) the call may start."""
+        queued_at = time.monotonic()
+        with self._lock:
+            self.stats["calls"] += 1
+            if not self._waiters and self.inflight < int(self.limit):
+                self.inflight += 1
+                self._record_queue(0.0)
+                return queued_at
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+            self.stats["queued"] += 1
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    self.inflight -= 1
+                    self._wake()
+                else:
+                    self._waiters.remove(waiter)
+            raise
+        started = time.monotonic()
+        with self._lock:
+            self._record_queue((started - queued_at) * 1000)
+        return started
+
+    def _record_queue(self, queue_ms: float) -> None:
+        self.stats["queue_ms_total"] += queue_ms
+        self.stats["queue_ms_max"] = max(self.stats["queue_ms_max"], queue_ms)
+        _queue_delay.record(queue_ms, {"gen_ai.request.model": self.name})
+        set_attributes(**{"llm.queue_ms": round(queue_ms, 1), "llm.concurrency_limit": int(self.limit)})
+
+    def release(self, started: float, outcome: str, caller: str = "") -> None:
+        """Frees a slot and adapts the limit to the call's outcome (OK, OVERLOAD, ERROR or CANCELLED)."""
+        now = time.monotonic()
+        with self._lock:
+            was_full = self.inflight >= self.limit / 2
+            self.inflight -= 1
+            if outcome == OVERLOAD:
+                self.stats["overloads"] += 1
+                self._decrease(started, now)
+            elif outcome == OK:
+                if self._spike(caller, now - started):
+                    self._decrease(started, now)
+                elif was_full:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._wake()
+
+    def _spike(self, caller: str, latency_s: float) -> bool:
+        averages = self._latency.get(caller)
+        if averages is None:
+            self._latency[caller] = [latency_s, latency_s, 1]
+            return False
+        averages[0] += SHORT_ALPHA * (latency_s - averages[0])
+        averages[1] += LONG_ALPHA * (latency_s - averages[1])
+        averages[2] += 1
+        return averages[2] > WARMUP_SAMPLES and averages[0] > self.tolerance * averages[1]
+
+    def _decrease(self, started: float, now: float) -> None:
+        if started < self._last_decrease:
+            return
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        self._last_decrease = now
+        self.stats["decreases"] += 1
+        logger.info("Concurrency limit of %s lowered to %.1f", self.name, self.limit)
+
+    def _wake(self) -> None:
+        while self._waiters and self.inflight < int(self.limit):
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+            self.inflight += 1
+            waiter.loop.call_soon_threadsafe(_grant, waiter.future)
+
+    @asynccontextmanager
+    async def slot(self, caller: str = "") -> AsyncIterator[None]:
+        """``async with limiter.slot(caller):`` around one call; its exception decides the outcome."""
+        started = await self.acquire()
+        outcome = CANCELLED
+        try:
+            yield
+            outcome = OK
+        except Exception as e:
+            outcome = OVERLOAD if is_overload(e) else ERROR
+            raise
+        finally:
+            self.release(started, outcome, caller)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self.stats["calls"]
+            return {
+                "limit": round(self.limit, 2),
+                "inflight": self.inflight,
+                "waiting": len(self._waiters),
+                **{k: round(v, 1) if isinstance(v, float) else v for k, v in self.stats.items()},
+                "queue_ms_mean": round(self.stats["queue_ms_total"] / calls, 1) if calls else 0.0,
+            }
+
+
+def _grant(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_for(model: str) -> AdaptiveLimiter:
+    """The process-wide limiter of a model (created on first use with limits_for)."""
+    with _limiters_lock:
+        if model not in _limiters:
+            initial, max_limit = limits_for(model)
+            _limiters[model] = AdaptiveLimiter(model, initial, max_limit)
+        return _limiters[model]
+
+
+def report() -> Dict[str, Dict[str, Any]]:
+    """Limit, in-flight calls, queue and counters per model."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.report() for limiter in limiters}
+
+
+@asynccontextmanager
+async def model_slot(model: str, caller: str = "") -> AsyncIterator[None]:
+    """A slot of ``model``'s limiter around a call made outside ADK (e.g. embeddings); no-op when disabled."""
+    if not enabled():
+        yield
+        return
+    async with limiter_for(model).slot(caller):
+        yield
+
+
+def retry_delay(attempt: int) -> float:
+    return random.uniform(0.5, 1.0) * min(RETRY_MAX_S, RETRY_BASE_S * 2 ** attempt)
+
+
+class LimitedLlm(BaseLlm):
+    """Runs a model's calls through its limiter, retrying 429s through it as well."""
+
+    llm: BaseLlm
+    caller: str = ""
+    """Agent making the calls (latency spikes are detected per caller)."""
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        limiter = limiter_for(self.llm.model)
+        max_retries = int(os.getenv("LLM_MAX_RETRIES", "2"))
+        for attempt in itertools.count():
+            yielded = False
+            try:
+                async with limiter.slot(self.caller):
+                    async for response in self.llm.generate_content_async(llm_request, stream=stream):
+                        yielded = True
+                        yield response
+                return
+            except Exception as e:
+                if yielded or attempt >= max_retries or not is_overload(e):
+                    raise
+                logger.debug("Retrying %s after %s (attempt %d)", self.llm.model, type(e).__name__, attempt + 1)
+            set_attributes(**{"llm.retries": attempt + 1})
+            await asyncio.sleep(retry_delay(attempt))
+
+    def connect(self, llm_request: LlmRequest):
+        return self.llm.connect(llm_request)
+
+
+def limited(model: Union[str, BaseLlm], caller: str = "") -> Union[str, BaseLlm]:
+    """``model`` behind its limiter (a model name is resolved through ADK's registry); as is when disabled."""
+    if not enabled():
+        return model
+    llm = LLMRegistry.new_llm(model) if isinstance(model, str) else model
+    return LimitedLlm(model=llm.model, llm=llm, caller=caller)
+
+
+# --- Metrics ---
+_meter = metrics.get_meter("health_agents.concurrency")
+_queue_delay = _meter.create_histogram(
+    "llm.concurrency.queue_delay", unit="ms", description="Time model calls waited for a concurrency slot")
+
+
+def _observe(field: str):
+    def callback(options):
+        return [metrics.Observation(values[field], {"gen_ai.request.model": name})
+                for name, values in report().items()]
+    return callback
+
+
+_meter.create_observable_gauge("llm.concurrency.limit", callbacks=[_observe("limit")], unit="{call}",
+                               description="Current adaptive concurrency limit per model")
+_meter.create_observable_gauge("llm.concurrency.inflight", callbacks=[_observe("inflight")], unit="{call}",
+                               description="Model calls in flight per model")
@@ -0,0 +1,228 @@
+"""
+Incremental Re-analysis
+
+Across a patient's encounters the admission history stays the same while the
+``current_prescription`` changes, yet every run re-analyzed the whole
+admission. In incremental mode the analyses that do not depend on the new
+prescription are cached per patient and reused, so a repeat encounter only
+pays for the analysis of the delta:
+
+- ``stable`` analyses (general_health_agent): the agent sees the admission
+  without the current prescription (``strip_current_prescription``), so its
+  report is a function of the history alone. It is keyed by that text and
+  reused for every new prescription of the same history.
+- ``prescription`` verdicts (drug, dose and route analyzers): keyed by the
+  prescription (drug, type, dose, unit, form, route; not the dates) and by
+  the patient's profile, i.e. the admission fields and the set of drugs on
+  the medication list. A prescription analyzed before is reused as long as
+  labs and medications are unchanged; a new drug on the list invalidates the
+  verdicts, since its interactions may change them.
+
+The treatment assessment and the synthesizers always run: they relate the
+new prescription to the (cached) reports, interactions included.
+
+Each patient (``Subject ID``) has one JSON file holding the analyses for its
+latest history and latest profile; older ones are replaced, so the cache
+grows with the number of patients only. Concurrent writers for the same
+patient may drop each other's entries, which only costs a later miss. Clear
+INCREMENTAL_CACHE_DIR when an agent's prompt or model changes.
+
+Configuration (environment variables):
+    INCREMENTAL_ANALYSIS: "1"/"true"/"on" enables reuse (default: off).
+    INCREMENTAL_CACHE_DIR: cache directory (default: .incremental_cache).
+"""
+
+import ast
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from .tracing import set_attributes
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+STABLE = "stable"
+PRESCRIPTION = "prescription"
+SCOPES = (STABLE, PRESCRIPTION)
+DEFAULT_CACHE_DIR = ".incremental_cache"
+CURRENT_MARKER = "current_prescription:"
+PRESCRIPTIONS_HEADER = "Prescriptions:"
+# Fields of the current prescription a verdict depends on (dates excluded).
+PRESCRIPTION_FIELDS = ("drug", "drug_type", "dose_val", "dose_unit", "form", "route")
+
+_SUBJECT_RE = re.compile(r"Subject ID:\s*(\S+)")
+_DRUG_RE = re.compile(r"Drug: (.*?), Type:")
+
+_lock = threading.Lock()
+
+stats = {"hits": 0, "misses": 0, "writes": 0}
+
+
+def incremental_enabled() -> bool:
+    return os.getenv("INCREMENTAL_ANALYSIS", "").strip().lower() in ("1", "true", "on")
+
+
+def cache_dir() -> Path:
+    return Path(os.getenv("INCREMENTAL_CACHE_DIR", DEFAULT_CACHE_DIR))
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def split_input(text: str) -> Optional[Tuple[str, str]]:
+    """(history, current prescription) of an agent input, or None without a current prescription."""
+    index = text.rfind(CURRENT_MARKER)
+    if index < 0:
+        return None
+    return text[:index].strip(), text[index + len(CURRENT_MARKER):].strip()
+
+
+def prescription_key(current: str) -> str:
+    """The current prescription's fields that matter for a verdict, normalized."""
+    try:
+        prescription = ast.literal_eval(current)
+    except (ValueError, SyntaxError):
+        prescription = None
+    if isinstance(prescription, dict):
+        return json.dumps({field: prescription.get(field) for field in PRESCRIPTION_FIELDS}, sort_keys=True)
+    return " ".join(current.split())
+
+
+def profile_key(history: str) -> str:
+    """Admission fields (labs, demographics) plus the set of drugs on the medication list."""
+    profile, _, prescriptions = history.partition(PRESCRIPTIONS_HEADER)
+    drugs = sorted({drug.strip() for drug in _DRUG_RE.findall(prescriptions)})
+    return _hash(json.dumps([" ".join(profile.split()), drugs]))
+
+
+def _patient_path(history: str) -> Path:
+    match = _SUBJECT_RE.search(history)
+    patient = match.group(1) if match else _hash(history.partition(PRESCRIPTIONS_HEADER)[0])
+    return cache_dir() / f"{_hash(patient)[:24]}.json"
+
+
+def _slot(callback_context: CallbackContext, scope: str) -> Optional[Tuple[Path, str, str, str]]:
+    """(patient file, scope, section key, entry key) for this run's input."""
+    content = callback_context.user_content
+    text = "\n".join(part.text for part in (content.parts or []) if part.text) if content else ""
+    parts = split_input(text)
+    if parts is None:
+        return None
+    history, current = parts
+    if scope == STABLE:
+        return _patient_path(history), scope, _hash(history), ""
+    return _patient_path(history), scope, profile_key(history), prescription_key(current)
+
+
+def _read(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable incremental cache %s: %s", path, e)
+        return {}
+
+
+def load(slot: Tuple[Path, str, str, str], output_key: str) -> Any:
+    path, scope, section_key, entry_key = slot
+    section = _read(path).get(scope, {})
+    if section.get("key") != section_key:
+        return None
+    return section.get("entries", {}).get(entry_key, {}).get(output_key)
+
+
+def store(slot: Tuple[Path, str, str, str], output_key: str, value: Any) -> None:
+    path, scope, section_key, entry_key = slot
+    with _lock:
+        record = _read(path)
+        section = record.get(scope, {})
+        if section.get("key") != section_key:
+            # History or profile changed: the previous analyses no longer apply.
+            section = {"key": section_key, "entries": {}}
+        section["entries"].setdefault(entry_key, {})[output_key] = value
+        record[scope] = section
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write atomically so concurrent runs never read a partial file.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+def reuse_before_agent(output_key: str, scope: str) -> Callable[[CallbackContext], Optional[types.Content]]:
+    """before_agent_callback: skip the agent and serve its cached output for this patient."""
+    if scope not in SCOPES:
+        raise ValueError(f"Invalid incremental scope '{scope}', expected one of {SCOPES}")
+
+    def callback(callback_context: CallbackContext) -> Optional[types.Content]:
+        if not incremental_enabled():
+            return None
+        slot = _slot(callback_context, scope)
+        if slot is None:
+            return None
+        value = load(slot, output_key)
+        set_attributes(**{"incremental.scope": scope, "incremental.hit": value is not None})
+        if value is None:
+            stats["misses"] += 1
+            return None
+        stats["hits"] += 1
+        callback_context.state[output_key] = value
+        text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+        return types.Content(role="model", parts=[types.Part(text=text)])
+
+    return callback
+
+
+def store_after_agent(output_key: str, scope: str) -> Callable[[CallbackContext], None]:
+    """
+    after_agent_callback: cache the output of an agent that ran on a miss.
+
+    A hit ends the agent before after_agent, so reaching it means a miss. The
+    slot is recomputed from the run's input rather than carried over from
+    before_agent, so an agent that fails or is cancelled leaves nothing behind.
+    """
+    if scope not in SCOPES:
+        raise ValueError(f"Invalid incremental scope '{scope}', expected one of {SCOPES}")
+
+    def callback(callback_context: CallbackContext) -> None:
+        if not incremental_enabled():
+            return None
+        slot = _slot(callback_context, scope)
+        value = callback_context.state.get(output_key)
+        if slot is None or value is None:
+            return None
+        store(slot, output_key, value)
+        stats["writes"] += 1
+        return None
+
+    return callback
+
+
+def strip_current_prescription(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """before_model_callback: in incremental mode, drop the current prescription from the prompt."""
+    if not incremental_enabled():
+        return None
+    for content in llm_request.contents:
+        if content.role != "user" or not content.parts:
+            continue
+        for part in content.parts:
+            parts = split_input(part.text) if part.text else None
+            if parts is not None:
+                part.text = parts[0]
+    return None
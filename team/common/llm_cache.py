@@ -0,0 +1,217 @@
+"""
+LLM Response Cache
+
+Record/replay cache for model calls, hooked into the agents' model callbacks.
+Responses are stored on disk as JSON, keyed by a hash of the model name,
+system instruction, rendered prompt (contents), output schema and tools.
+
+Modes (LLM_CACHE_MODE):
+    passthrough (default): no caching, every call goes to the model.
+    record: serve hits from the cache, call the model on a miss and store the response.
+    replay: serve hits from the cache, never call the model; a miss raises LlmCacheMiss.
+
+Tool results are recorded and replayed the same way (``cache_before_tool`` /
+``cache_after_tool``), keyed by tool name and arguments, so a replay makes no
+network call at all (e.g. query_medical_knowledge's embedding and Pinecone
+calls). Results reporting ``"status": "error"`` are not stored.
+
+LLM_CACHE_DIR sets the cache directory (default: .llm_cache).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.tools import BaseTool, ToolContext
+from pydantic import BaseModel
+
+from .tracing import set_attributes, span
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+MODES = ("passthrough", "record", "replay")
+DEFAULT_CACHE_DIR = ".llm_cache"
+
+# State key carrying the key of a miss from before_model to after_model. Both
+# callbacks write to the same model response event; temp: state is never
+# stored in the session, so nothing outlives a call that fails or is cancelled.
+PENDING_KEY = "temp:llm_cache_key"
+
+TOOLS_DIR = "tools"
+
+stats = {"hits": 0, "misses": 0, "writes": 0, "tool_hits": 0, "tool_misses": 0, "tool_writes": 0}
+
+
+class LlmCacheMiss(RuntimeError):
+    """Raised in replay mode when a model or tool call is not in the cache."""
+
+
+def cache_mode() -> str:
+    mode = os.getenv("LLM_CACHE_MODE", "passthrough").strip().lower()
+    if mode not in MODES:
+        raise ValueError(f"Invalid LLM_CACHE_MODE '{mode}', expected one of {MODES}")
+    return mode
+
+
+def cache_dir() -> Path:
+    return Path(os.getenv("LLM_CACHE_DIR", DEFAULT_CACHE_DIR))
+
+
+def _dump(value: Any) -> Any:
+    if isinstance(value, type) and issubclass(value, BaseModel):
+        return value.model_json_schema()
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, (list, tuple)):
+        return [_dump(v) for v in value]
+    return value
+
+
+def cache_key(llm_request: LlmRequest) -> str:
+    """Stable hash of everything that determines the model response."""
+    config = llm_request.config
+    tools = []
+    for tool in (config.tools or []) if config else []:
+        for declaration in getattr(tool, "function_declarations", None) or []:
+            tools.append(declaration.name)
+    payload = {
+        "model": llm_request.model,
+        "instruction": _dump(config.system_instruction) if config else None,
+        "contents": _dump(llm_request.contents),
+        "schema": _dump(config.response_schema) if config else None,
+        "tools": sorted(tools),
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _path(key: str) -> Path:
+    return cache_dir() / key[:2] / f"{key}.json"
+
+
+def load(key: str) -> Optional[LlmResponse]:
+    path = _path(key)
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return LlmResponse.model_validate(json.load(f)["response"])
+
+
+def store(key: str, response: LlmResponse, agent_name: str = "") -> None:
+    path = _path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    record = {
+        "agent": agent_name,
+        "response": response.model_dump(mode="json", exclude_none=True),
+    }
+    # Write atomically so concurrent runs never read a partial file.
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def cache_before_model(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """before_model_callback: return the cached response, if any."""
+    mode = cache_mode()
+    if mode == "passthrough":
+        return None
+
+    key = cache_key(llm_request)
+    cached = load(key)
+    if cached is not None:
+        stats["hits"] += 1
+        # A hit skips ADK's call_llm span; record the served call instead.
+        usage = cached.usage_metadata
+        with span("call_llm (cached)", **{
+            "gen_ai.agent.name": callback_context.agent_name,
+            "gen_ai.request.model": llm_request.model,
+            "gen_ai.usage.input_tokens": usage.prompt_token_count if usage else None,
+            "gen_ai.usage.output_tokens": usage.candidates_token_count if usage else None,
+            "llm_cache.hit": True,
+        }):
+            return cached
+
+    stats["misses"] += 1
+    set_attributes(**{"llm_cache.hit": False})
+    if mode == "replay":
+        raise LlmCacheMiss(
+            f"No cached response for agent '{callback_context.agent_name}' (key {key}) "
+            f"in {cache_dir()}; run with LLM_CACHE_MODE=record first."
+        )
+    callback_context.state[PENDING_KEY] = key
+    return None
+
+
+def cache_after_model(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> Optional[LlmResponse]:
+    """after_model_callback: store the live response in record mode."""
+    if llm_response.partial:
+        return None
+    key = callback_context.state.get(PENDING_KEY)
+    if key is None or llm_response.error_code:
+        return None
+    store(key, llm_response, callback_context.agent_name)
+    stats["writes"] += 1
+    return None
+
+
+# --- Tool results ---
+def tool_cache_key(tool_name: str, args: Dict[str, Any]) -> str:
+    raw = json.dumps({"tool": tool_name, "args": args}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _tool_path(key: str) -> Path:
+    return cache_dir() / TOOLS_DIR / key[:2] / f"{key}.json"
+
+
+def cache_before_tool(tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext) -> Optional[Dict[str, Any]]:
+    """before_tool_callback: return the cached tool result, if any."""
+    mode = cache_mode()
+    if mode == "passthrough":
+        return None
+    key = tool_cache_key(tool.name, args)
+    path = _tool_path(key)
+    if path.exists():
+        stats["tool_hits"] += 1
+        set_attributes(**{"llm_cache.tool_hit": True})
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["result"]
+
+    stats["tool_misses"] += 1
+    set_attributes(**{"llm_cache.tool_hit": False})
+    if mode == "replay":
+        raise LlmCacheMiss(
+            f"No cached result for tool '{tool.name}' of agent '{tool_context.agent_name}' (key {key}) "
+            f"in {cache_dir()}; run with LLM_CACHE_MODE=record first."
+        )
+    return None
+
+
+def cache_after_tool(
+    tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext, tool_response: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """after_tool_callback: store the live tool result in record mode (ADK also calls it after a hit)."""
+    if cache_mode() != "record" or not isinstance(tool_response, dict) or tool_response.get("status") == "error":
+        return None
+    path = _tool_path(tool_cache_key(tool.name, args))
+    if path.exists():
+        return None
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"tool": tool.name, "args": args, "result": tool_response}, f, ensure_ascii=False, default=str)
+    os.replace(tmp, path)
+    stats["tool_writes"] += 1
+    return None
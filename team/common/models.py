@@ -0,0 +1,194 @@
+"""
+Model Selection
+
+Per-agent model configuration and the confidence-based model cascade.
+
+Model resolution for an agent (first match wins):
+    1. MODEL_<AGENT_NAME> environment variable, e.g. MODEL_DRUG_ANALYSIS_AGENT=gemini-2.5-flash
+    2. MODEL_CONFIG_FILE: JSON file mapping agent names (or "default") to models
+    3. GEMINI_MODEL environment variable
+    4. DEFAULT_MODEL
+
+Cascade mode (MODEL_CASCADE=1) applies to agents created with
+``get_model(name, cascade=True)``: the request first runs on
+CASCADE_FAST_MODEL and is re-run on CASCADE_STRONG_MODEL only when the fast
+answer reports a MEDIUM/HIGH level or low confidence. The Level/Confidence
+lines are removed from the answer that is returned, so they never reach the
+agent's output_key.
+
+Every model (the cascade's fast and strong models included) is wrapped in
+its adaptive concurrency limiter (concurrency.py) when LLM_ADAPTIVE_LIMIT=1.
+"""
+
+import copy
+import json
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import AsyncGenerator, Dict, Optional, Union
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.models.registry import LLMRegistry
+from pydantic import PrivateAttr
+
+from .concurrency import limited
+from .tracing import set_attributes
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+DEFAULT_MODEL = "gemini-2.0-flash"
+DEFAULT_FAST_MODEL = "gemini-2.0-flash-lite"
+DEFAULT_STRONG_MODEL = "gemini-2.5-flash"
+
+CASCADE_INSTRUCTION = (
+    "End your answer with exactly two lines:\n"
+    "Level: <LOW|MEDIUM|HIGH>\n"
+    "Confidence: <low|medium|high>"
+)
+ESCALATION_LEVELS = ("MEDIUM", "HIGH")
+
+_LEVEL_RE = re.compile(r"^\W*level\W*:\W*(low|medium|high)\b", re.IGNORECASE | re.MULTILINE)
+_CONFIDENCE_RE = re.compile(r"^\W*confidence\W*:\W*(low|medium|high)\b", re.IGNORECASE | re.MULTILINE)
+_CONTROL_LINE_RE = re.compile(r"^\W*(?:level|confidence)\W*:\W*(?:low|medium|high)\b.*$\n?",
+                              re.IGNORECASE | re.MULTILINE)
+
+
+@lru_cache(maxsize=None)
+def _load_config_file(path: str) -> Dict[str, str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _truthy(value: Optional[str]) -> bool:
+    return (value or "").strip().lower() in ("1", "true", "on", "yes")
+
+
+def resolve_model_name(agent_name: str, default: str = DEFAULT_MODEL) -> str:
+    """Model name configured for an agent (see module docstring for precedence)."""
+    override = os.getenv(f"MODEL_{agent_name.upper()}")
+    if override:
+        return override
+
+    config_path = os.getenv("MODEL_CONFIG_FILE")
+    if config_path:
+        config = _load_config_file(config_path)
+        if agent_name in config:
+            return config[agent_name]
+        if "default" in config:
+            return config["default"]
+
+    return os.getenv("GEMINI_MODEL", default)
+
+
+def cascade_enabled() -> bool:
+    return _truthy(os.getenv("MODEL_CASCADE"))
+
+
+def get_model(agent_name: str, default: str = DEFAULT_MODEL, cascade: bool = False) -> Union[str, BaseLlm]:
+    """
+    Model to pass to ``LlmAgent(model=...)`` for an agent.
+
+    Args:
+        agent_name: Name of the agent (used for MODEL_<AGENT_NAME> lookups).
+        default: Model used when nothing is configured.
+        cascade: Whether the agent may run in cascade mode.
+
+    Returns:
+        Union[str, BaseLlm]: A CascadeLlm when cascade mode is on, else the
+        model behind its concurrency limiter (a model name when disabled).
+    """
+    if cascade and cascade_enabled():
+        return CascadeLlm(
+            model=f"cascade:{agent_name}",
+            fast=os.getenv("CASCADE_FAST_MODEL", DEFAULT_FAST_MODEL),
+            strong=os.getenv("CASCADE_STRONG_MODEL", DEFAULT_STRONG_MODEL),
+        )
+    return limited(resolve_model_name(agent_name, default), caller=agent_name)
+
+
+def _response_text(response: LlmResponse) -> str:
+    if not response.content or not response.content.parts:
+        return ""
+    return "".join(part.text or "" for part in response.content.parts if not part.thought)
+
+
+def needs_escalation(text: str) -> bool:
+    """True when the answer reports MEDIUM/HIGH, low confidence, or no parsable verdict."""
+    level = _LEVEL_RE.findall(text)
+    confidence = _CONFIDENCE_RE.findall(text)
+    if not level or not confidence:
+        return True
+    return level[-1].upper() in ESCALATION_LEVELS or confidence[-1].lower() == "low"
+
+
+def strip_cascade_lines(response: LlmResponse) -> LlmResponse:
+    """Remove the Level/Confidence lines CASCADE_INSTRUCTION asks for from a response's text."""
+    if response.content and response.content.parts:
+        for part in response.content.parts:
+            if part.text and not part.thought:
+                text = _CONTROL_LINE_RE.sub("", part.text)
+                # Streamed chunks keep their whitespace; they are concatenated as-is.
+                part.text = text if response.partial else text.rstrip()
+    return response
+
+
+class CascadeLlm(BaseLlm):
+    """Runs a request on a fast model and escalates to a strong model when needed."""
+
+    fast: Union[str, BaseLlm]
+    strong: Union[str, BaseLlm]
+    # Model names resolved once, so every call reuses their client and connections.
+    _resolved: Dict[str, BaseLlm] = PrivateAttr(default_factory=dict)
+
+    def _llm(self, model: Union[str, BaseLlm]) -> BaseLlm:
+        if isinstance(model, str):
+            llm = self._resolved.get(model)
+            if llm is None:
+                llm = self._resolved[model] = LLMRegistry.new_llm(model)
+        else:
+            llm = model
+        return limited(llm, caller=self.model)
+
+    async def _generate(
+        self, llm: BaseLlm, llm_request: LlmRequest, stream: bool
+    ) -> AsyncGenerator[LlmResponse, None]:
+        llm_request.model = llm.model
+        async for response in llm.generate_content_async(llm_request, stream=stream):
+            yield response
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        llm_request.append_instructions([CASCADE_INSTRUCTION])
+        fast, strong = self._llm(self.fast), self._llm(self.strong)
+        strong_request = copy.deepcopy(llm_request)
+
+        # The decision needs the complete fast answer, so it is never streamed.
+        final: Optional[LlmResponse] = None
+        async for response in self._generate(fast, llm_request, stream=False):
+            final = response
+
+        has_function_call = final is not None and final.content and any(
+            part.function_call for part in (final.content.parts or [])
+        )
+        if final is not None and not final.error_code and (
+            has_function_call or not needs_escalation(_response_text(final))
+        ):
+            final.custom_metadata = {**(final.custom_metadata or {}),
+                                     "cascade_model": fast.model, "cascade_escalated": False}
+            set_attributes(**{"cascade.model": fast.model, "cascade.escalated": False})
+            yield strip_cascade_lines(final)
+            return
+
+        logger.debug("Cascade %s: escalating from %s to %s", self.model, fast.model, strong.model)
+        set_attributes(**{"cascade.model": strong.model, "cascade.escalated": True, "cascade.fast_model": fast.model})
+        fast_usage = (final.usage_metadata.model_dump(exclude_none=True)
+                      if final is not None and final.usage_metadata else None)
+        async for response in self._generate(strong, strong_request, stream=stream):
+            response.custom_metadata = {**(response.custom_metadata or {}),
+                                        "cascade_model": strong.model, "cascade_escalated": True,
+                                        "cascade_fast_model": fast.model,
+                                        "cascade_fast_usage": fast_usage}
+            yield strip_cascade_lines(response)
@@ -0,0 +1,34 @@
+"""
+Agent Tracing Helpers
+
+ADK already opens spans for the invocation, every agent
+(``invoke_agent <name>``), every model call (``call_llm``, with the model
+and token usage) and every tool (``execute_tool <name>``). These helpers add
+what ADK cannot see: response-cache hits, compaction savings, cascade
+escalations and the stages inside query_medical_knowledge.
+
+Only the OpenTelemetry API is used; without a configured TracerProvider
+(see adk_service.server) every call is a no-op.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from opentelemetry import trace
+
+tracer = trace.get_tracer("health_agents")
+
+
+def set_attributes(**attributes: Any) -> None:
+    """Add attributes (None values skipped) to the current span."""
+    current = trace.get_current_span()
+    if current.is_recording():
+        current.set_attributes({k: v for k, v in attributes.items() if v is not None})
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[trace.Span]:
+    with tracer.start_as_current_span(
+        name, attributes={k: v for k, v in attributes.items() if v is not None}
+    ) as current:
+        yield current
@@ -0,0 +1,235 @@
+"""
+Pooled A2A Client
+
+Builds the SUS / NHS compliance clients used by compliance_agent.
+
+Remote mode (default):
+    - The agent-card URL is configurable (SUS_A2A_AGENT_CARD_URL,
+      NHS_A2A_AGENT_CARD_URL, or COMPLIANCE_A2A_BASE_URL + /a2a/<system>).
+    - Agent cards are fetched once per process and cached for A2A_CARD_TTL_S
+      seconds; a stale card is still served while it is refreshed in the
+      background.
+    - All remote agents (including the fan-out copies) share one keep-alive
+      httpx connection pool instead of opening their own.
+
+In-process mode (COMPLIANCE_A2A_MODE=inprocess):
+    The agents from compliance_agents/<system> are imported and run directly,
+    with no A2A hop. Use it when compliance_agents is deployed alongside team/;
+    COMPLIANCE_AGENTS_PATH points to the directory that contains it (default:
+    the repository root).
+"""
+
+import asyncio
+import importlib
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import httpx
+from a2a.client.card_resolver import A2ACardResolver
+from a2a.client.client import ClientConfig as A2AClientConfig
+from a2a.client.client_factory import ClientFactory as A2AClientFactory
+from a2a.types import AgentCard
+from a2a.types import TransportProtocol as A2ATransport
+from google.adk.agents import BaseAgent
+from google.adk.agents.remote_a2a_agent import AGENT_CARD_WELL_KNOWN_PATH, RemoteA2aAgent
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+DEFAULT_A2A_BASE_URL = "https://a2a-server-health-894271896157.europe-west1.run.app"
+MODES = ("remote", "inprocess")
+DEFAULT_CARD_TTL_S = 300.0
+DEFAULT_TIMEOUT_S = 600.0
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY_S = 60.0
+
+
+def a2a_mode() -> str:
+    mode = os.getenv("COMPLIANCE_A2A_MODE", "remote").strip().lower()
+    if mode not in MODES:
+        raise ValueError(f"Invalid COMPLIANCE_A2A_MODE '{mode}', expected one of {MODES}")
+    return mode
+
+
+def agent_card_url(system: str) -> str:
+    """Agent-card URL for a health system ("sus" or "nhs")."""
+    explicit = os.getenv(f"{system.upper()}_A2A_AGENT_CARD_URL")
+    if explicit:
+        return explicit
+    base_url = os.getenv("COMPLIANCE_A2A_BASE_URL", DEFAULT_A2A_BASE_URL).rstrip("/")
+    return f"{base_url}/a2a/{system.lower()}{AGENT_CARD_WELL_KNOWN_PATH}"
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+# --- Shared HTTP client ---
+# One pool per event loop: httpx connections cannot be shared across loops.
+_client: Optional[Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = None
+
+
+def shared_httpx_client() -> httpx.AsyncClient:
+    """Process-wide keep-alive client for A2A traffic (card fetches and RPC calls)."""
+    global _client
+    loop = asyncio.get_running_loop()
+    if _client is None or _client[0] is not loop or _client[1].is_closed:
+        max_connections = int(os.getenv("A2A_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(_env_float("A2A_TIMEOUT_S", DEFAULT_TIMEOUT_S)),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=_env_float("A2A_KEEPALIVE_EXPIRY_S", DEFAULT_KEEPALIVE_EXPIRY_S),
+            ),
+        )
+        _client = (loop, client)
+    return _client[1]
+
+
+# --- Agent card cache ---
+class AgentCardCache:
+    """
+    TTL cache of agent cards keyed by URL.
+
+    A missing card is fetched inline (concurrent callers share one fetch). An
+    expired card is returned immediately and refreshed in the background; if
+    the refresh fails, the previous card keeps being served.
+    """
+
+    def __init__(self, ttl_s: Optional[float] = None):
+        self.ttl_s = ttl_s
+        self._cards: Dict[str, Tuple[AgentCard, float]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats = {"fetches": 0, "hits": 0, "background_refreshes": 0, "errors": 0}
+
+    def _ttl(self) -> float:
+        return self.ttl_s if self.ttl_s is not None else _env_float("A2A_CARD_TTL_S", DEFAULT_CARD_TTL_S)
+
+    async def _fetch(self, url: str) -> AgentCard:
+        parsed = urlparse(url)
+        if not parsed.scheme or not parsed.netloc:
+            raise ValueError(f"Invalid agent card URL: {url}")
+        resolver = A2ACardResolver(
+            httpx_client=shared_httpx_client(),
+            base_url=f"{parsed.scheme}://{parsed.netloc}",
+        )
+        card = await resolver.get_agent_card(relative_card_path=parsed.path)
+        self._cards[url] = (card, time.monotonic())
+        self.stats["fetches"] += 1
+        return card
+
+    async def _refresh(self, url: str) -> None:
+        try:
+            await self._fetch(url)
+            self.stats["background_refreshes"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning("Agent card refresh failed for %s, keeping the cached card: %s", url, e)
+        finally:
+            self._refreshing.discard(url)
+
+    async def get(self, url: str) -> AgentCard:
+        cached = self._cards.get(url)
+        if cached is None:
+            async with self._locks.setdefault(url, asyncio.Lock()):
+                cached = self._cards.get(url)
+                if cached is None:
+                    return await self._fetch(url)
+
+        card, fetched_at = cached
+        self.stats["hits"] += 1
+        if time.monotonic() - fetched_at > self._ttl() and url not in self._refreshing:
+            self._refreshing.add(url)
+            task = asyncio.create_task(self._refresh(url))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return card
+
+    def invalidate(self, url: Optional[str] = None) -> None:
+        if url is None:
+            self._cards.clear()
+        else:
+            self._cards.pop(url, None)
+
+
+card_cache = AgentCardCache()
+
+
+class PooledRemoteA2aAgent(RemoteA2aAgent):
+    """RemoteA2aAgent that resolves its card through card_cache and sends requests over the shared pool."""
+
+    async def _ensure_httpx_client(self) -> httpx.AsyncClient:
+        client = shared_httpx_client()
+        if self._httpx_client is not client or self._a2a_client_factory is None:
+            self._httpx_client = client
+            self._httpx_client_needs_cleanup = False
+            self._a2a_client_factory = A2AClientFactory(config=A2AClientConfig(
+                httpx_client=client,
+                streaming=False,
+                polling=False,
+                supported_transports=[A2ATransport.jsonrpc],
+            ))
+            self._a2a_client = None
+        return client
+
+    async def _resolve_agent_card(self) -> AgentCard:
+        if self._agent_card_source.startswith(("http://", "https://")):
+            return await card_cache.get(self._agent_card_source)
+        return await super()._resolve_agent_card()
+
+    async def _ensure_resolved(self) -> None:
+        source = self._agent_card_source
+        if self._is_resolved and source and source.startswith(("http://", "https://")):
+            card = await card_cache.get(source)
+            if card is not self._agent_card:
+                # The card was refreshed: rebuild the A2A client against it.
+                self._agent_card, self._a2a_client, self._is_resolved = card, None, False
+            elif self._httpx_client is not shared_httpx_client():
+                self._a2a_client, self._is_resolved = None, False
+        await super()._ensure_resolved()
+
+
+def import_compliance_module(name: str) -> ModuleType:
+    """``compliance_agents.<name>``, from the directory in COMPLIANCE_AGENTS_PATH (default: the repository root)."""
+    search_path = os.getenv("COMPLIANCE_AGENTS_PATH", str(Path(__file__).resolve().parents[2]))
+    if search_path not in sys.path:
+        sys.path.append(search_path)
+    return importlib.import_module(f"compliance_agents.{name}")
+
+
+def _import_local_agent(system: str) -> BaseAgent:
+    try:
+        module = import_compliance_module(f"{system.lower()}.agent")
+    except ImportError as e:
+        raise ImportError(
+            f"COMPLIANCE_A2A_MODE=inprocess requires the compliance_agents package; "
+            f"set COMPLIANCE_AGENTS_PATH to the directory that contains it ({e})"
+        ) from e
+    return module.root_agent
+
+
+def build_compliance_client(name: str, description: str, system: str) -> BaseAgent:
+    """
+    Compliance agent for a health system ("sus" or "nhs").
+
+    Returns a pooled RemoteA2aAgent, or the co-located agent from
+    compliance_agents when COMPLIANCE_A2A_MODE=inprocess. The agent name is the
+    same in both modes, so routing is unaffected.
+    """
+    if a2a_mode() == "inprocess":
+        local = _import_local_agent(system)
+        return local.clone(update={"name": name, "description": description})
+    return PooledRemoteA2aAgent(
+        name=name,
+        description=description,
+        agent_card=agent_card_url(system),
+    )
@@ -1,24 +1,32 @@
 from google.adk.agents import LlmAgent
 
+from common.callbacks import after_model_callbacks, before_model_callbacks
+from common.models import get_model
 
+from .fanout import build_fanout_agent
+from .routing import BOTH_AGENT, route_before_model
 from .subagents.sus.agent import root_agent as sus_compliance_agent
 from .subagents.nhs.agent import root_agent as nhs_compliance_agent
 
 root_agent = LlmAgent(
     name="compliance_agent",
-    model="gemini-2.0-flash",
+    model=get_model("compliance_agent"),
     description="Agente de conformidade que encaminha solicitações para agentes específicos do SUS e do NHS.",
-    instruction="""
+    instruction=f"""
     You are a healthcare compliance routing agent.
 
     When the user asks about SUS (Sistema Único de Saúde - Brazil), delegate to sus_compliance_client.
     When the user asks about NHS (National Health Service - UK), delegate to nhs_compliance_client.
+    When the user asks about both systems, delegate to {BOTH_AGENT}.
 
     If unclear, ask which health system they're referring to.
     """,
+    # Explicit requests are routed deterministically, without a model call.
+    before_model_callback=[route_before_model] + before_model_callbacks(),
+    after_model_callback=after_model_callbacks(),
     sub_agents=[
         sus_compliance_agent,
         nhs_compliance_agent,
+        build_fanout_agent(BOTH_AGENT, sus_compliance_agent, nhs_compliance_agent),
     ],
 )
-
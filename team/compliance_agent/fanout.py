@@ -0,0 +1,106 @@
+"""
+Both-Systems Compliance Fan-out
+
+Calls the SUS and NHS remote compliance agents concurrently and merges their
+SusComplianceResponse / NhsComplianceResponse payloads into a single report
+stored in state under ``compliance_report``.
+"""
+
+import json
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.agents import BaseAgent, ParallelAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+from typing_extensions import override
+
+from .a2a_client import import_compliance_module
+
+# --- Constants ---
+OUTPUT_KEY = "compliance_report"
+COMPLIANCE_ORDER = ["compliant", "review_required", "non_compliant"]
+SEVERITY_ORDER = ["low", "medium", "high"]
+
+# The compliance agents' own JSON extraction (prose, code fences, truncation).
+_extract_json = import_compliance_module("schema_repair").extract_json
+
+
+def parse_compliance_json(text: str) -> Optional[Dict[str, Any]]:
+    """Parse a compliance response with compliance_agents/schema_repair.py's extraction."""
+    value, _ = _extract_json(text)
+    return value if isinstance(value, dict) else None
+
+
+def _worst(values: List[Optional[str]], order: List[str]) -> Optional[str]:
+    ranked = [v for v in values if v in order]
+    return max(ranked, key=order.index) if ranked else None
+
+
+def merge_compliance_reports(reports: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Merge per-system reports ({"SUS": {...}, "NHS": {...}}).
+
+    The overall verdict and severity are the most severe across systems;
+    issues and recommendations are concatenated and tagged with their system.
+    """
+    available = {system: report for system, report in reports.items() if report}
+    issues, recommendations = [], []
+    for system, report in available.items():
+        issues.extend({**issue, "system": system} for issue in report.get("issues", []))
+        recommendations.extend(f"[{system}] {rec}" for rec in report.get("recommendations", []))
+
+    return {
+        "systems": list(reports),
+        "overall_compliance": _worst(
+            [r.get("overall_compliance") for r in available.values()], COMPLIANCE_ORDER
+        ) or "review_required",
+        "severity": _worst([r.get("severity") for r in available.values()], SEVERITY_ORDER) or "medium",
+        "issues": issues,
+        "recommendations": recommendations,
+        "reports": reports,
+        "missing_systems": [system for system, report in reports.items() if not report],
+    }
+
+
+class ComplianceFanOutAgent(BaseAgent):
+    """Runs one remote compliance agent per health system concurrently and merges the results."""
+
+    systems: Dict[str, str]
+    """Health system -> name of the sub-agent that evaluates it."""
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        parallel = self.sub_agents[0]
+        texts: Dict[str, str] = {}
+        async for event in parallel.run_async(ctx):
+            if event.content and event.content.parts and not event.partial:
+                text = "".join(part.text or "" for part in event.content.parts)
+                if text:
+                    texts[event.author] = text
+            yield event
+
+        reports = {
+            system: parse_compliance_json(texts.get(agent_name, ""))
+            for system, agent_name in self.systems.items()
+        }
+        merged = merge_compliance_reports(reports)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=json.dumps(merged, ensure_ascii=False))]),
+            actions=EventActions(state_delta={OUTPUT_KEY: merged}),
+        )
+
+
+def build_fanout_agent(name: str, sus_agent: BaseAgent, nhs_agent: BaseAgent) -> ComplianceFanOutAgent:
+    """Fan-out agent over private copies of the SUS and NHS agents (renamed to keep agent names unique)."""
+    sus = sus_agent.clone(update={"name": f"{name}_sus"})
+    nhs = nhs_agent.clone(update={"name": f"{name}_nhs"})
+    return ComplianceFanOutAgent(
+        name=name,
+        description="Evaluates the prescription against both SUS and NHS concurrently and merges the results.",
+        systems={"SUS": sus.name, "NHS": nhs.name},
+        sub_agents=[ParallelAgent(name=f"{name}_parallel", sub_agents=[sus, nhs])],
+    )
@@ -0,0 +1,101 @@
+"""
+Deterministic Compliance Routing
+
+Pre-router for compliance_agent. When the target health system is explicit,
+the router's model call is replaced by a direct ``transfer_to_agent`` call,
+so no Gemini call is spent on routing.
+
+The target is taken from (first match wins):
+    1. An explicit ``system: SUS|NHS|BOTH`` line in the request (the way for
+       callers to choose the system).
+    2. Unambiguous keywords: SUS/Brazil terms only -> SUS, NHS/UK terms only
+       -> NHS, both -> BOTH.
+Anything else falls back to the LLM router.
+"""
+
+import logging
+import os
+import re
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+SUS_AGENT = "sus_compliance_client"
+NHS_AGENT = "nhs_compliance_client"
+BOTH_AGENT = "both_systems_compliance"
+TARGETS = {"SUS": SUS_AGENT, "NHS": NHS_AGENT, "BOTH": BOTH_AGENT}
+
+_EXPLICIT_RE = re.compile(r"^\s*(?:system|sistema)\s*[:=]\s*(SUS|NHS|BOTH|AMBOS)\b",
+                          re.IGNORECASE | re.MULTILINE)
+_SUS_RE = re.compile(r"\bSUS\b|Sistema [UÚ]nico de Sa[uú]de|\bRENAME\b|\bANVISA\b")
+_NHS_RE = re.compile(r"\bNHS\b|National Health Service|\bNICE\b|\bBNF\b")
+
+
+def fast_routing_enabled() -> bool:
+    return os.getenv("COMPLIANCE_FAST_ROUTING", "1").strip().lower() not in ("0", "false", "off", "no")
+
+
+def detect_target_system(text: str) -> Optional[str]:
+    """
+    Resolve the target health system without an LLM.
+
+    Returns:
+        Optional[str]: "SUS", "NHS", "BOTH", or None when routing is ambiguous.
+    """
+    explicit = _EXPLICIT_RE.search(text)
+    if explicit:
+        value = explicit.group(1).upper()
+        return "BOTH" if value == "AMBOS" else value
+
+    sus, nhs = bool(_SUS_RE.search(text)), bool(_NHS_RE.search(text))
+    if sus and nhs:
+        return "BOTH"
+    if sus:
+        return "SUS"
+    if nhs:
+        return "NHS"
+    return None
+
+
+def _last_user_text(llm_request: LlmRequest) -> Optional[str]:
+    """Text of the latest turn, or None if the latest turn is not a user message."""
+    if not llm_request.contents:
+        return None
+    content = llm_request.contents[-1]
+    if content.role != "user" or not content.parts:
+        return None
+    if any(part.function_response for part in content.parts):
+        return None
+    return "\n".join(part.text for part in content.parts if part.text)
+
+
+def route_before_model(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """before_model_callback: transfer directly when the target system is unambiguous."""
+    if not fast_routing_enabled():
+        return None
+
+    text = _last_user_text(llm_request)
+    if text is None:
+        return None
+
+    target = detect_target_system(text)
+    if target is None:
+        return None
+
+    logger.debug("Compliance fast path: routing to %s without an LLM call", TARGETS[target])
+    return LlmResponse(
+        content=types.Content(
+            role="model",
+            parts=[types.Part(function_call=types.FunctionCall(
+                name="transfer_to_agent", args={"agent_name": TARGETS[target]},
+            ))],
+        ),
+        custom_metadata={"compliance_fast_route": target},
+    )
@@ -1,18 +1,11 @@
-from google.adk.agents.remote_a2a_agent import AGENT_CARD_WELL_KNOWN_PATH
-from google.adk.agents.remote_a2a_agent import RemoteA2aAgent
+from ...a2a_client import build_compliance_client
 
-# SUS_A2A_AGENT_CARD_URL = os.getenv(
-#     "SUS_A2A_AGENT_CARD_URL",
-#     "http://127.0.0.1:9001/.well-known/agent-card.json",
-# )
-
-
-sus_compliance_client= RemoteA2aAgent(
+# Card URL: SUS_A2A_AGENT_CARD_URL, or COMPLIANCE_A2A_BASE_URL + /a2a/sus/.well-known/agent-card.json.
+# Set COMPLIANCE_A2A_MODE=inprocess to run compliance_agents/sus in this process instead.
+sus_compliance_client = build_compliance_client(
     name="sus_compliance_client",
     description="Client agent que encaminha análise para o SUSComplianceAgent remoto via A2A.",
-    agent_card=(
-        f"https://a2a-server-health-894271896157.europe-west1.run.app/a2a/sus{AGENT_CARD_WELL_KNOWN_PATH}"
-    ),
+    system="sus",
 )
 
-root_agent = sus_compliance_client
\ No newline at end of file
+root_agent = sus_compliance_client
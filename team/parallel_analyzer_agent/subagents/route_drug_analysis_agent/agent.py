@@ -6,10 +6,16 @@ This agent is responsible for gathering and analyzing CPU information.
 
 from google.adk.agents import LlmAgent
 
+from common.callbacks import (
+    after_agent_callbacks, after_model_callbacks, before_agent_callbacks, before_model_callbacks,
+)
+from common.incremental import PRESCRIPTION
+from common.models import get_model
+
 # from .tools import get_cpu_info
 
 # --- Constants ---
-GEMINI_MODEL = "gemini-2.0-flash"
+GEMINI_MODEL = get_model("route_drug_analysis_agent", cascade=True)
 
 # Route Analysis Agent
 route_drug_analysis_agent = LlmAgent(
@@ -36,5 +42,10 @@ route_drug_analysis_agent = LlmAgent(
     """,
     description="Analyzes medication route for critical safety alerts only.",
     # tools=[get_cpu_info],
+    # Reused per patient in incremental mode (INCREMENTAL_ANALYSIS)
+    before_agent_callback=before_agent_callbacks("route_drug_analysis", PRESCRIPTION),
+    after_agent_callback=after_agent_callbacks("route_drug_analysis", PRESCRIPTION),
+    before_model_callback=before_model_callbacks(),
+    after_model_callback=after_model_callbacks(),
     output_key="route_drug_analysis",
 )
@@ -7,8 +7,11 @@ to create a comprehensive essay report.
 
 from google.adk.agents import LlmAgent
 
+from common.callbacks import after_model_callbacks, before_model_callbacks
+from common.models import get_model
+
 # --- Constants ---
-GEMINI_MODEL = "gemini-2.0-flash"
+GEMINI_MODEL = get_model("drug_report_synthesizer")
 
 from pydantic import BaseModel, Field
 
@@ -55,5 +58,7 @@ drug_report_synthesizer = LlmAgent(
     """,
     description="Synthesizes safety analyses from multiple specialist agents into final safety assessment.",
     output_schema=IndividualCriticalityOutput,
+    before_model_callback=before_model_callbacks(),
+    after_model_callback=after_model_callbacks(),
     output_key="synthesized_results_criticality",
 )
@@ -2,9 +2,11 @@ from google.adk.agents import Agent
 from google.adk.tools import google_search
 from datetime import datetime
 
+from common.models import get_model
+
 root_agent = Agent(
     name="search_agent",
-    model="gemini-2.0-flash",
+    model=get_model("search_agent"),
     description="Agente de busca",
     instruction="""
     Você é um agente que utiliza ferramentas para responder às perguntas do usuário:
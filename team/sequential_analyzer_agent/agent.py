@@ -3,21 +3,67 @@ Sequential Agent with a Minimal Callback
 
 This example demonstrates a lead qualification pipeline with a minimal
 before_agent_callback that only initializes state once at the beginning.
+
+Two execution modes are available (SEQUENTIAL_PIPELINE_MODE):
+- strict (default): general -> treatment -> synthesizer, one after the other.
+- pipelined: the prescription-only treatment planning (duration estimates and
+  monitoring needs) runs concurrently with the general health report, so the
+  treatment assessment only has to add the patient impact analysis.
 """
 
-from google.adk.agents import SequentialAgent
+import os
+
+from google.adk.agents import ParallelAgent, SequentialAgent
 
 from .subagents.general import general_health_agent
+from .subagents.treatment import TREATMENT_PLAN_SECTION as TREATMENT_PLAN_FOR_ASSESSMENT
 from .subagents.treatment import treatment_assessment_agent
+from .subagents.treatment_planning import treatment_planning_agent
 
 # Import the subagents
+from .subagents.synthesizer import TREATMENT_PLAN_SECTION as TREATMENT_PLAN_FOR_SYNTHESIS
 from .subagents.synthesizer import synthesizer_health_report_agent
 
-# Create the sequential agent with minimal callback
-root_agent = SequentialAgent(
-    name="holistic_qualification_agent",
-    sub_agents=[general_health_agent, 
-                treatment_assessment_agent, 
-                synthesizer_health_report_agent],
-    description="Pipeline that analyzes general health, assesses treatment impact, and synthesizes a comprehensive health report.",
-)
+# --- Constants ---
+PIPELINE_MODE = os.getenv("SEQUENTIAL_PIPELINE_MODE", "strict")
+PIPELINE_MODES = ("strict", "pipelined")
+
+
+def _with_treatment_plan(agent, section: str):
+    """Clone of ``agent`` whose instruction also receives the treatment plan pre-assessment."""
+    return agent.clone(update={"instruction": agent.instruction + section})
+
+
+def build_pipeline(mode: str = PIPELINE_MODE) -> SequentialAgent:
+    """
+    Build the sequential analyzer for the given execution mode.
+
+    Sub-agents are cloned so that several pipelines can be built in the same
+    process (an ADK agent can only have one parent). Only pipelined mode adds
+    the treatment plan pre-assessment to the prompts; strict mode keeps them
+    as they are.
+    """
+    if mode == "strict":
+        sub_agents = [general_health_agent.clone(),
+                      treatment_assessment_agent.clone(),
+                      synthesizer_health_report_agent.clone()]
+    elif mode == "pipelined":
+        sub_agents = [ParallelAgent(
+                          name="general_and_planning_analyzer",
+                          sub_agents=[general_health_agent.clone(),
+                                      treatment_planning_agent.clone()],
+                      ),
+                      _with_treatment_plan(treatment_assessment_agent, TREATMENT_PLAN_FOR_ASSESSMENT),
+                      _with_treatment_plan(synthesizer_health_report_agent, TREATMENT_PLAN_FOR_SYNTHESIS)]
+    else:
+        raise ValueError(f"Unknown pipeline mode '{mode}', expected one of {PIPELINE_MODES}")
+
+    return SequentialAgent(
+        name="holistic_qualification_agent",
+        sub_agents=sub_agents,
+        description="Pipeline that analyzes general health, assesses treatment impact, and synthesizes a comprehensive health report.",
+    )
+
+
+# Create the sequential agent for the configured mode
+root_agent = build_pipeline()
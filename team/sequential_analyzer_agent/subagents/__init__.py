@@ -1,4 +1,4 @@
 """Subagents for the lead qualification pipeline."""
 
 # from . import synthesizer_health_report_agent, general_health_agent, treatment_assessment_agent
-from . import general, synthesizer, treatment
+from . import general, synthesizer, treatment, treatment_planning
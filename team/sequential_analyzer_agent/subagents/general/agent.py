@@ -7,8 +7,14 @@ to generate comprehensive health reports.
 
 from google.adk.agents import LlmAgent
 
+from common.callbacks import (
+    after_agent_callbacks, after_model_callbacks, before_agent_callbacks, before_model_callbacks,
+)
+from common.incremental import STABLE
+from common.models import get_model
+
 # --- Constants ---
-GEMINI_MODEL = "gemini-2.0-flash"
+GEMINI_MODEL = get_model("general_health_agent")
 
 # Create the general health analysis agent
 general_health_agent = LlmAgent(
@@ -35,5 +41,10 @@ general_health_agent = LlmAgent(
     Format your response clearly and structured, facilitating reading and comprehension.
     """,
     description="Analyzes patient records and prescriptions generating comprehensive health reports.",
+    # Reused per patient in incremental mode (INCREMENTAL_ANALYSIS)
+    before_agent_callback=before_agent_callbacks("general_health_report", STABLE),
+    after_agent_callback=after_agent_callbacks("general_health_report", STABLE),
+    before_model_callback=before_model_callbacks(stable_input=True),
+    after_model_callback=after_model_callbacks(),
     output_key="general_health_report",
 )
@@ -1,3 +1,3 @@
 """Scorer agent for lead qualification."""
 
-from .agent import synthesizer_health_report_agent
+from .agent import TREATMENT_PLAN_SECTION, synthesizer_health_report_agent
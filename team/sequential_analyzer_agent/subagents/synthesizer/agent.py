@@ -15,6 +15,9 @@ and treatment impact assessment into a comprehensive, unified health report.
 from google.adk.agents import LlmAgent
 from pydantic import BaseModel, Field
 
+from common.callbacks import after_model_callbacks, before_model_callbacks
+from common.models import get_model
+
 class SynthesizedHealthReport(BaseModel):
     # Criticality alerts for variables not mapped by other agents
     treatment_duration_criticality: str = Field(..., description="Criticality level for treatment duration: low, medium, high",
@@ -31,7 +34,12 @@ class SynthesizedHealthReport(BaseModel):
     actionable_recommendations: str = Field(..., description="Clear, actionable recommendations for healthcare providers and patient care")
 
 # --- Constants ---
-GEMINI_MODEL = "gemini-2.0-flash"
+GEMINI_MODEL = get_model("synthesizer_health_report_agent")
+# Appended to the instruction in pipelined mode (see build_pipeline).
+TREATMENT_PLAN_SECTION = """
+    Treatment Plan Pre-assessment (duration and monitoring):
+    {treatment_plan_assessment}
+    """
 
 # Create the synthesizer agent
 synthesizer_health_report_agent = LlmAgent(
@@ -80,5 +88,7 @@ synthesizer_health_report_agent = LlmAgent(
     """,
     description="Synthesizes health analyses into simplified report with criticality alerts and actionable insights.",
     output_schema=SynthesizedHealthReport,
+    before_model_callback=before_model_callbacks(),
+    after_model_callback=after_model_callbacks(),
     output_key="synthesized_health_report",
 )
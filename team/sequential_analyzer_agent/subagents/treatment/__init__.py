@@ -1,3 +1,3 @@
 """Recommender agent for lead qualification."""
 
-from .agent import treatment_assessment_agent
+from .agent import TREATMENT_PLAN_SECTION, treatment_assessment_agent
@@ -7,8 +7,18 @@ potential impacts on patients based on their medical history and current prescri
 
 from google.adk.agents import LlmAgent
 
+from common.callbacks import after_model_callbacks, before_model_callbacks
+from common.models import get_model
+
 # --- Constants ---
-GEMINI_MODEL = "gemini-2.0-flash"
+GEMINI_MODEL = get_model("treatment_assessment_agent")
+# Appended to the instruction in pipelined mode (see build_pipeline).
+TREATMENT_PLAN_SECTION = """
+    Reuse the duration and monitoring estimates of the treatment plan pre-assessment below instead of re-deriving them, and focus on patient impact and historical correlation.
+
+    Treatment Plan Pre-assessment:
+    {treatment_plan_assessment}
+    """
 
 # Create the treatment assessment agent
 treatment_assessment_agent = LlmAgent(
@@ -50,5 +60,7 @@ treatment_assessment_agent = LlmAgent(
     {general_health_report}
     """,
     description="Assesses treatment duration and evaluates potential patient impacts based on medical history correlation.",
+    before_model_callback=before_model_callbacks(),
+    after_model_callback=after_model_callbacks(),
     output_key="treatment_impact_assessment",
 )
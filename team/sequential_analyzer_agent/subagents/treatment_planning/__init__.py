@@ -0,0 +1,3 @@
+"""Treatment planning agent for prescription-only duration and monitoring estimates."""
+
+from .agent import treatment_planning_agent
@@ -0,0 +1,42 @@
+"""
+Treatment Planning Agent
+
+This agent estimates treatment duration and monitoring needs directly from the
+prescription list. It does not depend on the general health report, so the
+pipelined sequential analyzer runs it concurrently with general_health_agent.
+"""
+
+from google.adk.agents import LlmAgent
+
+from common.callbacks import after_model_callbacks, before_model_callbacks
+from common.models import get_model
+
+# --- Constants ---
+GEMINI_MODEL = get_model("treatment_planning_agent")
+
+# Create the treatment planning agent
+treatment_planning_agent = LlmAgent(
+    name="treatment_planning_agent",
+    model=GEMINI_MODEL,
+    instruction="""You are a treatment planning agent that reads the prescription list of a patient admission and the current prescription.
+
+    Using ONLY the prescriptions (drug, dose, route, start and stop dates), assess:
+
+    TREATMENT DURATION ESTIMATES:
+    - Estimated duration of each relevant therapy (from start/stop dates and typical course length)
+    - Short-term vs long-term therapy requirements
+    - Therapies likely to be extended or tapered
+
+    MONITORING NEEDS:
+    - Laboratory or clinical monitoring each therapy requires (e.g., renal function, electrolytes, drug levels)
+    - Suggested monitoring frequency
+    - Therapies with narrow therapeutic index or cumulative toxicity
+
+    Do not analyze the patient's broader clinical picture; another agent does that concurrently.
+    Provide a concise, structured list organized by drug, with estimated timeframes and monitoring requirements.
+    """,
+    description="Estimates treatment duration and monitoring needs from the prescription list only.",
+    before_model_callback=before_model_callbacks(),
+    after_model_callback=after_model_callbacks(),
+    output_key="treatment_plan_assessment",
+)
@@ -1,3 +1,5 @@
+import asyncio
+
 from google.adk.agents import Agent
 # from google.adk.tools import google_search
 from datetime import datetime
@@ -11,12 +13,20 @@ import os
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from pinecone import Pinecone
 
+from common.callbacks import (
+    after_model_callbacks, after_tool_callbacks, before_model_callbacks, before_tool_callbacks,
+)
+from common.concurrency import model_slot
+from common.models import get_model
+from common.tracing import set_attributes, span
+
 load_dotenv()
 
 # Initialize Pinecone RAG (lazy initialization)
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 INDEX_NAME = "health-rag"
+EMBEDDING_MODEL = "models/gemini-embedding-001"
 
 _pc = None
 _index = None
@@ -30,7 +40,7 @@ def _initialize_rag():
         _pc = Pinecone(api_key=PINECONE_API_KEY)
         _index = _pc.Index(INDEX_NAME)
         _embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/gemini-embedding-001",
+            model=EMBEDDING_MODEL,
             google_api_key=GOOGLE_API_KEY
         )
 
@@ -64,15 +74,21 @@ async def query_medical_knowledge(
         top_k = min(max(1, top_k), 10)
         min_score = max(0.0, min(1.0, min_score))
 
-        # Generate embedding for query
-        query_embedding = _embeddings.embed_query(query)
+        # Generate embedding for query (in a thread, so cancelling the run stops waiting for it),
+        # within the embedding model's concurrency limit
+        with span("rename.embed_query", **{"rag.query_chars": len(query)}):
+            async with model_slot(EMBEDDING_MODEL, caller="query_medical_knowledge"):
+                query_embedding = await asyncio.to_thread(_embeddings.embed_query, query)
 
         # Search in Pinecone
-        results = _index.query(
-            vector=query_embedding,
-            top_k=top_k,
-            include_metadata=True
-        )
+        with span("pinecone.query", **{"db.namespace": INDEX_NAME, "rag.top_k": top_k}) as query_span:
+            results = await asyncio.to_thread(
+                _index.query,
+                vector=query_embedding,
+                top_k=top_k,
+                include_metadata=True
+            )
+            query_span.set_attribute("rag.matches", len(results['matches']))
 
         # Filter by minimum score and format results
         filtered_results = []
@@ -85,6 +101,8 @@ async def query_medical_knowledge(
                     'relevance_score': round(match['score'], 3)
                 })
 
+        set_attributes(**{"rag.results": len(filtered_results), "rag.min_score": min_score})
+
         if not filtered_results:
             return {
                 'status': 'no_results',
@@ -117,7 +135,7 @@ class CriticalityOutput(BaseModel):
 
 root_agent = Agent(
     name="simple_prescription_agent",
-    model="gemini-2.0-flash",
+    model=get_model("simple_prescription_agent"),
     description="Clinical prescription safety agent for routine safety checks",
     instruction="""
     You are a clinical prescription safety agent that performs routine safety checks on patient prescriptions.
@@ -151,5 +169,9 @@ root_agent = Agent(
     """,
     tools=[query_medical_knowledge],
     output_schema=CriticalityOutput,
+    before_model_callback=before_model_callbacks(),
+    after_model_callback=after_model_callbacks(),
+    before_tool_callback=before_tool_callbacks(),
+    after_tool_callback=after_tool_callbacks(),
     output_key="results_criticality",
 )